@@ -6,6 +6,10 @@ Boards for text games.
 Copyright (C) 2018 by Craig O'Brien and the t_games contributors.
 See the top level __init__.py file for details on the t_games license.
 
+Constants:
+LAYOUTS: The shared layouts of boards by shape. (dict of hashable: tuple)
+NO_CELL: The offset table entry for an offset off the board. (int)
+
 Classes:
 BoardCell: A square (or other shape) in a board that holds one piece. (object)
 MultiCell: A position on a board that holds multiple pieces. (object)
@@ -14,10 +18,21 @@ Board: A playing board for a game. (object)
 DimBoard: A board of squares in variable dimensions. (Board)
 LineBoard: A board of spaces in a line. (Board)
 MultiBoard: A board with multiple pieces per cell. (Board)
+
+Functions:
+dim_layout: Get the shared layout of a board of squares. (tuple)
+make_layout: Get the order of a board's locations and their offset tables. (tuple)
+offset_indexes: Get the index of the location an offset away from each location. (list of int)
 """
 
 
 import itertools
+import operator
+
+
+LAYOUTS = {}
+
+NO_CELL = -1
 
 
 class BoardCell(object):
@@ -339,9 +354,9 @@ class Coordinate(tuple):
         Parameters:
         other: The coordinate to add to (list, tuple, or Coordinate)
         """
-        if isinstance(other, (Coordinate, tuple, list)):
+        if isinstance(other, (tuple, list)):
             if len(self) == len(other):
-                return Coordinate([a + b for a, b in zip(self, other)])
+                return tuple.__new__(Coordinate, map(operator.add, self, other))
             else:
                 raise ValueError('Coordinates can only add in the same dimension.')
         else:
@@ -398,9 +413,9 @@ class Coordinate(tuple):
         Parameters:
         other: The coordinate to subtract. (list, tuple, or Coordinate)
         """
-        if isinstance(other, (Coordinate, tuple, list)):
+        if isinstance(other, (tuple, list)):
             if len(self) == len(other):
-                return Coordinate([a - b for a, b in zip(self, other)])
+                return tuple.__new__(Coordinate, map(operator.sub, self, other))
             else:
                 raise ValueError('Coordinates can only add in the same dimension.')
         else:
@@ -411,9 +426,20 @@ class Board(object):
     """
     A playing board for a game. (object)
 
+    The cells are stored both by location, in the cells dictionary, and by
+    index, in the cell_list. The offset tables give the index of the cell an
+    offset away from each cell, so scans of neighboring cells can be done with
+    list indexes instead of adding locations and checking for them being on the
+    board. Offset tables are made the first time an offset is used, and boards
+    with the same layout share them.
+
     Attributes:
+    cell_list: The cells in the order of the locations. (list of BoardCell)
     cells: The locations that make up the board. (dict of Coordinate: BoardCell)
     extra_cells: A list of non-standard locations. (list of BoardCell)
+    location_index: The index of each location. (dict of hashable: int)
+    locations: The locations of the cells, not counting extra cells. (list of hashable)
+    offset_tables: The offset_indexes for each offset used. (dict of hashable: list of int)
 
     Methods:
     clear: Clear all pieces off the board. (None)
@@ -421,6 +447,7 @@ class Board(object):
     displace: Move a piece from one cell to another w/ displace capture. (object)
     move: Move a piece from one cell to another. (object)
     offset: Return a cell offset from another cell (BoardCell)
+    offset_table: Get the index of the cell an offset away from each cell. (list of int)
     place: Place a piece in a cell. (None)
     safe: Determine if a cell is safe from capture. (bool)
     safe_displace: Move a piece with displace capture if target not safe. (object)
@@ -431,15 +458,20 @@ class Board(object):
     __repr__
     """
 
-    def __init__(self, locations = [], cell_class = BoardCell):
+    def __init__(self, locations = [], cell_class = BoardCell, layout = None):
         """
         Set up the cells. (None)
 
         Parameters:
         locations: The locations of the cells on the board. (list of hashable)
         cell_class: The class for the cells on the board. (class)
+        layout: The layout of the locations, from make_layout. (tuple)
         """
-        self.cells = {location: cell_class(location) for location in locations}
+        if layout is None:
+            layout = make_layout(locations)
+        self.locations, self.location_index, self.offset_tables = layout
+        self.cell_list = [cell_class(location) for location in self.locations]
+        self.cells = dict(zip(self.locations, self.cell_list))
         self.extra_cells = []
 
     def __iter__(self):
@@ -510,7 +542,30 @@ class Board(object):
         cell: The location of the starting cell. (Coordinate)
         offset: The relative location of the target cell. (Coordinate)
         """
-        return self.cells[cell + offset]
+        index = self.location_index.get(cell)
+        # Extra cells are not in the offset tables.
+        if index is None:
+            return self.cells[cell + offset]
+        target = self.offset_table(offset)[index]
+        if target == NO_CELL:
+            raise KeyError('There is no cell {!r} from {!r}.'.format(offset, cell))
+        return self.cell_list[target]
+
+    def offset_table(self, offset):
+        """
+        Get the index of the cell an offset away from each cell. (list of int)
+
+        The table is indexed by the index of the starting cell, and has NO_CELL
+        where the offset would go off of the board.
+
+        Parameters:
+        offset: The relative location of the target cells. (Coordinate)
+        """
+        if isinstance(offset, list):
+            offset = tuple(offset)
+        if offset not in self.offset_tables:
+            self.offset_tables[offset] = offset_indexes(self.locations, self.location_index, offset)
+        return self.offset_tables[offset]
 
     def place(self, cell, piece):
         """
@@ -568,6 +623,9 @@ class DimBoard(Board):
     """
     A board of squares in variable dimensions. (Board)
 
+    The offset tables for each step to a neighboring square, orthogonally or
+    diagonally, are made with the first board of each size.
+
     Attributes:
     cell_class: The class defining the individual cells. (type)
     dimensions: The dimensions of the board, in cells. (tuple of int)
@@ -591,11 +649,8 @@ class DimBoard(Board):
         # Store the definition.
         self.dimensions = dimensions
         self.cell_class = cell_class
-        # Calculate the locations.
-        locations = itertools.product(*[range(1, dimension + 1) for dimension in self.dimensions])
-        locations = [Coordinate(location) for location in locations]
         # Set up the cells.
-        super(DimBoard, self).__init__(locations, cell_class)
+        super(DimBoard, self).__init__(cell_class = cell_class, layout = dim_layout(self.dimensions))
 
     def __repr__(self):
         """Create a debugging text representation. (str)"""
@@ -614,7 +669,8 @@ class LineBoard(Board):
     """
     A board of spaces in a line. (Board)
 
-    The line may be bent or looped.
+    The line may be bent or looped. The offset tables for one step in either
+    direction are made with the first board of each length.
 
     Attributes:
     cell_class: The class defining the individual cells. (type)
@@ -639,7 +695,8 @@ class LineBoard(Board):
         # Set up the standard board cells.
         self.length = length
         self.cell_class = cell_class
-        super(LineBoard, self).__init__(range(1, length + 1), cell_class)
+        layout = make_layout(range(1, length + 1), (1, -1), ('line', length))
+        super(LineBoard, self).__init__(cell_class = cell_class, layout = layout)
         # Set up any extra cells.
         self.extra_cells = extra_cells
         for location in self.extra_cells:
@@ -718,6 +775,67 @@ class MultiBoard(DimBoard):
         self.cells[cell].piece.append(piece)
 
 
+def dim_layout(dimensions):
+    """
+    Get the shared layout of a board of squares. (tuple)
+
+    The layout has the offset tables for each step to a neighboring square,
+    orthogonally or diagonally. See make_layout for the details.
+
+    Parameters:
+    dimensions: The dimensions of the board, in cells. (tuple of int)
+    """
+    key = ('dim', tuple(dimensions))
+    if key in LAYOUTS:
+        return LAYOUTS[key]
+    locations = itertools.product(*[range(1, dimension + 1) for dimension in dimensions])
+    locations = (Coordinate(location) for location in locations)
+    directions = itertools.product((-1, 0, 1), repeat = len(dimensions))
+    directions = [Coordinate(direction) for direction in directions if any(direction)]
+    return make_layout(locations, directions, key)
+
+
+def make_layout(locations, directions = (), key = None):
+    """
+    Get the order of a board's locations and their offset tables. (tuple)
+
+    The return value is the list of locations, a dictionary of the index of
+    each location, and a dictionary of offset tables with the tables for the
+    directions already made. Layouts with a key are only made once, and are
+    then shared by every board with that key.
+
+    Parameters:
+    locations: The locations of the cells on the board. (iterable of hashable)
+    directions: The offsets to make tables for. (list of hashable)
+    key: The key for sharing the layout in LAYOUTS. (hashable)
+    """
+    if key is not None and key in LAYOUTS:
+        return LAYOUTS[key]
+    locations = list(locations)
+    location_index = {location: index for index, location in enumerate(locations)}
+    offset_tables = {}
+    for direction in directions:
+        offset_tables[direction] = offset_indexes(locations, location_index, direction)
+    layout = (locations, location_index, offset_tables)
+    if key is not None:
+        LAYOUTS[key] = layout
+    return layout
+
+
+def offset_indexes(locations, location_index, offset):
+    """
+    Get the index of the location an offset away from each location. (list of int)
+
+    Locations that the offset takes off of the board get NO_CELL.
+
+    Parameters:
+    locations: The locations of the cells on the board. (list of hashable)
+    location_index: The index of each location. (dict of hashable: int)
+    offset: The relative location of the target cells. (hashable)
+    """
+    return [location_index.get(location + offset, NO_CELL) for location in locations]
+
+
 if __name__ == '__main__':
     # Run the unit testing.
     from t_tests.board_test import *
@@ -0,0 +1,350 @@
+"""
+backgammon_bearoff.py
+
+A one-sided bearoff database for Backgammon endgames.
+
+A one-sided bearoff position is the number of pieces a player has on each of
+their six home points, with no pieces anywhere else. For every position of up
+to 15 pieces, the database stores the expected number of rolls to bear all of
+the pieces off with the best play, and the chance of finishing in exactly each
+number of rolls. The expected rolls give the exact best play when bearing off,
+and the distributions of two players give their chances in a race once both
+have all of their pieces home.
+
+Positions are numbered with the combinatorial number system, so the numbers
+do not depend on the most pieces in the database, and a database of fewer
+pieces is the start of a database of more pieces. The file is a header
+followed by fixed length records, one per position in order, and is memory
+mapped, so any position can be looked up without reading the whole file. The
+database is built offline with build_database. From the command line (in the
+folder above t_games):
+
+    python -m t_games.board_games.backgammon_bearoff [-c checkers] [-o file]
+
+Copyright (C) 2018 by Craig O'Brien and the t_games contributors.
+See the top level __init__.py file for details on the t_games license.
+
+Constants:
+CHECKERS: The most pieces in a full database. (int)
+DATABASE_PATH: The default location of the database file. (str)
+HEADER: The struct format for the header of a database file. (str)
+MAGIC: The marker at the start of a database file. (bytes)
+MAX_ROLLS: The number of rolls in the stored distributions. (int)
+POINTS: The number of home points. (int)
+RECORD: The struct format for the records of a database file. (str)
+RECORD_SIZE: The number of bytes in each record of a database file. (int)
+ROLLS: The distinct rolls of two dice, with their chances out of 36. (list of tuple)
+SCALE: The stored value of a certain chance. (int)
+
+Classes:
+BearoffDatabase: A memory mapped one-sided bearoff database. (object)
+
+Functions:
+build_database: Calculate a bearoff database and write it to a file. (BearoffDatabase)
+die_moves: Get the positions after playing one die. (set of tuple)
+load_database: Load the database, if there is one. (BearoffDatabase or None)
+position_count: Count the positions with up to a number of pieces. (int)
+position_index: Get the number of a bearoff position. (int)
+roll_results: Get the positions after playing a roll. (set of tuple)
+"""
+
+
+from __future__ import division, print_function
+
+import getopt
+import itertools
+import mmap
+import os
+import struct
+import sys
+
+from .. import utility
+
+
+CHECKERS = 15
+
+DATABASE_PATH = os.path.join(utility.LOC, 'backgammon_bearoff.db')
+
+HEADER = '<4sBBB'
+
+MAGIC = b'TGBO'
+
+MAX_ROLLS = 32
+
+POINTS = 6
+
+RECORD = '<f{}H'.format(MAX_ROLLS)
+
+RECORD_SIZE = struct.calcsize(RECORD)
+
+ROLLS = [([low] * 4 if low == high else [low, high], 1 if low == high else 2) for low in range(1, 7)
+    for high in range(low, 7)]
+
+SCALE = 65535
+
+
+class BearoffDatabase(object):
+    """
+    A memory mapped one-sided bearoff database. (object)
+
+    Positions are given as tuples of the number of pieces on each home point,
+    starting with the point closest to being born off.
+
+    Attributes:
+    checkers: The most pieces in a position in the database. (int)
+    count: The number of positions in the database. (int)
+    data: The memory mapped database file. (mmap.mmap)
+    path: The location of the database file. (str)
+
+    Methods:
+    close: Close the database file. (None)
+    expected_rolls: Get the expected number of rolls to bear off. (float)
+    lookup: Get the expected rolls and distribution for a position. (tuple)
+    win_chance: Get the chance of winning a race for the player on roll. (float)
+
+    Overridden Methods:
+    __init__
+    __contains__
+    __len__
+    __repr__
+    """
+
+    def __init__(self, path):
+        """
+        Load the database. (None)
+
+        Parameters:
+        path: The location of the database file. (str)
+        """
+        self.path = path
+        with open(path, 'rb') as database_file:
+            self.data = mmap.mmap(database_file.fileno(), 0, access = mmap.ACCESS_READ)
+        magic, version, points, self.checkers = struct.unpack_from(HEADER, self.data)
+        if magic != MAGIC or version != 1 or points != POINTS:
+            self.data.close()
+            raise ValueError('{!r} is not a bearoff database.'.format(path))
+        self.count = position_count(self.checkers)
+
+    def __contains__(self, position):
+        """
+        Check for a position being in the database. (bool)
+
+        Parameters:
+        position: The number of pieces on each home point. (tuple of int)
+        """
+        return len(position) == POINTS and min(position) >= 0 and sum(position) <= self.checkers
+
+    def __len__(self):
+        """The number of positions in the database. (int)"""
+        return self.count
+
+    def __repr__(self):
+        """Create a debugging text representation. (str)"""
+        return '<BearoffDatabase of {} positions with up to {} pieces>'.format(self.count, self.checkers)
+
+    def close(self):
+        """Close the database file. (None)"""
+        self.data.close()
+
+    def expected_rolls(self, position):
+        """
+        Get the expected number of rolls to bear off. (float)
+
+        If the position is not in the database, None is returned.
+
+        Parameters:
+        position: The number of pieces on each home point. (tuple of int)
+        """
+        if position not in self:
+            return None
+        return struct.unpack_from('<f', self.data, struct.calcsize(HEADER) +
+            position_index(position) * RECORD_SIZE)[0]
+
+    def lookup(self, position):
+        """
+        Get the expected rolls and distribution for a position. (tuple)
+
+        The return value is the expected number of rolls to bear off, and a list of
+        the chances of bearing off in exactly each number of rolls. If the position
+        is not in the database, None is returned.
+
+        Parameters:
+        position: The number of pieces on each home point. (tuple of int)
+        """
+        if position not in self:
+            return None
+        record = struct.unpack_from(RECORD, self.data, struct.calcsize(HEADER) +
+            position_index(position) * RECORD_SIZE)
+        return record[0], [chance / SCALE for chance in record[1:]]
+
+    def win_chance(self, on_roll, other):
+        """
+        Get the chance of winning a race for the player on roll. (float)
+
+        The player on roll wins if they need no more rolls than the other player.
+        If either position is not in the database, None is returned.
+
+        Parameters:
+        on_roll: The position of the player about to roll. (tuple of int)
+        other: The position of the other player. (tuple of int)
+        """
+        if on_roll not in self or other not in self:
+            return None
+        on_roll_chances = self.lookup(on_roll)[1]
+        other_chances = self.lookup(other)[1]
+        win = 0
+        other_left = 1
+        for rolls in range(MAX_ROLLS):
+            win += on_roll_chances[rolls] * other_left
+            other_left -= other_chances[rolls]
+        return min(1, max(0, win))
+
+
+def build_database(checkers = CHECKERS, path = ''):
+    """
+    Calculate a bearoff database and write it to a file. (BearoffDatabase)
+
+    Parameters:
+    checkers: The most pieces in a position in the database. (int)
+    path: The file to write the database to, defaults to DATABASE_PATH. (str)
+    """
+    # Get the file to write to.
+    if not path:
+        path = DATABASE_PATH
+    folder = os.path.dirname(path)
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder)
+    # Get the positions, with the closest to being born off first.
+    positions = [position for position in itertools.product(range(checkers + 1), repeat = POINTS)
+        if sum(position) <= checkers]
+    positions.sort(key = lambda position: sum(pieces * point for point, pieces in enumerate(position, 1)))
+    # Calculate the positions, each from the positions it can reach.
+    records = {positions[0]: (0.0, [1.0] + [0.0] * (MAX_ROLLS - 1))}
+    for position in positions[1:]:
+        expected = 1.0
+        chances = [0.0] * MAX_ROLLS
+        for rolls, roll_chance in ROLLS:
+            # Play the roll to leave the fewest expected rolls.
+            best = min(roll_results(position, rolls), key = lambda result: records[result][0])
+            best_expected, best_chances = records[best]
+            expected += best_expected * roll_chance / 36
+            for roll_count, chance in enumerate(best_chances[:-1], start = 1):
+                chances[roll_count] += chance * roll_chance / 36
+            chances[-1] += best_chances[-1] * roll_chance / 36
+        records[position] = (expected, chances)
+    # Write the database.
+    with open(path, 'wb') as database_file:
+        database_file.write(struct.pack(HEADER, MAGIC, 1, POINTS, checkers))
+        for position in sorted(positions, key = position_index):
+            expected, chances = records[position]
+            scaled = [int(round(chance * SCALE)) for chance in chances]
+            database_file.write(struct.pack(RECORD, expected, *scaled))
+    return BearoffDatabase(path)
+
+
+def die_moves(position, die):
+    """
+    Get the positions after playing one die. (set of tuple)
+
+    Parameters:
+    position: The number of pieces on each home point. (tuple of int)
+    die: The die to play. (int)
+    """
+    results = set()
+    occupied = [index for index, pieces in enumerate(position) if pieces]
+    for index in occupied:
+        point = index + 1
+        result = list(position)
+        result[index] -= 1
+        if point > die:
+            # Move the piece down.
+            result[index - die] += 1
+        elif point < die and index != occupied[-1]:
+            # Only the highest piece can be born off with a higher die.
+            continue
+        results.add(tuple(result))
+    return results
+
+
+def load_database(path = ''):
+    """
+    Load the database, if there is one. (BearoffDatabase or None)
+
+    Parameters:
+    path: The location of the database file, defaults to DATABASE_PATH. (str)
+    """
+    if not path:
+        path = DATABASE_PATH
+    if os.path.exists(path):
+        try:
+            return BearoffDatabase(path)
+        except (ValueError, struct.error, mmap.error):
+            return None
+    else:
+        return None
+
+
+def position_count(checkers):
+    """
+    Count the positions with up to a number of pieces. (int)
+
+    Parameters:
+    checkers: The most pieces in a position. (int)
+    """
+    return utility.choose(checkers + POINTS, POINTS)
+
+
+def position_index(position):
+    """
+    Get the number of a bearoff position. (int)
+
+    Each position is a way of placing a divider after each point's pieces, so it
+    is numbered by the places of the dividers in the combinatorial number system.
+
+    Parameters:
+    position: The number of pieces on each home point. (tuple of int)
+    """
+    index = 0
+    place = -1
+    for point, pieces in enumerate(position, 1):
+        place += pieces + 1
+        if place >= point:
+            index += utility.choose(place, point)
+    return index
+
+
+def roll_results(position, rolls):
+    """
+    Get the positions after playing a roll. (set of tuple)
+
+    Every die can be played until all of the pieces are born off, so the results
+    are all of the positions reached by playing the dice in either order.
+
+    Parameters:
+    position: The number of pieces on each home point. (tuple of int)
+    rolls: The dice to play. (list of int)
+    """
+    orders = [rolls] if rolls[0] == rolls[-1] else [rolls, rolls[::-1]]
+    results = set()
+    for order in orders:
+        positions = set([position])
+        for die in order:
+            next_positions = set()
+            for current in positions:
+                next_positions.update(die_moves(current, die) or [current])
+            positions = next_positions
+        results.update(positions)
+    return results
+
+
+if __name__ == '__main__':
+    # Build the database from the command line.
+    opts, args = getopt.getopt(sys.argv[1:], 'c:o:')
+    settings = {}
+    for option, value in opts:
+        if option == '-c':
+            settings['checkers'] = int(value)
+        elif option == '-o':
+            settings['path'] = value
+    database = build_database(**settings)
+    print('{} positions written to {}.'.format(len(database), database.path))
@@ -13,31 +13,73 @@ See the top level __init__.py file for details on the t_games license.
 
 Constants:
 BAR: The index of the bar. (int)
+BEAROFF: The one-sided bearoff database, if it has been built. (BearoffDatabase)
 CONTACT_WEIGHTS: Weights for PubEvalBot while there's' contact. (list of float)
 CREDITS: The credits for the game. (str)
+DOUBLE_EQUITY: The least cubeless equity for doubling. (float)
+FEATURE_SCALES: The scale of the weight for each board feature. (list of float)
 FRAME_HIGH: The top of the frame for displaying the board. (list of str)
 FRAME_LOW: The bottom of the frame for displaying the board. (list of str)
+HOMES: The home points for each BackgammonPosition sign, in bearing off order. (dict)
+ORDERED_ROLLS: The 36 ordered rolls of two dice. (list of tuple of int)
 OUT: The index for pieces born off the board. (int)
+PLAY_CACHE: The legal plays shared by all Backgammon boards. (PlayCache)
+PLAY_CACHE_SIZE: The number of positions kept in PLAY_CACHE. (int)
 RACE_WEIGHTS: Weights for PubEvalBot while it's a race. (list of float)
+ROLLOUT_TRIALS: The default number of trials in a rollout. (int)
+ROLLOUT_TURNS: The most turns played in one trial of a rollout. (int)
+ROLLS: The distinct rolls of two dice, with their chances out of 36. (list of tuple)
 RULES: The rules of Backgammon. (str)
+SHOT_TABLE: The rolls that hit a blot at each distance. (list of list of tuple)
 START: The index for pieces not yet in the game. (int)
+TAKE_EQUITY: The least cubeless equity for taking a double. (float)
+TD_NETWORK: The trained network for TDBot, if there is one. (TDNetwork or None)
+TD_PATH: The default location of the trained network for TDBot. (str)
+TOO_GOOD_EQUITY: The cubeless equity for playing on for a gammon. (float)
 
 Classes:
 BackgammonBot: A bot for a game of Backgammon. (player.bot)
 AdditiveBot: A genetic algorithm improvement of BackgammonBot. (BackgammonBot)
 BackGeneBot: A Backgammon bot for genetic engineering. (BackgammonBot)
 PubEvalBot: A bot based on Gerry Tesauro's pubeval algorithm. (BackgammonBot)
+ExpectimaxBot: A bot that looks ahead at the opponent's rolls. (PubEvalBot)
+TDBot: A bot using a neural network trained by self-play. (PubEvalBot)
 Backgammon: A game of Backgammon. (game.Game)
 BackgammonBoard: A board for Backgammon. (board.LineBoard)
 BackgammonPlay: A possible play (set of moves) in Backgammon. (object)
+BackgammonPosition: A compact Backgammon position for generating plays. (object)
+PlayCache: A least recently used cache of legal plays. (object)
+TDNetwork: A neural network for evaluating Backgammon positions. (object)
+
+Functions:
+load_network: Load a trained network, if there is one. (TDNetwork or None)
+phase_sums: Score board features against the weights for their phases. (list of float)
+play_out: Play a position out to the end of the game. (int)
+rollout: Roll out a Backgammon position. (dict)
+rollout_trials: Play out a chunk of trials of a rollout. (list of int)
+shot_table: Calculate the rolls that hit a blot at each distance. (list of list)
+should_double: Decide if the rollout results are good enough to double. (bool)
+should_take: Decide if the rollout results are good enough to take a double. (bool)
+weighted_sums: Score rows of features against a list of weights. (list of float)
 """
 
 
 from __future__ import print_function
 
+import collections
 import itertools
+import math
+import multiprocessing
+import os
 import random
+import time
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from . import backgammon_bearoff
 from .. import board
 from .. import dice
 from .. import game
@@ -66,14 +108,24 @@ Game Programming: Craig "Ichabod" O'Brien
 Bot Programming: Gerry Tesauro
 """
 
+DOUBLE_EQUITY = 0.36
+
+FEATURE_SCALES = [1, 1, 1, 1 / 6.0, 1 / 6.0, 1, 1, 1]
+
 FRAME_HIGH = ['  1 1 1 1 1 1   1 2 2 2 2 2  ', '  3 4 5 6 7 8   9 0 1 2 3 4  ',
     '+-------------+-------------+']
 
 FRAME_LOW = ['+-------------+-------------+', '  1 1 1                      ',
     '  2 1 0 9 8 7   6 5 4 3 2 1  ']
 
+HOMES = {1: (1, 2, 3, 4, 5, 6), -1: (24, 23, 22, 21, 20, 19)}
+
+ORDERED_ROLLS = [(first, second) for first in range(1, 7) for second in range(1, 7)]
+
 OUT = -2
 
+PLAY_CACHE_SIZE = 4096
+
 RACE_WEIGHTS = [0, -.17160, .27010, .29906, -.08471, 0, -1.40375, -1.05121, .07217, -.01351, 0, -1.29506,
     -2.16183, .13246, -1.03508, 0, -2.29847, -2.34631, .17253, .08302, 0, -1.27266, -2.87401, -.07456,
     -.34240, 0, -1.34640, -2.46556, -.13022, -.01591, 0, .27448, .60015, .48302, .25236, 0, .39521, .68178,
@@ -85,6 +137,13 @@ RACE_WEIGHTS = [0, -.17160, .27010, .29906, -.08471, 0, -1.40375, -1.05121, .072
     0, -.09795, -.83050, -1.09167, -4.94251, 0, -1.00316, -3.66465, -2.56906, -9.67677, 0, -2.77982,
     -7.26713, -3.40177, -12.32252, 0, 3.42040]
 
+ROLLOUT_TRIALS = 1296
+
+ROLLOUT_TURNS = 500
+
+ROLLS = [([low] * 4 if low == high else [low, high], 1 if low == high else 2) for low in range(1, 7)
+    for high in range(low, 7)]
+
 RULES = """
 Each player starts the game rolling one die, and the higher roll moves using
 the two numbers rolled. From then on turns alternate, each player rolling two
@@ -139,32 +198,61 @@ accept the doubled stakes or concede the game. After the initial doubling of
 the stakes, control of the doubling die goes to the player who accepted the
 doubling of the stakes, and only they can double the stakes again.
 
-You may get both players' pip counts at any time with the pips command.
+You may get both players' pip counts at any time with the pips command. If
+both players are bearing off and the bearoff database has been built, it also
+gives your chances in the race. The rollout command (or 'ro') plays the
+position out many times, and gives your chances of winning, winning a gammon,
+and winning a backgammon, as if you were about to roll. You may give it the
+number of trials to play, which defaults to 1296.
 
 Options:
 o: The human player plays with the red (O) pieces.
 layout (l): Which layout to use: long (lg), standard (st), nack (nk), or
     hyper (hy).
 match (m): The winning match score. Defaults to 1, or non-match play.
+expectimax (ex): Play against a bot that looks ahead at your possible rolls.
+    You may give it a number of seconds to think about each move, the number
+    of plays to look ahead from, and the number of rollout trials for doubling
+    decisions, as in expectimax=5/8/1296. They default to 2 seconds, 8 plays,
+    and no rollouts.
+td: Play against a bot using a neural network trained by self-play. Until a
+    network has been trained, it plays like the pubeval bot.
 """
 
 START = -3
 
+TAKE_EQUITY = -0.5
+
+TD_PATH = os.path.join(utility.LOC, 'backgammon_td.npz')
+
+TOO_GOOD_EQUITY = 1.0
+
 
 class BackgammonBot(player.Bot):
     """
     A bot for a game of Backgammon. (player.Bot)
 
+    If cube_trials is set, doubling decisions are made by rolling out the position
+    that many times, rather than by the bot's evaluation.
+
+    Class Attributes:
+    cube_trials: The number of rollout trials for doubling decisions. (int)
+
     Attributes:
     held_moves: Moves planned but not yet made through ask. (BackgammonPlay)
     piece: The symbol for the bot's pieces on the baord. (str)
 
     Methods:
+    cube_answer: Answer a doubling question with a rollout. (str)
     describe_board: Determine the features of the current board layout. (list)
     eval_board: Evaluate a board position. (list of int)
+    eval_boards: Evaluate several board positions. (list)
+    get_bearoff_play: Get the best bearoff play from the database. (BackgammonPlay)
     get_endgame: Get the moves at the end of the game. (BackgammonPlay)
     get_split_move: Get a move when the game has become a race to get home. (str)
     get_stretch_move: Get a move when all my pieces are home. (str)
+    get_win_count: Get the number of pieces to bear off for a win. (int)
+    score_boards: Score the boards after possible plays by the bot. (list)
 
     Overridden Methods:
     ask
@@ -174,6 +262,8 @@ class BackgammonBot(player.Bot):
     tell
     """
 
+    cube_trials = 0
+
     def ask(self, prompt):
         """
         Get information from the player. (str)
@@ -186,6 +276,9 @@ class BackgammonBot(player.Bot):
             roll_text = '-'.join(str(x) for x in self.game.rolls[:2])
             self.game.human.tell('\n{} rolled {} and has no legal moves.'.format(self.name, roll_text))
             return ''
+        # Use rollouts for doubling questions if requested.
+        elif self.cube_trials and 'double' in prompt:
+            return self.cube_answer(prompt)
         # Respond to being able to double.
         elif prompt.startswith('\nWould you like to double the stakes'):
             features, points = self.describe_board(self.game.board)
@@ -240,26 +333,16 @@ class BackgammonBot(player.Bot):
                 if max(my_points + [0]) + max(foe_points + [0]) <= 24 and not board.cells[BAR]:
                     self.held_moves = self.get_endgame(board, my_points)
                 else:
-                    # Evaluate all the legal plays.
-                    possibles = []
-                    for play in board.get_plays(self.piece, self.game.rolls):
-                        # Make the play.
+                    # Make all the legal plays.
+                    plays = board.get_plays(self.piece, self.game.rolls)
+                    sub_boards = []
+                    for play in plays:
                         sub_board = board.copy()
                         for move in play:
                             capture = sub_board.move(*move, piece = self.piece)
-                        # Get the board features.
-                        features, points = self.describe_board(sub_board)
-                        max_x = max(points['X']) if points['X'] else 0
-                        max_o = max(points['O']) if points['O'] else 0
-                        # Get the game phase.
-                        if max_x + max_o > 24 or sub_board.cells[BAR].contents:
-                            phase = 'mixed'
-                        elif max_x <= 6 and max_o < 6:
-                            phase = 'stretch'
-                        else:
-                            phase = 'split'
-                        # Store the evaluation with the move.
-                        possibles.append((self.eval_board(features, phase), play))
+                        sub_boards.append(sub_board)
+                    # Evaluate the plays together.
+                    possibles = list(zip(self.score_boards(sub_boards), plays))
                     # Choose the play with the highest evaluation.
                     possibles.sort(reverse = True)
                     self.held_moves = possibles[0][1]
@@ -289,8 +372,11 @@ class BackgammonBot(player.Bot):
         """
         Calculate the possible captures in the given position. (tuple of dict)
 
-        The return value is two dictionaries, one with the direct hits and one with the
-        indirect hits. Each is keyed by the piece symbol that would be captured.
+        The return value is two dictionaries, one with the number of the 36 rolls
+        that hit a blot with one die, and one with the number of rolls that hit a
+        blot with one die or by combining dice. Each is keyed by the piece symbol
+        that would be captured. The rolls come from SHOT_TABLE, skipping any
+        combination that stops on a point held by the blot's player.
 
         Paramters:
         board: The position being checked. (BackgammonBoard)
@@ -298,27 +384,58 @@ class BackgammonBot(player.Bot):
         """
         direct_hits = {'X': 0, 'O': 0}
         indirect_hits = {'X': 0, 'O': 0}
+        cells = board.cells
         for piece in 'XO':
             # Get info about your opponent's moves.
             foe_direction = {'X': -1, 'O': 1}[piece]
             foe_piece = {'X': 'O', 'O': 'X'}[piece]
+            foe_bar = {'X': 0, 'O': 25}[piece]
             # Go through all of your blots.
+            direct, indirect = 0, 0
             for blot in blots[piece]:
                 # Go through all possible capture starts.
-                for offset in range(1, 13):
-                    # Make sure start is on the board.
-                    try:
-                        offcell = board.offset(blot, offset * foe_direction)
-                    except KeyError:
+                for distance in range(1, 25):
+                    start = blot + distance * foe_direction
+                    if start == foe_bar:
+                        if foe_piece not in cells[BAR].contents:
+                            break
+                    elif foe_piece not in cells[start].contents:
+                        continue
+                    # Add the rolls from the start that hit the blot.
+                    for rolls, steps in SHOT_TABLE[distance]:
+                        if not steps:
+                            direct |= rolls
+                        elif indirect & rolls != rolls:
+                            for step in steps:
+                                if cells[start - step * foe_direction].contents.count(piece) > 1:
+                                    break
+                            else:
+                                indirect |= rolls
+                    if start == foe_bar:
                         break
-                    # Classify possibles as direct or indirect.
-                    if foe_piece in offcell:
-                        if offset < 7:
-                            direct_hits[piece] += 1
-                        if offset > 1:
-                            indirect_hits[piece] += 1
+            # Count the rolls.
+            direct_hits[piece] = bin(direct).count('1')
+            indirect_hits[piece] = bin(direct | indirect).count('1')
         return direct_hits, indirect_hits
 
+    def cube_answer(self, prompt):
+        """
+        Answer a doubling question with a rollout. (str)
+
+        Both questions roll out the position for the player who may double, since
+        they are about to roll.
+
+        Parameters:
+        prompt: The doubling question being asked of the player. (str)
+        """
+        foe_piece = 'O' if self.piece == 'X' else 'X'
+        if prompt.startswith('\nYour opponent wants to double'):
+            results = rollout(self.game.board, foe_piece, self.cube_trials)
+            return '1' if should_take(results) else '0'
+        else:
+            results = rollout(self.game.board, self.piece, self.cube_trials)
+            return '1' if should_double(results) else '0'
+
     def describe_board(self, board):
         """
         Determine the features of the current board layout. (list of int)
@@ -330,8 +447,8 @@ class BackgammonBot(player.Bot):
             * The difference in the number of captured pieces.
             * The difference in the number of pieces born off the board.
             * The difference in the number of blots.
-            * The difference in direct hits to blots.
-            * The difference in indirect hits to blots.
+            * The difference in rolls hitting blots with one die, out of 36.
+            * The difference in all rolls hitting blots, out of 36.
             * The difference in pip count.
             * The difference in the farthest piece from being born off.
             * The difference in the number of controlled points.
@@ -340,21 +457,14 @@ class BackgammonBot(player.Bot):
         Parameters:
         board: A board with the position to evaluate. (BackgammonBoard)
         """
-        # Find controlled and blot points.
-        controlled = {'X': [], 'O': []}
-        blots = {'X': [], 'O': []}
-        for cell in board.cells.values():
-            if cell.location < 0:
-                continue
-            if len(cell.contents) > 1:
-                controlled[cell.contents[0]].append(cell.location)
-            elif len(cell.contents) == 1:
-                blots[cell.contents[0]].append(cell.location)
+        # Get the controlled and blot points tracked by the board.
+        controlled = {piece: sorted(board.made[piece]) for piece in 'XO'}
+        blots = {piece: sorted(board.blots[piece]) for piece in 'XO'}
         # Get all the points for each player.
         points = {piece: controlled[piece] + blots[piece] for piece in 'XO'}
         points['O'] = [25 - point for point in points['O']]
         # Count the off board pieces.
-        captured = {piece: board.cells[BAR].contents.count(piece) for piece in 'XO'}
+        captured = board.bar
         off = {piece: board.cells[OUT].contents.count(piece) for piece in 'XO'}
         # Get the pip counts and furthest piece from home.
         pip_count = {piece: board.get_pip_count(piece) for piece in 'XO'}
@@ -369,7 +479,7 @@ class BackgammonBot(player.Bot):
         # Calculate hits.
         direct_hits, indirect_hits = self.calculate_hits(board, blots)
         # Get list of score factors.
-        my_piece = self.game.pieces[self.name]
+        my_piece = self.piece
         foe_piece = {'X': 'O', 'O': 'X'}[my_piece]
         score = [captured[foe_piece] - captured[my_piece]]
         score.append(off[my_piece] - off[foe_piece])
@@ -427,14 +537,61 @@ class BackgammonBot(player.Bot):
         else:
             return board_features
 
+    def eval_boards(self, board_features, phases):
+        """
+        Evaluate several board positions. (list)
+
+        This is the hook for bots that can evaluate a turn's plays all at once. By
+        default each board is evaluated with eval_board.
+
+        Parameters:
+        board_features: The summaries of the board positions. (list of list of int)
+        phases: The phase of play for each board position. (list of str)
+        """
+        return [self.eval_board(features, phase) for features, phase in zip(board_features, phases)]
+
+    def get_bearoff_play(self, board):
+        """
+        Get the best bearoff play from the database. (BackgammonPlay)
+
+        The best play leaves the fewest expected rolls to bear off. If there is no
+        database, or the bot's position is not in it, None is returned.
+
+        Parameters:
+        board: The current board position. (BackgammonBoard)
+        """
+        position = board.get_bearoff_position(self.piece)
+        if BEAROFF is None or position is None or position not in BEAROFF:
+            return None
+        best_play, best_rolls = None, None
+        for play in board.get_plays(self.piece, self.game.rolls):
+            # Get the position after the play.
+            result = list(position)
+            for start, end in play:
+                result[(start if self.piece == 'X' else 25 - start) - 1] -= 1
+                if end != OUT:
+                    result[(end if self.piece == 'X' else 25 - end) - 1] += 1
+            # Keep the play leaving the fewest expected rolls.
+            rolls = BEAROFF.expected_rolls(tuple(result))
+            if best_rolls is None or rolls < best_rolls:
+                best_play, best_rolls = play, rolls
+        return best_play
+
     def get_endgame(self, board, my_points):
         """
         Get the moves at the end of the game. (BackgammonPlay)
 
+        Once all of the bot's pieces are home, the bearoff database is used if
+        there is one.
+
         Parameters:
         board: The current board position. (BackgammonBoard)
         my_points: The points the bot's pieces are on. (list of int)
         """
+        # Play perfectly from the bearoff database if possible.
+        play = self.get_bearoff_play(board)
+        if play is not None:
+            return play
         # Copy the game state.
         board = board.copy()
         rolls = self.game.rolls[:]
@@ -515,6 +672,45 @@ class BackgammonBot(player.Bot):
         rolls.remove(max_roll)
         return move + [max_roll]
 
+    def get_win_count(self):
+        """
+        Get the number of pieces to bear off for a win. (int)
+
+        This comes from the game's layout, or is the standard 15 if the bot is not
+        in a game.
+        """
+        game = getattr(self, 'game', None)
+        if game is None:
+            return 15
+        return game.win_count
+
+    def score_boards(self, boards):
+        """
+        Score the boards after possible plays by the bot. (list)
+
+        Each board is described and given a phase of play, and then they are all
+        evaluated together with eval_boards.
+
+        Parameters:
+        boards: The boards to score. (list of BackgammonBoard)
+        """
+        board_features, phases = [], []
+        for board in boards:
+            # Get the board features.
+            features, points = self.describe_board(board)
+            max_x = max(points['X']) if points['X'] else 0
+            max_o = max(points['O']) if points['O'] else 0
+            # Get the game phase.
+            if max_x + max_o > 24 or board.cells[BAR].contents:
+                phase = 'mixed'
+            elif max_x <= 6 and max_o < 6:
+                phase = 'stretch'
+            else:
+                phase = 'split'
+            board_features.append(features)
+            phases.append(phase)
+        return self.eval_boards(board_features, phases)
+
     def set_up(self):
         """Set up the bot. (None)"""
         self.held_moves = BackgammonPlay()
@@ -544,6 +740,7 @@ class AdditiveBot(BackgammonBot):
     Overridden Methods:
     __init__
     eval_board
+    eval_boards
     """
 
     def __init__(self, taken_names = []):
@@ -569,7 +766,18 @@ class AdditiveBot(BackgammonBot):
         board_features: The summary of the board position. (list of int)
         phase: The current phase of play, or what is being asked of the bot. (str)
         """
-        return sum([f * r for f, r in zip(self.vectors[phase], board_features)])
+        weights = zip(self.vectors[phase], FEATURE_SCALES)
+        return sum([f * s * r for (f, s), r in zip(weights, board_features)])
+
+    def eval_boards(self, board_features, phases):
+        """
+        Evaluate several board positions. (list of float)
+
+        Parameters:
+        board_features: The summaries of the board positions. (list of list of int)
+        phases: The phase of play for each board position. (list of str)
+        """
+        return phase_sums(board_features, phases, self.vectors)
 
 
 class BackGeneBot(BackgammonBot):
@@ -582,7 +790,8 @@ class BackGeneBot(BackgammonBot):
     Overridden Methods:
     __init__
     eval_board
-    tell
+    eval_boards
+    tell_move
     """
 
     phases = ['mixed', 'split', 'stretch', 'double', 'accept']
@@ -621,7 +830,18 @@ class BackGeneBot(BackgammonBot):
         board_features: The summary of the board position. (list of int)
         phase: The current phase of play, or what is being asked of the bot. (str)
         """
-        return sum([f * r for f, r in zip(self.vectors[phase], board_features)])
+        weights = zip(self.vectors[phase], FEATURE_SCALES)
+        return sum([f * s * r for (f, s), r in zip(weights, board_features)])
+
+    def eval_boards(self, board_features, phases):
+        """
+        Evaluate several board positions. (list of float)
+
+        Parameters:
+        board_features: The summaries of the board positions. (list of list of int)
+        phases: The phase of play for each board position. (list of str)
+        """
+        return phase_sums(board_features, phases, self.vectors)
 
     def tell_move(self):
         """Tell the human player what the bot's move is."""
@@ -638,7 +858,10 @@ class PubEvalBot(BackgammonBot):
     is still possible.
 
     Methods:
+    choose_play: Choose the play to make from the legal plays. (BackgammonPlay)
+    eval_positions: Evaluate several pubeval position vectors. (list of float)
     get_position: Generate a pubeval position vector for a board. (list of int)
+    get_pub_position: Generate a pubeval position vector for a position. (list of int)
     pub_eval: Backgammon board evaluation function. (float)
     set_vector: Creates an input vector based on the position. (list of int)
 
@@ -646,6 +869,8 @@ class PubEvalBot(BackgammonBot):
     ask
     ask_int_list
     eval_board
+    eval_boards
+    score_boards
     """
 
     def ask(self, prompt):
@@ -660,6 +885,9 @@ class PubEvalBot(BackgammonBot):
             roll_text = '-'.join(str(x) for x in self.game.rolls[:2])
             self.game.human.tell('\n{} rolled {} and has no legal moves.'.format(self.name, roll_text))
             return ''
+        # Use rollouts for doubling questions if requested.
+        elif self.cube_trials and 'double' in prompt:
+            return self.cube_answer(prompt)
         # Respond to being able to double.
         elif prompt.startswith('\nWould you like to double the stakes'):
             if self.eval_board(self.game.board.copy()) > 25:
@@ -696,17 +924,8 @@ class PubEvalBot(BackgammonBot):
         # Respond to move requests.
         if prompt.strip() == 'What is your move?':
             if not self.held_moves:
-                # Evaluate all the legal plays.
-                possibles = []
                 board = self.game.board
-                for play in board.get_plays(self.piece, self.game.rolls):
-                    sub_board = board.copy()
-                    for move in play:
-                        capture = sub_board.move(*move, piece = self.piece)
-                    possibles.append((self.eval_board(board), play))
-                # Choose the play with the highest evaluation.
-                possibles.sort(reverse = True)
-                self.held_moves = possibles[0][1]
+                self.held_moves = self.choose_play(board, board.get_plays(self.piece, self.game.rolls))
                 self.tell_move()
             # Return the move with the correct syntax.
             move = self.held_moves.next_move()
@@ -729,6 +948,27 @@ class PubEvalBot(BackgammonBot):
         else:
             raise ValueError('Unexpected question to BackgammonBot: {}'.format(prompt))
 
+    def choose_play(self, board, plays):
+        """
+        Choose the play to make from the legal plays. (BackgammonPlay)
+
+        Parameters:
+        board: The board to make the play on. (BackgammonBoard)
+        plays: The legal plays for the bot's roll. (list of BackgammonPlay)
+        """
+        # Make all the legal plays.
+        sub_boards = []
+        for play in plays:
+            sub_board = board.copy()
+            for move in play:
+                capture = sub_board.move(*move, piece = self.piece)
+            sub_boards.append(sub_board)
+        # Evaluate the plays together.
+        possibles = list(zip(self.eval_boards(sub_boards), plays))
+        # Choose the play with the highest evaluation.
+        possibles.sort(reverse = True)
+        return possibles[0][1]
+
     def eval_board(self, board):
         """
         Evaluate a board position. (float)
@@ -736,19 +976,53 @@ class PubEvalBot(BackgammonBot):
         Parameters:
         board: The board to evaluate. (BackgammonBoard)
         """
-        # Get the board vector.
-        position = self.get_position(board)
-        left, right, = [], []
-        for index, men in enumerate(position[1:25]):
-            if men < 0:
-                left.append(abs(men))
-            elif men > 0:
-                right.append(men)
-        try:
-            race = max(left) > min(right)
-        except ValueError:
-            race = True
-        return self.pub_eval(race, position)
+        return self.eval_boards([board])[0]
+
+    def eval_boards(self, boards):
+        """
+        Evaluate several board positions. (list of float)
+
+        Parameters:
+        boards: The boards to evaluate. (list of BackgammonBoard)
+        """
+        return self.eval_positions([self.get_position(board) for board in boards])
+
+    def eval_positions(self, positions):
+        """
+        Evaluate several pubeval position vectors. (list of float)
+
+        The input vectors for the race positions and for the contact positions are
+        each scored together with weighted_sums.
+
+        Parameters:
+        positions: The position vectors to evaluate, from get_position. (list of list)
+        """
+        scores = [0] * len(positions)
+        vectors = {True: [], False: []}
+        indexes = {True: [], False: []}
+        win_count = self.get_win_count()
+        for index, position in enumerate(positions):
+            if position[26] == win_count:
+                # Check for a win.
+                scores[index] = utility.MAX_INT
+                continue
+            left, right, = [], []
+            for men in position[1:25]:
+                if men < 0:
+                    left.append(abs(men))
+                elif men > 0:
+                    right.append(men)
+            try:
+                race = max(left) > min(right)
+            except ValueError:
+                race = True
+            vectors[race].append(self.set_vector(position))
+            indexes[race].append(index)
+        # Apply the weights.
+        for race, weights in ((True, RACE_WEIGHTS), (False, CONTACT_WEIGHTS)):
+            for index, score in zip(indexes[race], weighted_sums(vectors[race], weights)):
+                scores[index] = score
+        return scores
 
     def get_position(self, board):
         """
@@ -771,7 +1045,7 @@ class PubEvalBot(BackgammonBot):
         position = [board.cells[BAR].count(foe_piece) * -1]
         points = []
         # Loop through the locations.
-        for location in range(1, 24):
+        for location in range(1, 25):
             pieces = board.cells[location]
             value = len(pieces)
             # Your pieces are positive, theirs are negative.
@@ -788,6 +1062,23 @@ class PubEvalBot(BackgammonBot):
         position.append(board.cells[OUT].count(foe_piece) * -1)
         return position
 
+    def get_pub_position(self, position):
+        """
+        Generate a pubeval position vector for a position. (list of int)
+
+        This matches get_position for the same pieces on a BackgammonBoard.
+
+        Parameters:
+        position: The position to vectorize. (BackgammonPosition)
+        """
+        points = position.points
+        if self.piece == 'X':
+            pub_position = [points[0]] + points[1:25] + [points[25], position.off[1], -position.off[-1]]
+        else:
+            pub_position = [-points[25]] + [-men for men in points[24:0:-1]]
+            pub_position.extend([-points[0], position.off[-1], -position.off[1]])
+        return pub_position
+
     def pub_eval(self, race, position):
         """
         Backgammon board evaluation function. (float)
@@ -797,7 +1088,7 @@ class PubEvalBot(BackgammonBot):
         position: A board position. (list of int)
         """
         # Check for a win.
-        if position[26] == 15:
+        if position[26] == self.get_win_count():
             return utility.MAX_INT
         # Get the vector.
         vector = self.set_vector(position)
@@ -810,6 +1101,15 @@ class PubEvalBot(BackgammonBot):
         score = [v * w for v, w in zip(vector, weights)]
         return sum(score)
 
+    def score_boards(self, boards):
+        """
+        Score the boards after possible plays by the bot. (list of float)
+
+        Parameters:
+        boards: The boards to score. (list of BackgammonBoard)
+        """
+        return self.eval_boards(boards)
+
     def set_vector(self, position):
         """
         Creates an input vector based on the position. (list of int)
@@ -839,6 +1139,227 @@ class PubEvalBot(BackgammonBot):
         return vector
 
 
+class ExpectimaxBot(PubEvalBot):
+    """
+    A bot that looks ahead at the opponent's rolls. (PubEvalBot)
+
+    Each candidate play is scored by averaging, over the 21 rolls the opponent
+    could make, the leaf evaluator's score after the opponent's best reply. The
+    candidates are first ranked by their leaf scores, and the best ones are
+    searched in that order until the time limit runs out. The plays are made and
+    taken back on a BackgammonPosition, so the bot also works as a stress test
+    of play generation and evaluation.
+
+    The leaf evaluator may be any Backgammon bot, or a function taking a list of
+    positions and the bot's piece and returning a list of scores, higher being
+    better for the bot. By default the leaves are scored with pubeval. Positions
+    where either player has born off all of their pieces are scored as a win or
+    a loss without the evaluator.
+
+    Attributes:
+    cube_trials: The number of rollout trials for doubling decisions. (int)
+    evaluator: The leaf evaluator, or None for pubeval. (BackgammonBot or callable)
+    max_candidates: The most candidate plays to search. (int)
+    stats: Counts of the moves, plays, and positions searched, and the time. (dict)
+    time_limit: The number of seconds to search for each move. (float)
+
+    Methods:
+    expected_score: Average the score of a position over the opponent's rolls. (float)
+    score_positions: Score positions with the leaf evaluator. (list of float)
+
+    Overridden Methods:
+    __init__
+    choose_play
+    """
+
+    def __init__(self, time_limit = 2.0, max_candidates = 8, cube_trials = 0, evaluator = None,
+        taken_names = []):
+        """
+        Set up the bot. (None)
+
+        Parameters:
+        time_limit: The number of seconds to search for each move. (float)
+        max_candidates: The most candidate plays to search. (int)
+        cube_trials: The number of rollout trials for doubling decisions. (int)
+        evaluator: The leaf evaluator, or None for pubeval. (BackgammonBot or callable)
+        taken_names: The names already in use by other players. (list of str)
+        """
+        super(ExpectimaxBot, self).__init__(taken_names = taken_names)
+        self.time_limit = time_limit
+        self.max_candidates = int(max_candidates)
+        self.cube_trials = int(cube_trials)
+        self.evaluator = evaluator
+        self.stats = {'moves': 0, 'plays': 0, 'positions': 0, 'seconds': 0.0}
+
+    def choose_play(self, board, plays):
+        """
+        Choose the play to make from the legal plays. (BackgammonPlay)
+
+        Parameters:
+        board: The board to make the play on. (BackgammonBoard)
+        plays: The legal plays for the bot's roll. (list of BackgammonPlay)
+        """
+        start_time = time.time()
+        sign = 1 if self.piece == 'X' else -1
+        position = BackgammonPosition(board)
+        # Rank the candidates by their leaf scores.
+        candidates = []
+        for play in plays:
+            hits = position.make_play(play, sign)
+            candidates.append(position.copy())
+            position.unmake_play(play, sign, hits)
+        scores = self.score_positions(candidates)
+        ranked = sorted(zip(scores, plays), key = lambda pair: pair[0], reverse = True)
+        ranked = ranked[:self.max_candidates]
+        # Search the best candidates until time runs out.
+        best_score, best_play = None, ranked[0][1]
+        for one_ply, play in ranked:
+            hits = position.make_play(play, sign)
+            score = self.expected_score(position, sign, start_time + self.time_limit)
+            position.unmake_play(play, sign, hits)
+            if score is None:
+                break
+            self.stats['plays'] += 1
+            if best_score is None or score > best_score:
+                best_score, best_play = score, play
+        self.stats['moves'] += 1
+        self.stats['seconds'] += time.time() - start_time
+        return best_play
+
+    def expected_score(self, position, sign, deadline):
+        """
+        Average the score of a position over the opponent's rolls. (float)
+
+        The opponent is assumed to make the reply with the lowest score for the bot.
+        If the deadline passes before all the rolls are searched, None is returned.
+
+        Parameters:
+        position: The position after the bot's play. (BackgammonPosition)
+        sign: The sign of the bot's pieces. (int)
+        deadline: The time to stop searching by. (float)
+        """
+        foe_piece = 'O' if sign == 1 else 'X'
+        total = 0.0
+        for rolls, chances in ROLLS:
+            if time.time() > deadline:
+                return None
+            # Get the positions after each reply.
+            replies = []
+            for play in PLAY_CACHE.get_plays(position, foe_piece, rolls):
+                hits = position.make_play(play, -sign)
+                replies.append(position.copy())
+                position.unmake_play(play, -sign, hits)
+            if not replies:
+                replies.append(position.copy())
+            self.stats['positions'] += len(replies)
+            total += min(self.score_positions(replies)) * chances
+        return total / 36
+
+    def score_positions(self, positions):
+        """
+        Score positions with the leaf evaluator. (list of float)
+
+        Parameters:
+        positions: The positions to score. (list of BackgammonPosition)
+        """
+        sign = 1 if self.piece == 'X' else -1
+        scores = [0] * len(positions)
+        # Score finished games as wins or losses.
+        win_count = self.get_win_count()
+        leaves = []
+        for index, position in enumerate(positions):
+            if position.off[sign] == win_count:
+                scores[index] = utility.MAX_INT
+            elif position.off[-sign] == win_count:
+                scores[index] = -utility.MAX_INT
+            else:
+                leaves.append(index)
+        if not leaves:
+            return scores
+        # Score the rest with the evaluator.
+        evaluator = self if self.evaluator is None else self.evaluator
+        leaf_positions = [positions[index] for index in leaves]
+        if isinstance(evaluator, PubEvalBot):
+            evaluator.piece = self.piece
+            pub_positions = [evaluator.get_pub_position(position) for position in leaf_positions]
+            values = evaluator.eval_positions(pub_positions)
+        elif isinstance(evaluator, BackgammonBot):
+            evaluator.piece = self.piece
+            values = evaluator.score_boards([position.get_board() for position in leaf_positions])
+        else:
+            values = evaluator(leaf_positions, self.piece)
+        for index, value in zip(leaves, values):
+            scores[index] = value
+        return scores
+
+
+class TDBot(PubEvalBot):
+    """
+    A bot using a neural network trained by self-play. (PubEvalBot)
+
+    The network scores the pubeval vectors of the positions after each legal play
+    with the chance of winning, and the bot takes the play with the best chance.
+    Until a network has been trained (see backgammon_td.py), or if NumPy is not
+    installed, the bot plays like PubEvalBot.
+
+    Attributes:
+    network: The network evaluating positions. (TDNetwork or None)
+
+    Overridden Methods:
+    __init__
+    ask
+    eval_positions
+    """
+
+    def __init__(self, network = None, taken_names = []):
+        """
+        Set up the bot. (None)
+
+        Parameters:
+        network: The network evaluating positions, defaults to TD_NETWORK. (TDNetwork)
+        taken_names: The names already in use by other players. (list of str)
+        """
+        super(TDBot, self).__init__(taken_names = taken_names)
+        self.network = TD_NETWORK if network is None else network
+
+    def ask(self, prompt):
+        """
+        Get information from the player. (str)
+
+        Doubling decisions use the network's chance of winning as a cubeless equity.
+
+        Parameters:
+        prompt: The question being asked of the player. (str)
+        """
+        if self.network is None or self.cube_trials:
+            return super(TDBot, self).ask(prompt)
+        elif prompt.startswith('\nWould you like to double the stakes'):
+            return '1' if 2 * self.eval_board(self.game.board) - 1 >= DOUBLE_EQUITY else '0'
+        elif prompt.startswith('\nYour opponent wants to double'):
+            return '1' if 2 * self.eval_board(self.game.board) - 1 >= TAKE_EQUITY else '0'
+        else:
+            return super(TDBot, self).ask(prompt)
+
+    def eval_positions(self, positions):
+        """
+        Evaluate several pubeval position vectors. (list of float)
+
+        All of the positions are scored in one pass through the network.
+
+        Parameters:
+        positions: The position vectors to evaluate, from get_position. (list of list)
+        """
+        if self.network is None:
+            return super(TDBot, self).eval_positions(positions)
+        scores = [float(score) for score in self.network.evaluate([self.set_vector(position)
+            for position in positions])]
+        win_count = self.get_win_count()
+        for index, position in enumerate(positions):
+            if position[26] == win_count:
+                scores[index] = 1.0
+        return scores
+
+
 class Backgammon(game.Game):
     """
     A game of Backgammon. (game.Game)
@@ -846,6 +1367,7 @@ class Backgammon(game.Game):
     See BackgammonBoard for the details of the layout attribute.
 
     Class Attributes:
+    bot_classes: The bot classes available for the game. (dict of str: class)
     layouts: Different possible starting layouts. (dict of str: tuple)
 
     Attributes:
@@ -866,6 +1388,7 @@ class Backgammon(game.Game):
     do_bear: Bear a piece of the board. (bool)
     do_enter: Bring a piece back into play from the bar. (bool)
     do_pips: Show the pip counts. (bool)
+    do_rollout: Roll out the current position. (bool)
     double: Check if the user can/wants to double. (bool)
     get_rolls: Determine the rolls you can move with from the dice roll. (None)
     get_start: Get the start of a move only specified by the end. (int)
@@ -883,7 +1406,8 @@ class Backgammon(game.Game):
     """
 
     aka = ['Back']
-    aliases = {'b': 'bear', 'd': 'double', 'e': 'enter', 'p': 'pips', 's': 'start'}
+    aliases = {'b': 'bear', 'd': 'double', 'e': 'enter', 'p': 'pips', 'ro': 'rollout', 's': 'start'}
+    bot_classes = {'expectimax': ExpectimaxBot, 'td': TDBot}
     categories = ['Board Games']
     credits = CREDITS
     layouts = {'hyper': ((24, 1), (23, 1), (22, 1)), 'hy': ((24, 1), (23, 1), (22, 1)), 'long': ((24, 15),),
@@ -891,7 +1415,7 @@ class Backgammon(game.Game):
         'nk': ((6, 4), (8, 3), (13, 4), (23, 2), (24, 2)), 'standard': ((6, 5), (8, 3), (13, 5), (24, 2)),
         'st': ((6, 5), (8, 3), (13, 5), (24, 2))}
     name = 'Backgammon'
-    num_options = 3
+    num_options = 5
     rules = RULES
 
     def auto_bear(self, player, piece):
@@ -1131,12 +1655,55 @@ class Backgammon(game.Game):
     def do_pips(self, argument):
         """
         Show the pip counts for the two players.
+
+        If both players are bearing off, your cubeless chances in the race are also
+        shown, as if you were about to roll.
         """
         # Get the current player.
         player = self.players[self.player_index]
         # Show the pip counts.
         player.tell('\nX:', self.board.get_pip_count('X'))
         player.tell('O:', self.board.get_pip_count('O'))
+        # Show the race equity if both players are bearing off.
+        if BEAROFF is not None:
+            piece = self.pieces[player.name]
+            foe_piece = 'O' if piece == 'X' else 'X'
+            positions = [self.board.get_bearoff_position(piece), self.board.get_bearoff_position(foe_piece)]
+            if None not in positions:
+                win = BEAROFF.win_chance(*positions)
+                if win is not None:
+                    player.tell('Race equity: {:.3f} ({:.1%} to win)'.format(2 * win - 1, win))
+        # Keep playing
+        return True
+
+    def do_rollout(self, argument):
+        """
+        Roll out the position, giving your cubeless chances as if about to roll.
+        (ro)
+
+        You may give the number of trials to play out.
+        """
+        # Get the current player.
+        player = self.players[self.player_index]
+        # Get the number of trials.
+        if argument.strip():
+            try:
+                trials = int(argument)
+            except ValueError:
+                trials = 0
+            if trials < 1:
+                player.error('\nInvalid number of trials: {!r}.'.format(argument))
+                return True
+        else:
+            trials = ROLLOUT_TRIALS
+        # Show the results.
+        results = rollout(self.board, self.pieces[player.name], trials)
+        player.tell('\nRollout of {} trials:'.format(results['trials']))
+        text = '{}: {:.1%} (gammon {:.1%}, backgammon {:.1%})'
+        player.tell(text.format('Win', results['win'], results['gammon'], results['backgammon']))
+        player.tell(text.format('Loss', 1 - results['win'], results['lose-gammon'],
+            results['lose-backgammon']))
+        player.tell('Cubeless equity: {:.3f} +/- {:.3f}'.format(results['equity'], results['error']))
         # Keep playing
         return True
 
@@ -1363,6 +1930,10 @@ class Backgammon(game.Game):
             question = 'What should be the winning match score (return for 1)? ')
         self.option_set.add_option('layout', ['l'], options.lower, action = 'map', value = self.layouts,
             default = 'standard', question = 'What layout would you like to use (return for standard)? ')
+        self.option_set.add_option('expectimax', ['ex'], action = 'bot', converter = float, default = None,
+            check = lambda params: (min(params) > 0 and len(params) <= 3 if isinstance(params, list)
+                else params > 0))
+        self.option_set.add_option('td', action = 'bot', value = (), default = None)
 
     def set_up(self):
         """Set up the game. (None)"""
@@ -1443,20 +2014,31 @@ class BackgammonBoard(board.LineBoard):
     """
     A board for Backgammon. (board.LineBoard)
 
+    The pip counts and the points each player holds are tracked as pieces move,
+    so that they don't need to be recounted for every position evaluated. If the
+    pieces are changed without using the move method, count_pieces must be called
+    to update the tracking.
+
+    Attributes:
+    bar: The number of pieces on the bar for each player. (dict of str: int)
+    blots: The points with one piece for each player. (dict of str: set of int)
+    made: The points with two or more pieces for each player. (dict of str: set)
+    pips: The pip count for each player. (dict of str: int)
+
     Methods:
     board_text: Generate a text lines for the pieces on the board. (list of str)
-    get_plays: Get the legal plays for a given set of rolls. (list)
-    get_moves_enter: Get the legal moves when a piece is on the bar. (list)
-    get_moves_help: Recurse get_plays using another board. (list of tuple)
-    get_moves_home: Get the legal moves when all pieces are home. (list)
-    get_moves_normal: Generate legal moves during normal play. (list of BackgammonPlay)
+    count_pieces: Recount the tracking of the pieces from scratch. (None)
+    get_bearoff_position: Get a player's pieces as a bearoff position. (tuple or None)
     get_pip_count: Get the pip count for a given player. (int)
     get_plays: Get all the legal plays for a given set of rolls. (list of BackgammonPlay)
     get_text: Get the board text from a particular player's perspective. (str)
+    pip_value: Get the pips for a piece at a location. (int)
     set_up: Put the starting pieces on the board. (None)
+    update_points: Update the tracking of blots and made points. (None)
 
     Overridden Methods:
     __init__
+    copy
     move
     safe
     """
@@ -1475,8 +2057,6 @@ class BackgammonBoard(board.LineBoard):
         # Set up the board.
         super(BackgammonBoard, self).__init__(24, extra_cells = [BAR, OUT])
         self.set_up(layout)
-        # Set up attributes
-        self.legal_plays = []
 
     def board_text(self, locations, reverse = False):
         """
@@ -1523,158 +2103,49 @@ class BackgammonBoard(board.LineBoard):
             lines.reverse()
         return lines
 
-    def get_moves(self, piece, rolls, moves):
-        """
-        Get the legal moves for a given set of rolls. (list)
-
-        This method is one level of recursion for get_plays, although the actual
-        recursion is done in get_moves_help after calls to one of the ohter
-        get_moves methods.
+    def copy(self, **kwargs):
+        """Create a copy of the board. (BackgammonBoard)"""
+        clone = super(BackgammonBoard, self).copy(layout = (), **kwargs)
+        clone.bar = self.bar.copy()
+        clone.blots = {piece: self.blots[piece].copy() for piece in 'XO'}
+        clone.made = {piece: self.made[piece].copy() for piece in 'XO'}
+        clone.pips = self.pips.copy()
+        return clone
+
+    def count_pieces(self):
+        """Recount the tracking of the pieces from scratch. (None)"""
+        self.bar = {'X': 0, 'O': 0}
+        self.blots = {'X': set(), 'O': set()}
+        self.made = {'X': set(), 'O': set()}
+        self.pips = {'X': 0, 'O': 0}
+        for location, cell in self.cells.items():
+            for piece in cell.contents:
+                self.pips[piece] += self.pip_value(location, piece)
+                if location == BAR:
+                    self.bar[piece] += 1
+        self.update_points([location for location in range(1, 25) if self.cells[location].contents])
+
+    def get_bearoff_position(self, piece):
+        """
+        Get a player's pieces as a bearoff position. (tuple of int or None)
+
+        The bearoff position is the number of pieces on each home point, starting
+        with the one point. If any of the player's pieces are still outside of
+        their home, None is returned.
 
         Parameters:
-        piece: The piece symbol to get moves for. (str)
-        rolls: The rolls to get moves for. (str)
-        moves: The moves already made. (list of tuple)
+        piece: The piece of the player to get the position for. (str)
         """
-        # Loop through the rolls.
-        full_plays = []
-        from_cells = [point for point in self.cells if piece in self.cells[point]]
-        home = {'X': tuple(range(1, 7)), 'O': tuple(range(24, 18, -1))}[piece]
-        for roll in set(rolls):
-            # Get the rolls without the current roll.
-            sub_rolls = rolls[:]
-            sub_rolls.remove(roll)
-            # Generate moves based on the phase of the game.
-            if piece in self.cells[BAR]:
-                full_plays = self.get_moves_enter(piece, moves, full_plays, sub_rolls, roll)
-            elif all([coord in home or coord == OUT for coord in from_cells]):
-                full_plays = self.get_moves_home(piece, moves, full_plays, sub_rolls, roll, from_cells)
-            else:
-                full_plays = self.get_moves_normal(piece, moves, full_plays, sub_rolls, roll, from_cells)
-        return full_plays
-
-    def get_moves_enter(self, piece, moves, full_plays, sub_rolls, roll):
-        """
-        Get the legal moves when a piece is on the bar. (list of BackgammonPlay)
-
-        Parameters:
-        piece: The piece symbol to get moves for. (str)
-        moves: The moves already made. (BackgammonPlay)
-        full_plays: The plays already recorded. (list of BackgammonPlay)
-        sub_rolls: The rolls to get moves for. (list of int)
-        roll: The current roll being moved. (int)
-        """
-        # Get the bar piece at the end for popping.
-        if piece != self.cells[BAR].contents[-1]:
-            self.cells[BAR].remove_piece(piece)
-            self.cells[BAR].add_piece(piece)
-        # Get the end point
-        if piece == 'X':
-            end_coord = 25 - roll
-        else:
-            end_coord = roll
-        end_cell = self.cells[end_coord]
-        # Get the moves.
-        if piece in end_cell or len(end_cell) < 2:
-            full_plays = self.get_moves_help(piece, BAR, end_coord, moves, full_plays, sub_rolls, roll)
-        return full_plays
-
-    def get_moves_help(self, piece, point, end_point, moves, full_plays, sub_rolls, roll):
-        """
-        Recurse the get_move method by creating another board. (list of tuple)
-
-        Parameters:
-        piece: The piece symbol to get moves for. (str)
-        point: The starting point of the move. (tuple of int)
-        end_point: The ending point of the move. (tuple of int)
-        moves: The moves already made. (list of tuple)
-        full_plays: The moves already recorded. (list of tuple)
-        sub_rolls: The rolls to get moves for. (str)
-        roll: The roll being used for this move. (int)
-        """
-        # Create a board with the move.
-        sub_board = self.copy(layout = ())
-        capture = sub_board.move(point, end_point)
-        # Add to the move to the moves so far.
-        new_moves = moves + (point, end_point, roll)
-        if sub_rolls:
-            # Recurse if necessary
-            sub_plays = sub_board.get_moves(piece, sub_rolls, new_moves)
-            if sub_plays:
-                full_plays.extend(sub_plays)
-            else:
-                # Capture partial moves.
-                full_plays.append(new_moves)
-        else:
-            # Termination of recursion
-            full_plays.append(new_moves)
-        # Return the moves back up the recursion.
-        return full_plays
-
-    def get_moves_home(self, piece, moves, full_plays, sub_rolls, roll, from_cells):
-        """
-        Get the legal moves when all pieces are home. (list of BackgammonPlay)
-
-        Parameters:
-        piece: The piece symbol to get moves for. (str)
-        moves: The moves already made. (BackgammonPlay)
-        full_plays: The plays already recorded. (list of BackgammonPlay)
-        sub_rolls: The rolls to get moves for. (list of int)
-        roll: The current roll being moved. (int)
-        from_cells: The points that pieces can move from. (list of int or str)
-        """
-        # Get the game state information.
-        home = {'X': tuple(range(1, 7)), 'O': tuple(range(24, 18, -1))}[piece]
-        direction = {'X': -1, 'O': 1}[piece]
-        coord = home[roll - 1]
-        # Check for pieces left to move.
-        piece_indexes = [index for index, point in enumerate(home) if piece in self.cells[point]]
-        if piece_indexes:
-            max_index = piece_indexes[-1]
-        else:
-            return full_plays
-        if piece in self.cells[coord]:
-            # Generate standard bearing off moves.
-            full_plays = self.get_moves_help(piece, coord, OUT, moves, full_plays, sub_rolls, roll)
-        elif roll > max_index + 1:
-            # Generate bearing off moves with over roll.
-            coord = home[max_index]
-            full_plays = self.get_moves_help(piece, coord, OUT, moves, full_plays, sub_rolls, roll)
-        for home_index in range(6):
-            # Generate moves within the home board.
-            start = home[home_index]
-            end = start + roll * direction
-            if 1 <= end <= 24:
-                if piece in self.cells[start] and (piece in self.cells[end] or len(self.cells[end]) < 2):
-                    full_plays = self.get_moves_help(piece, start, end, moves, full_plays, sub_rolls, roll)
-        return full_plays
-
-    def get_moves_normal(self, piece, moves, full_plays, sub_rolls, roll, from_cells):
-        """
-        Generate legal moves during normal play. (list of BackgammonPlay)
-
-        Parameters:
-        piece: The piece symbol to get moves for. (str)
-        moves: The moves already made. (BackgammonPlay)
-        full_plays: The plays already recorded. (list of BackgammonPlay)
-        sub_rolls: The rolls to get moves for. (list of int)
-        roll: The current roll being moved. (int)
-        from_cells: The points that pieces can move from. (list of int or str)
-        """
-        # Loop through possible points.
-        direction = {'X': -1, 'O': 1}[piece]
-        for point in from_cells:
-            # Check the point.
-            end_point = point + roll * direction
-            if not (0 < point <= self.length and 0 < end_point <= self.length):
-                continue
-            # Check the cell.
-            end_cell = self.cells[end_point]
-            if piece not in end_cell and len(end_cell) > 1:
+        position = [0] * 6
+        for cell in self.cells.values():
+            count = cell.contents.count(piece)
+            if not count or cell.location == OUT:
                 continue
-            # Find the moves.
-            full_plays = self.get_moves_help(piece, point, end_point, moves, full_plays, sub_rolls, roll)
-        return full_plays
+            point = cell.location if piece == 'X' else 25 - cell.location
+            if cell.location == BAR or point > 6:
+                return None
+            position[point - 1] = count
+        return tuple(position)
 
     def get_pip_count(self, piece):
         """
@@ -1683,44 +2154,19 @@ class BackgammonBoard(board.LineBoard):
         Parameters:
         piece: The piece of the player to get a pip count for. (str)
         """
-        # Loop through the board locations.
-        points = 0
-        for cell in self.cells.values():
-            # Get the correct pip count.
-            point = cell.location
-            if point == BAR:
-                point = 25
-            elif point == OUT:
-                point = 0
-            elif piece == 'O':
-                point = 25 - point
-            # Get the pip count for each piece.
-            points += point * cell.contents.count(piece)
-        return points
+        return self.pips[piece]
 
     def get_plays(self, piece, rolls):
         """
         Get all the legal plays for a given set of rolls. (list of BackgammonPlay)
 
-        The initial moves are obtained recursively through get_moves, and then cleaned
-        up here.
+        The plays are generated on a BackgammonPosition, and stored in PLAY_CACHE.
 
         Parameters:
         piece: The piece symbol to move. (str)
         rolls: The rolls available to move with. (list of int)
         """
-        if not self.legal_plays:
-            # Get unique plays.
-            plays = self.get_moves(piece, rolls, BackgammonPlay())
-            plays = list(set(plays))
-            # Check for maximum use of the roll.
-            max_roll = max(play.total_roll for play in plays) if plays else 0
-            max_moves = max(len(play) for play in plays) if plays else 0
-            self.legal_plays = []
-            for play in plays:
-                if play.total_roll == max_roll and len(play) == max_moves:
-                    self.legal_plays.append(play)
-        return self.legal_plays
+        return PLAY_CACHE.get_plays(BackgammonPosition(self), piece, rolls)
 
     def get_text(self, piece):
         """
@@ -1768,13 +2214,36 @@ class BackgammonBoard(board.LineBoard):
         end: The location to move the piece to. (Coordinate)
         """
         # Move and handle the capture
+        mover = piece if piece else self.cells[start].contents[-1]
         capture = self.safe_displace(start, end, piece)
         for piece in capture:
             self.cells[BAR].add_piece(piece)
-        # Reset board tracking.
-        self.legal_plays = []
+        # Update the tracking of the pieces.
+        self.pips[mover] += self.pip_value(end, mover) - self.pip_value(start, mover)
+        self.bar[mover] += (end == BAR) - (start == BAR)
+        for piece in capture:
+            self.pips[piece] += 25 - self.pip_value(end, piece)
+            self.bar[piece] += 1
+        self.update_points((start, end))
         return capture
 
+    def pip_value(self, location, piece):
+        """
+        Get the pips for a piece at a location. (int)
+
+        Parameters:
+        location: The location of the piece. (int)
+        piece: The piece symbol. (str)
+        """
+        if location == BAR:
+            return 25
+        elif location == OUT:
+            return 0
+        elif piece == 'O':
+            return 25 - location
+        else:
+            return location
+
     def safe(self, location, piece):
         """
         Determine if a cell is safe from capture. (bool)
@@ -1801,6 +2270,26 @@ class BackgammonBoard(board.LineBoard):
         for location, count in layout:
             self.cells[location].contents = ['X'] * count
             self.cells[25 - location].contents = ['O'] * count
+        self.count_pieces()
+
+    def update_points(self, locations):
+        """
+        Update the tracking of blots and made points. (None)
+
+        Parameters:
+        locations: The locations whose pieces have changed. (iterable of int)
+        """
+        for location in locations:
+            if location < 1:
+                continue
+            for piece in 'XO':
+                self.blots[piece].discard(location)
+                self.made[piece].discard(location)
+            contents = self.cells[location].contents
+            if len(contents) == 1:
+                self.blots[contents[0]].add(location)
+            elif contents:
+                self.made[contents[0]].add(location)
 
 
 class BackgammonPlay(object):
@@ -1970,3 +2459,694 @@ class BackgammonPlay(object):
     def next_move(self):
         """Return a move to make. (tuple)"""
         return self.moves.pop(0)
+
+
+class BackgammonPosition(object):
+    """
+    A compact Backgammon position for generating plays. (object)
+
+    The points are 26 signed piece counts, positive for X and negative for O.
+    Indexes 1 to 24 are the points on the board, index 25 is X's bar (X enters
+    toward the one point), and index 0 is O's bar. The players are identified by
+    their sign (1 for X, -1 for O). Plays are generated by making and unmaking
+    moves in place, rather than by copying boards.
+
+    Attributes:
+    off: The number of pieces born off, by sign. (dict of int: int)
+    points: The signed piece counts for the points and the bars. (list of int)
+
+    Methods:
+    copy: Copy the position. (BackgammonPosition)
+    get_board: Make a board with the same pieces. (BackgammonBoard)
+    get_moves: Get the legal moves for one roll. (list of tuple)
+    get_plays: Get all the legal plays for a given set of rolls. (list of BackgammonPlay)
+    key: Get a compact key for the pieces on the board. (bytes)
+    make_move: Make a move in place. (bool)
+    make_play: Make all the moves of a play in place. (list of bool)
+    search_plays: Record the plays from the current position without duplicates. (bool)
+    unmake_move: Take back a move made with make_move. (None)
+    unmake_play: Take back a play made with make_play. (None)
+
+    Overridden Methods:
+    __init__
+    __repr__
+    """
+
+    def __init__(self, board = None):
+        """
+        Set up the position, possibly from a board. (None)
+
+        Parameters:
+        board: The board to copy the pieces from. (BackgammonBoard)
+        """
+        self.points = [0] * 26
+        self.off = {1: 0, -1: 0}
+        if board is not None:
+            for point in range(1, 25):
+                contents = board.cells[point].contents
+                if contents:
+                    self.points[point] = len(contents) if contents[0] == 'X' else -len(contents)
+            bar = board.cells[BAR].contents
+            self.points[25] = bar.count('X')
+            self.points[0] = -bar.count('O')
+            out = board.cells[OUT].contents
+            self.off = {1: out.count('X'), -1: out.count('O')}
+
+    def __repr__(self):
+        """Generate a debugging text representation. (str)"""
+        return '<BackgammonPosition {!r} off {}-{}>'.format(self.points, self.off[1], self.off[-1])
+
+    def copy(self):
+        """Copy the position. (BackgammonPosition)"""
+        clone = BackgammonPosition()
+        clone.points = self.points[:]
+        clone.off = self.off.copy()
+        return clone
+
+    def get_board(self):
+        """Make a board with the same pieces. (BackgammonBoard)"""
+        board = BackgammonBoard(layout = ())
+        for point in range(1, 25):
+            men = self.points[point]
+            if men:
+                board.cells[point].contents = ['X' if men > 0 else 'O'] * abs(men)
+        board.cells[BAR].contents = ['X'] * self.points[25] + ['O'] * -self.points[0]
+        board.cells[OUT].contents = ['X'] * self.off[1] + ['O'] * self.off[-1]
+        board.count_pieces()
+        return board
+
+    def get_moves(self, sign, roll):
+        """
+        Get the legal moves for one roll. (list of tuple)
+
+        The moves are tuples of the start and end indexes, with OUT as the end for
+        bearing off.
+
+        Parameters:
+        sign: The sign of the player moving. (int)
+        roll: The roll to move. (int)
+        """
+        points = self.points
+        bar = 25 if sign == 1 else 0
+        # Pieces on the bar must enter first.
+        if points[bar]:
+            end = bar - sign * roll
+            return [(bar, end)] if points[end] * sign >= -1 else []
+        moves = []
+        home = HOMES[sign]
+        outside = range(7, 25) if sign == 1 else range(1, 19)
+        if any(points[point] * sign > 0 for point in outside):
+            # Move pieces normally.
+            for start in range(1, 25):
+                end = start - sign * roll
+                if points[start] * sign > 0 and 0 < end < 25 and points[end] * sign >= -1:
+                    moves.append((start, end))
+        else:
+            # Bear off pieces.
+            home_indexes = [index for index, point in enumerate(home) if points[point] * sign > 0]
+            if not home_indexes:
+                return moves
+            if points[home[roll - 1]] * sign > 0:
+                moves.append((home[roll - 1], OUT))
+            elif roll > home_indexes[-1] + 1:
+                moves.append((home[home_indexes[-1]], OUT))
+            # Move pieces within the home board.
+            for start in home:
+                end = start - sign * roll
+                if 0 < end < 25 and points[start] * sign > 0 and points[end] * sign >= -1:
+                    moves.append((start, end))
+        return moves
+
+    def get_plays(self, piece, rolls):
+        """
+        Get all the legal plays for a given set of rolls. (list of BackgammonPlay)
+
+        Only plays using as many rolls and as many pips as possible are legal. For
+        doubles, only one play is included for each position that can be played to.
+
+        Parameters:
+        piece: The piece symbol to move. (str)
+        rolls: The rolls available to move with. (list of int)
+        """
+        # Generate the plays, in canonical order for doubles.
+        best_moves = {}
+        doubles = len(rolls) > 1 and len(set(rolls)) == 1
+        self.search_plays(1 if piece == 'X' else -1, list(rolls), [], best_moves, 25 if doubles else None)
+        # Check for maximum use of the roll.
+        plays = []
+        for moves in best_moves.values():
+            play = BackgammonPlay()
+            for move in moves:
+                play.add_move(*move)
+            plays.append(play)
+        max_roll = max(play.total_roll for play in plays) if plays else 0
+        max_moves = max(len(play) for play in plays) if plays else 0
+        return [play for play in plays if play.total_roll == max_roll and len(play) == max_moves]
+
+    def key(self):
+        """
+        Get a compact key for the pieces on the board. (bytes)
+
+        The pieces born off are not included, since they do not change the plays.
+        """
+        return bytes(bytearray(point + 15 for point in self.points))
+
+    def make_move(self, start, end, sign):
+        """
+        Make a move in place. (bool)
+
+        The return value is a flag for an opposing piece being hit.
+
+        Parameters:
+        start: The index the piece moves from. (int)
+        end: The index the piece moves to, or OUT. (int)
+        sign: The sign of the player moving. (int)
+        """
+        points = self.points
+        points[start] -= sign
+        if end == OUT:
+            self.off[sign] += 1
+            return False
+        elif points[end] == -sign:
+            # Put a hit piece on the bar.
+            points[end] = sign
+            points[0 if sign == 1 else 25] -= sign
+            return True
+        else:
+            points[end] += sign
+            return False
+
+    def make_play(self, play, sign):
+        """
+        Make all the moves of a play in place. (list of bool)
+
+        The return value is the hit flags for the moves, for unmake_play.
+
+        Parameters:
+        play: The play to make. (BackgammonPlay)
+        sign: The sign of the player making the play. (int)
+        """
+        bar = 25 if sign == 1 else 0
+        return [self.make_move(bar if start == BAR else start, end, sign) for start, end in play]
+
+    def search_plays(self, sign, rolls, moves, best_moves, max_pips = None):
+        """
+        Record the plays from the current position without duplicates. (bool)
+
+        The return value is a flag for there being any legal moves. The moves are
+        recorded in the notation used by BackgammonPlay. Plays that can't use all of
+        the rolls are recorded as far as they get.
+
+        For doubles, max_pips is the pip count of the last move's start point. Moves
+        from farther back are skipped, so each set of moves is only searched in one
+        order (pieces farther back moving first). If two plays of doubles reach the
+        same position, the one using more rolls and then more pips is kept. Other
+        rolls keep each order of the moves, since moves are checked one at a time
+        against the legal plays.
+
+        Parameters:
+        sign: The sign of the player moving. (int)
+        rolls: The rolls left to move. (list of int)
+        moves: The moves made so far. (list of tuple)
+        best_moves: The moves found for each position or set of moves. (dict)
+        max_pips: The farthest start point allowed, None for any start point. (int)
+        """
+        found = False
+        for roll in sorted(set(rolls)):
+            sub_rolls = rolls[:]
+            sub_rolls.remove(roll)
+            for start, end in self.get_moves(sign, roll):
+                pips = start if sign == 1 else 25 - start
+                if max_pips is not None and pips > max_pips:
+                    continue
+                found = True
+                hit = self.make_move(start, end, sign)
+                moves.append((BAR if start in (0, 25) else start, end, roll))
+                if not (sub_rolls and self.search_plays(sign, sub_rolls, moves, best_moves,
+                    None if max_pips is None else pips)):
+                    # Keep the best play to each position (each set of moves for non-doubles).
+                    key = tuple(sorted(moves)) if max_pips is None else tuple(self.points)
+                    previous = best_moves.get(key)
+                    if previous is None or (len(moves), sum(move[2] for move in moves)) > \
+                        (len(previous), sum(move[2] for move in previous)):
+                        best_moves[key] = moves[:]
+                moves.pop()
+                self.unmake_move(start, end, sign, hit)
+        return found
+
+    def unmake_move(self, start, end, sign, hit):
+        """
+        Take back a move made with make_move. (None)
+
+        Parameters:
+        start: The index the piece moved from. (int)
+        end: The index the piece moved to, or OUT. (int)
+        sign: The sign of the player who moved. (int)
+        hit: The flag returned by make_move. (bool)
+        """
+        points = self.points
+        points[start] += sign
+        if end == OUT:
+            self.off[sign] -= 1
+        elif hit:
+            points[end] = -sign
+            points[0 if sign == 1 else 25] += sign
+        else:
+            points[end] -= sign
+
+    def unmake_play(self, play, sign, hits):
+        """
+        Take back a play made with make_play. (None)
+
+        Parameters:
+        play: The play to take back. (BackgammonPlay)
+        sign: The sign of the player who made the play. (int)
+        hits: The hit flags returned by make_play. (list of bool)
+        """
+        bar = 25 if sign == 1 else 0
+        for (start, end), hit in reversed(list(zip(play, hits))):
+            self.unmake_move(bar if start == BAR else start, end, sign, hit)
+
+
+class PlayCache(object):
+    """
+    A least recently used cache of legal plays. (object)
+
+    The plays are stored as tuples of moves, keyed by the position key, the piece
+    moving, and the sorted rolls. New BackgammonPlay objects are made for each
+    lookup, since bots use up the moves in a play as they make them.
+
+    Attributes:
+    hits: The number of lookups found in the cache. (int)
+    max_size: The maximum number of plays to store. (int)
+    misses: The number of lookups that had to generate plays. (int)
+    plays: The stored plays, least recently used first. (OrderedDict)
+
+    Methods:
+    clear: Remove all of the stored plays and reset the counters. (None)
+    get_plays: Get all the legal plays for a position and rolls. (list of BackgammonPlay)
+
+    Overridden Methods:
+    __init__
+    __len__
+    __repr__
+    """
+
+    def __init__(self, max_size = PLAY_CACHE_SIZE):
+        """
+        Set up the cache. (None)
+
+        Parameters:
+        max_size: The maximum number of plays to store. (int)
+        """
+        self.max_size = max_size
+        self.clear()
+
+    def __len__(self):
+        """Number of stored plays. (int)"""
+        return len(self.plays)
+
+    def __repr__(self):
+        """Generate a debugging text representation. (str)"""
+        text = '<PlayCache {} of {} with {} hits and {} misses>'
+        return text.format(len(self.plays), self.max_size, self.hits, self.misses)
+
+    def clear(self):
+        """Remove all of the stored plays and reset the counters. (None)"""
+        self.plays = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_plays(self, position, piece, rolls):
+        """
+        Get all the legal plays for a position and rolls. (list of BackgammonPlay)
+
+        Parameters:
+        position: The position to get plays for. (BackgammonPosition)
+        piece: The piece symbol to move. (str)
+        rolls: The rolls available to move with. (list of int)
+        """
+        key = (position.key(), piece, tuple(sorted(rolls)))
+        moves = self.plays.pop(key, None)
+        if moves is None:
+            # Generate and store new plays.
+            self.misses += 1
+            moves = tuple(tuple(play.moves) for play in position.get_plays(piece, rolls))
+            if len(self.plays) >= self.max_size:
+                self.plays.popitem(last = False)
+        else:
+            self.hits += 1
+        # Mark the plays as the most recently used.
+        self.plays[key] = moves
+        plays = []
+        for play_moves in moves:
+            play = BackgammonPlay()
+            for move in play_moves:
+                play.add_move(*move)
+            plays.append(play)
+        return plays
+
+
+class TDNetwork(object):
+    """
+    A neural network for evaluating Backgammon positions. (object)
+
+    The inputs are pubeval vectors (see PubEvalBot.set_vector), which go through
+    one hidden layer of sigmoid units to one sigmoid output: the chance that the
+    player who just moved wins. The network needs NumPy.
+
+    Attributes:
+    games: The number of self-play games the network has been trained on. (int)
+    parameters: The hidden weights and biases and the output weights and bias. (list)
+
+    Methods:
+    evaluate: Get the chances of winning for several input vectors. (numpy.ndarray)
+    gradients: Get the chance of winning and its gradients for one vector. (tuple)
+    save: Write the network to a file. (None)
+    update: Add changes to the parameters. (None)
+
+    Overridden Methods:
+    __init__
+    __repr__
+    """
+
+    def __init__(self, hidden = 40, inputs = 122, seed = None):
+        """
+        Set up the network with small random weights. (None)
+
+        Parameters:
+        hidden: The number of hidden units. (int)
+        inputs: The number of inputs. (int)
+        seed: The seed for the random weights. (int)
+        """
+        rng = numpy.random.RandomState(seed)
+        self.parameters = [rng.uniform(-0.1, 0.1, (hidden, inputs)), numpy.zeros(hidden),
+            rng.uniform(-0.1, 0.1, hidden), numpy.zeros(1)]
+        self.games = 0
+
+    def __repr__(self):
+        """Create a debugging text representation. (str)"""
+        hidden, inputs = self.parameters[0].shape
+        return '<TDNetwork {}-{}-1 trained on {} games>'.format(inputs, hidden, self.games)
+
+    def evaluate(self, vectors):
+        """
+        Get the chances of winning for several input vectors. (numpy.ndarray)
+
+        Parameters:
+        vectors: The input vectors. (list of list of float)
+        """
+        hidden_weights, hidden_bias, output_weights, output_bias = self.parameters
+        hidden = 1 / (1 + numpy.exp(-(numpy.dot(numpy.asarray(vectors, dtype = float), hidden_weights.T) +
+            hidden_bias)))
+        return 1 / (1 + numpy.exp(-(numpy.dot(hidden, output_weights) + output_bias[0])))
+
+    def gradients(self, vector):
+        """
+        Get the chance of winning and its gradients for one vector. (tuple)
+
+        The return value is the chance of winning, and a list of the gradients of
+        that chance for each item in parameters.
+
+        Parameters:
+        vector: The input vector. (list of float)
+        """
+        hidden_weights, hidden_bias, output_weights, output_bias = self.parameters
+        inputs = numpy.asarray(vector, dtype = float)
+        hidden = 1 / (1 + numpy.exp(-(numpy.dot(hidden_weights, inputs) + hidden_bias)))
+        output = 1 / (1 + numpy.exp(-(numpy.dot(hidden, output_weights) + output_bias[0])))
+        output_slope = output * (1 - output)
+        hidden_slopes = output_slope * output_weights * hidden * (1 - hidden)
+        return output, [numpy.outer(hidden_slopes, inputs), hidden_slopes, output_slope * hidden,
+            numpy.array([output_slope])]
+
+    def save(self, path = TD_PATH):
+        """
+        Write the network to a file. (None)
+
+        The parameters are stored as 32 bit floats in a compressed NumPy archive.
+
+        Parameters:
+        path: The location of the file. (str)
+        """
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        with open(path, 'wb') as network_file:
+            numpy.savez_compressed(network_file, games = numpy.array([self.games]),
+                *[parameter.astype(numpy.float32) for parameter in self.parameters])
+
+    def update(self, changes):
+        """
+        Add changes to the parameters. (None)
+
+        Parameters:
+        changes: The changes for each item in parameters. (list of numpy.ndarray)
+        """
+        for parameter, change in zip(self.parameters, changes):
+            parameter += change
+
+
+def load_network(path = TD_PATH):
+    """
+    Load a trained network, if there is one. (TDNetwork or None)
+
+    Parameters:
+    path: The location of the network file. (str)
+    """
+    if numpy is None or not os.path.exists(path):
+        return None
+    with numpy.load(path) as archive:
+        network = TDNetwork()
+        network.parameters = [archive['arr_{}'.format(index)].astype(float) for index in range(4)]
+        network.games = int(archive['games'][0])
+    return network
+
+
+def phase_sums(board_features, phases, vectors):
+    """
+    Score board features against the weights for their phases. (list of float)
+
+    The boards in each phase are scored together with weighted_sums. The weights
+    are scaled by FEATURE_SCALES, which puts the shot counts in sixths of the
+    rolls, the scale the AdditiveBot weights were trained on.
+
+    Parameters:
+    board_features: The summaries of the board positions. (list of list of int)
+    phases: The phase of play for each board position. (list of str)
+    vectors: The weights for each phase. (dict of str: list of int)
+    """
+    scores = [0] * len(phases)
+    for phase in set(phases):
+        indexes = [index for index, board_phase in enumerate(phases) if board_phase == phase]
+        rows = [board_features[index] for index in indexes]
+        weights = [weight * scale for weight, scale in zip(vectors[phase], FEATURE_SCALES)]
+        for index, score in zip(indexes, weighted_sums(rows, weights)):
+            scores[index] = score
+    return scores
+
+
+def play_out(position, sign, first_rolls, rng, bots, max_turns = ROLLOUT_TURNS):
+    """
+    Play a position out to the end of the game. (int)
+
+    The return value is the points won by the player on roll: 1, 2 for a gammon,
+    or 3 for a backgammon, negative for a loss. If the game is not over after
+    max_turns, 0 is returned. The position is changed in place.
+
+    Parameters:
+    position: The position to play out. (BackgammonPosition)
+    sign: The sign of the player on roll. (int)
+    first_rolls: The dice for the first turns. (list of tuple of int)
+    rng: The random number generator for the later dice. (random.Random)
+    bots: The bots making the plays, by sign. (dict of int: PubEvalBot)
+    max_turns: The most turns to play. (int)
+    """
+    mover = sign
+    for turn in range(max_turns):
+        # Roll the dice.
+        if turn < len(first_rolls):
+            high, low = first_rolls[turn]
+        else:
+            high, low = rng.randint(1, 6), rng.randint(1, 6)
+        rolls = [high] * 4 if high == low else [high, low]
+        # Make the best play by pubeval.
+        plays = position.get_plays('X' if mover == 1 else 'O', rolls)
+        if plays:
+            bot = bots[mover]
+            vectors = []
+            for play in plays:
+                hits = position.make_play(play, mover)
+                vectors.append(bot.get_pub_position(position))
+                position.unmake_play(play, mover, hits)
+            scores = bot.eval_positions(vectors)
+            position.make_play(plays[scores.index(max(scores))], mover)
+        # Check for the mover bearing off their last piece.
+        if not any(men * mover > 0 for men in position.points):
+            loser = -mover
+            points = 1
+            if not position.off[loser]:
+                # Check for gammons and backgammons.
+                trapped = [25 if loser == 1 else 0] + list(HOMES[mover])
+                points = 3 if any(position.points[point] * loser > 0 for point in trapped) else 2
+            return points if mover == sign else -points
+        mover = -mover
+    return 0
+
+
+def rollout(board, piece, trials = ROLLOUT_TRIALS, processes = None, seed = None):
+    """
+    Roll out a Backgammon position. (dict)
+
+    A rollout plays the position out many times, with pubeval making the plays
+    for both sides. The results are for the player with the given piece, who is
+    about to roll. They are the cubeless chances of a win, a gammon win, a
+    backgammon win, a gammon loss, and a backgammon loss (gammons include
+    backgammons), with the cubeless equity and its standard error. Trials not
+    finished in ROLLOUT_TURNS count as ties.
+
+    Variance is reduced with quasi-random dice: the first two rolls are spread
+    evenly over the trials, so with 1296 trials each of the 36 first rolls is
+    followed by each of the 36 replies exactly once.
+
+    Parameters:
+    board: The board with the position to roll out. (BackgammonBoard)
+    piece: The piece of the player on roll. (str)
+    trials: The number of times to play the position out. (int)
+    processes: The number of processes to use, None for one per cpu. (int)
+    seed: The seed for the random dice, None for a random seed. (int)
+    """
+    # Set up the jobs.
+    position = BackgammonPosition(board)
+    sign = 1 if piece == 'X' else -1
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    jobs = [(position.points, position.off, sign, range(start, min(start + 36, trials)), seed)
+        for start in range(0, trials, 36)]
+    # Play the trials out.
+    if processes == 1:
+        chunks = list(map(rollout_trials, jobs))
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            chunks = pool.map(rollout_trials, jobs)
+        finally:
+            pool.close()
+            pool.join()
+    results = [result for chunk in chunks for result in chunk]
+    # Summarize the results.
+    trials = float(len(results))
+    equity = sum(results) / trials
+    variance = sum((result - equity) ** 2 for result in results) / max(trials - 1, 1)
+    return {'trials': len(results), 'win': sum(result > 0 for result in results) / trials,
+        'gammon': sum(result > 1 for result in results) / trials,
+        'backgammon': sum(result > 2 for result in results) / trials,
+        'lose-gammon': sum(result < -1 for result in results) / trials,
+        'lose-backgammon': sum(result < -2 for result in results) / trials,
+        'equity': equity, 'error': math.sqrt(variance / trials)}
+
+
+def rollout_trials(job):
+    """
+    Play out a chunk of trials of a rollout. (list of int)
+
+    Each trial gets its own random number generator, so the results do not
+    depend on how the trials are split between processes.
+
+    Parameters:
+    job: The points, pieces off, sign on roll, trial numbers, and seed. (tuple)
+    """
+    points, off, sign, trial_numbers, seed = job
+    bots = {}
+    for bot_sign, piece in ((1, 'X'), (-1, 'O')):
+        bots[bot_sign] = PubEvalBot(taken_names = [bot.name for bot in bots.values()])
+        bots[bot_sign].piece = piece
+    results = []
+    for trial in trial_numbers:
+        position = BackgammonPosition()
+        position.points = points[:]
+        position.off = dict(off)
+        first_rolls = [ORDERED_ROLLS[trial % 36], ORDERED_ROLLS[(trial // 36) % 36]]
+        results.append(play_out(position, sign, first_rolls, random.Random(seed + trial), bots))
+    return results
+
+
+def shot_table():
+    """
+    Calculate the rolls that hit a blot at each distance. (list of list of tuple)
+
+    The table is indexed by the distance from the piece hitting to the blot. Each
+    item is a list of tuples of the rolls that hit and the steps they stop on
+    along the way. The rolls are bit masks of the indexes of ORDERED_ROLLS, and
+    hits with one die have no steps.
+    """
+    table = [[] for distance in range(25)]
+    for index, (first, second) in enumerate(ORDERED_ROLLS):
+        roll_bit = 1 << index
+        if first == second:
+            # Doubles stop on every multiple of the die.
+            table[first].append((roll_bit, ()))
+            for moves in range(2, 5):
+                table[first * moves].append((roll_bit, tuple(first * step for step in range(1, moves))))
+        else:
+            # Other rolls can hit with either die, or stop after either die.
+            table[first].append((roll_bit, ()))
+            table[second].append((roll_bit, ()))
+            table[first + second].extend([(roll_bit, (first,)), (roll_bit, (second,))])
+    # Combine the rolls with the same steps.
+    for distance, shots in enumerate(table):
+        combined = collections.OrderedDict()
+        for rolls, steps in shots:
+            combined[steps] = combined.get(steps, 0) | rolls
+        table[distance] = [(rolls, steps) for steps, rolls in combined.items()]
+    return table
+
+
+def should_double(results):
+    """
+    Decide if the rollout results are good enough to double. (bool)
+
+    Positions that are too good are played on for a gammon rather than doubled.
+
+    Parameters:
+    results: The results of rolling out the position for the doubler. (dict)
+    """
+    return DOUBLE_EQUITY <= results['equity'] < TOO_GOOD_EQUITY
+
+
+def should_take(results):
+    """
+    Decide if the rollout results are good enough to take a double. (bool)
+
+    Parameters:
+    results: The results of rolling out the position for the doubler. (dict)
+    """
+    return -results['equity'] >= TAKE_EQUITY
+
+
+def weighted_sums(rows, weights):
+    """
+    Score rows of features against a list of weights. (list of float)
+
+    With NumPy the rows are scored as one matrix-vector product, otherwise they
+    are scored one at a time in pure Python.
+
+    Parameters:
+    rows: The features to score, each as long as the weights. (list of list)
+    weights: The weight for each feature. (list of float)
+    """
+    if not rows:
+        return []
+    elif numpy is None:
+        return [sum([value * weight for value, weight in zip(row, weights)]) for row in rows]
+    else:
+        return numpy.dot(numpy.array(rows, dtype = float), numpy.array(weights, dtype = float)).tolist()
+
+
+BEAROFF = backgammon_bearoff.load_database()
+
+PLAY_CACHE = PlayCache()
+
+SHOT_TABLE = shot_table()
+
+TD_NETWORK = load_network()
@@ -0,0 +1,379 @@
+"""
+backgammon_genetics.py
+
+A genetic algorithm for training the weights of Backgammon bots.
+
+A population of weight vectors (as used by BackGeneBot) is scored by playing
+every member against every other member, with the matches spread over a pool
+of processes. The best scoring members are kept, and the rest of the next
+generation is bred from members chosen by tournament selection, with uniform
+crossover and random mutation of the weights. Each generation is written to a
+checkpoint file, and training picks up from the last checkpoint in the folder.
+The best weights can be exported as the source code of a fixed-weight bot like
+AdditiveBot. From the command line (in the folder above t_games):
+
+    python -m t_games.board_games.backgammon_genetics [-f folder] [-g generations]
+        [-m games] [-n population] [-p processes] [-s seed] [-x export-file]
+
+Copyright (C) 2018 by Craig O'Brien and the t_games contributors.
+See the top level __init__.py file for details on the t_games license.
+
+Constants:
+CHECKPOINT_FOLDER: The default folder for checkpoint files. (str)
+ELITE: The default number of best members kept unchanged. (int)
+GAMES: The default number of games played by each pair of members. (int)
+GENERATIONS: The default number of generations to train. (int)
+MUTATION_RATE: The default chance of each weight being mutated. (float)
+MUTATION_SIZE: The default largest change to a mutated weight. (int)
+POPULATION: The default number of members in a generation. (int)
+SELECTION_SIZE: The number of members in each selection tournament. (int)
+WEIGHT_RANGES: The lowest and highest weights for each phase. (dict)
+
+Functions:
+checkpoint_path: Get the file name for a generation's checkpoint. (str)
+crossover: Breed two weight vectors. (dict)
+export_bot: Write the source code for a bot using given weights. (str)
+load_checkpoint: Load the latest checkpoint in a folder. (dict or None)
+mutate: Randomly change some of the weights. (dict)
+next_generation: Breed the next generation of a population. (list of dict)
+play_match: Play a match between two weight vectors. (int)
+random_vectors: Generate random weight vectors. (dict)
+save_checkpoint: Write a generation to a checkpoint file. (str)
+score_population: Score a population by playing round robin matches. (list of int)
+select: Choose a member by tournament selection. (dict)
+train: Train weight vectors with a genetic algorithm. (dict)
+"""
+
+
+from __future__ import print_function
+
+import getopt
+import glob
+import json
+import multiprocessing
+import os
+import random
+import sys
+
+from . import backgammon_game as backgammon
+from .. import utility
+
+
+CHECKPOINT_FOLDER = os.path.join(utility.LOC, 'backgammon_genetics')
+
+ELITE = 2
+
+GAMES = 4
+
+GENERATIONS = 10
+
+MUTATION_RATE = 0.1
+
+MUTATION_SIZE = 20
+
+POPULATION = 16
+
+SELECTION_SIZE = 3
+
+WEIGHT_RANGES = {'mixed': (0, 100), 'split': (0, 100), 'stretch': (0, 100), 'double': (-100, 100),
+    'accept': (-100, 100)}
+
+
+def checkpoint_path(folder, generation):
+    """
+    Get the file name for a generation's checkpoint. (str)
+
+    Parameters:
+    folder: The folder the checkpoints are stored in. (str)
+    generation: The number of the generation. (int)
+    """
+    return os.path.join(folder, 'generation_{:04}.json'.format(generation))
+
+
+def crossover(mother, father, rng):
+    """
+    Breed two weight vectors. (dict)
+
+    Each weight is taken from the mother or the father at random, as in BackGeneBot.
+
+    Parameters:
+    mother: The first parent's weight vectors. (dict of str: list of int)
+    father: The second parent's weight vectors. (dict of str: list of int)
+    rng: The random number generator to use. (random.Random)
+    """
+    child = {}
+    for phase in backgammon.BackGeneBot.phases:
+        child[phase] = [rng.choice(pair) for pair in zip(mother[phase], father[phase])]
+    return child
+
+
+def export_bot(vectors, class_name = 'TrainedBot'):
+    """
+    Write the source code for a bot using given weights. (str)
+
+    The bot is a subclass of AdditiveBot, so the source can be added to
+    backgammon_game.py after AdditiveBot.
+
+    Parameters:
+    vectors: The weights for evaluating positions in different phases. (dict)
+    class_name: The name of the bot's class. (str)
+    """
+    lines = ['class {}(AdditiveBot):'.format(class_name), '    """',
+        '    A genetically trained version of AdditiveBot. (AdditiveBot)', '',
+        '    Overridden Methods:', '    __init__', '    """', '',
+        '    def __init__(self, taken_names = []):', '        """', '        Set up the bot. (None)', '',
+        '        Parameters:',
+        '        taken_names: The names already in use by other players. (list of str)',
+        '        """', '        super({}, self).__init__(taken_names = taken_names)'.format(class_name)]
+    for phase in backgammon.BackGeneBot.phases:
+        weights = ', '.join(str(weight) for weight in vectors[phase])
+        lines.append("        self.vectors['{}'] = [{}]".format(phase, weights))
+    return '\n'.join(lines) + '\n'
+
+
+def load_checkpoint(folder = CHECKPOINT_FOLDER):
+    """
+    Load the latest checkpoint in a folder. (dict or None)
+
+    The checkpoint has the generation number, the seed, the population's weight
+    vectors, and the population's scores. None is returned if there are no
+    checkpoints in the folder.
+
+    Parameters:
+    folder: The folder the checkpoints are stored in. (str)
+    """
+    paths = sorted(glob.glob(os.path.join(folder, 'generation_*.json')))
+    if paths:
+        with open(paths[-1]) as checkpoint_file:
+            return json.load(checkpoint_file)
+    else:
+        return None
+
+
+def mutate(vectors, rng, rate = MUTATION_RATE, size = MUTATION_SIZE):
+    """
+    Randomly change some of the weights. (dict)
+
+    Mutated weights are kept within the WEIGHT_RANGES for their phase.
+
+    Parameters:
+    vectors: The weights for evaluating positions in different phases. (dict)
+    rng: The random number generator to use. (random.Random)
+    rate: The chance of each weight being mutated. (float)
+    size: The largest change to a mutated weight. (int)
+    """
+    mutant = {}
+    for phase in backgammon.BackGeneBot.phases:
+        low, high = WEIGHT_RANGES[phase]
+        mutant[phase] = []
+        for weight in vectors[phase]:
+            if rng.random() < rate:
+                weight = min(high, max(low, weight + rng.randint(-size, size)))
+            mutant[phase].append(weight)
+    return mutant
+
+
+def next_generation(population, scores, rng, elite = ELITE, rate = MUTATION_RATE, size = MUTATION_SIZE):
+    """
+    Breed the next generation of a population. (list of dict)
+
+    Parameters:
+    population: The weight vectors of the current generation. (list of dict)
+    scores: The scores for each member of the population. (list of int)
+    rng: The random number generator to use. (random.Random)
+    elite: The number of best members kept unchanged. (int)
+    rate: The chance of each weight being mutated. (float)
+    size: The largest change to a mutated weight. (int)
+    """
+    ranked = sorted(range(len(population)), key = lambda index: scores[index], reverse = True)
+    children = [population[index] for index in ranked[:elite]]
+    while len(children) < len(population):
+        mother = select(population, scores, rng)
+        father = select(population, scores, rng)
+        children.append(mutate(crossover(mother, father, rng), rng, rate, size))
+    return children
+
+
+def play_match(job):
+    """
+    Play a match between two weight vectors. (int)
+
+    Each side plays half of the games as X. The return value is the points won
+    by the first side minus the points won by the second side.
+
+    Parameters:
+    job: The two sides' weight vectors, the number of games, and the seed. (tuple)
+    """
+    first_vectors, second_vectors, games, seed = job
+    random.seed(seed)
+    first = backgammon.BackGeneBot()
+    first.vectors = first_vectors
+    second = backgammon.BackGeneBot(taken_names = [first.name])
+    second.vectors = second_vectors
+    game = backgammon.Backgammon(first, 'none')
+    margin = 0
+    for players, rounds in (([first, second], (games + 1) // 2), ([second, first], games // 2)):
+        if rounds:
+            results = game.tournament(players, rounds)
+            margin += sum(results['scores'][first.name]) - sum(results['scores'][second.name])
+    return margin
+
+
+def random_vectors(rng):
+    """
+    Generate random weight vectors. (dict)
+
+    Parameters:
+    rng: The random number generator to use. (random.Random)
+    """
+    vectors = {}
+    for phase in backgammon.BackGeneBot.phases:
+        low, high = WEIGHT_RANGES[phase]
+        vectors[phase] = [rng.randint(low, high) for dummy in range(8)]
+    return vectors
+
+
+def save_checkpoint(folder, generation, seed, population, scores):
+    """
+    Write a generation to a checkpoint file. (str)
+
+    The return value is the path to the checkpoint file.
+
+    Parameters:
+    folder: The folder the checkpoints are stored in. (str)
+    generation: The number of the generation. (int)
+    seed: The seed the training was started with. (int)
+    population: The weight vectors of the generation. (list of dict)
+    scores: The scores for each member of the population. (list of int)
+    """
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    path = checkpoint_path(folder, generation)
+    checkpoint = {'generation': generation, 'seed': seed, 'population': population, 'scores': scores}
+    # Write to a temporary file first, so an interruption can't corrupt the checkpoint.
+    with open(path + '.tmp', 'w') as checkpoint_file:
+        json.dump(checkpoint, checkpoint_file, sort_keys = True)
+    if os.path.exists(path):
+        os.remove(path)
+    os.rename(path + '.tmp', path)
+    return path
+
+
+def score_population(population, games = GAMES, processes = None, seed = 0):
+    """
+    Score a population by playing round robin matches. (list of int)
+
+    Each member's score is the total of its point margins in its matches.
+
+    Parameters:
+    population: The weight vectors to score. (list of dict)
+    games: The number of games played by each pair of members. (int)
+    processes: The number of processes to use, None for one per cpu. (int)
+    seed: The seed for the dice. (int)
+    """
+    # Set up the matches.
+    size = len(population)
+    pairs = [(first, second) for first in range(size) for second in range(first + 1, size)]
+    jobs = [(population[first], population[second], games, seed * len(pairs) + match_index)
+        for match_index, (first, second) in enumerate(pairs)]
+    # Play the matches.
+    if processes == 1:
+        margins = list(map(play_match, jobs))
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            margins = pool.map(play_match, jobs)
+        finally:
+            pool.close()
+            pool.join()
+    # Total the margins.
+    scores = [0] * len(population)
+    for (first, second), margin in zip(pairs, margins):
+        scores[first] += margin
+        scores[second] -= margin
+    return scores
+
+
+def select(population, scores, rng, size = SELECTION_SIZE):
+    """
+    Choose a member by tournament selection. (dict)
+
+    Parameters:
+    population: The weight vectors to choose from. (list of dict)
+    scores: The scores for each member of the population. (list of int)
+    rng: The random number generator to use. (random.Random)
+    size: The number of members in the tournament. (int)
+    """
+    entrants = [rng.randrange(len(population)) for dummy in range(size)]
+    return population[max(entrants, key = lambda index: scores[index])]
+
+
+def train(generations = GENERATIONS, population_size = POPULATION, games = GAMES, processes = None,
+    seed = 0, folder = CHECKPOINT_FOLDER):
+    """
+    Train weight vectors with a genetic algorithm. (dict)
+
+    If there are checkpoints in the folder, training resumes after the latest
+    one, with the seed stored in it. The return value is the best weight
+    vectors of the last generation.
+
+    Parameters:
+    generations: The total number of generations to train. (int)
+    population_size: The number of members in a generation. (int)
+    games: The number of games played by each pair of members. (int)
+    processes: The number of processes to use, None for one per cpu. (int)
+    seed: The seed for the random numbers. (int)
+    folder: The folder the checkpoints are stored in. (str)
+    """
+    # Start a new population or resume from the checkpoint.
+    checkpoint = load_checkpoint(folder)
+    if checkpoint is None:
+        generation = 0
+        rng = random.Random(seed)
+        population = [random_vectors(rng) for dummy in range(population_size)]
+    else:
+        seed = checkpoint['seed']
+        generation = checkpoint['generation'] + 1
+        rng = random.Random(seed * 1000003 + generation)
+        population = next_generation(checkpoint['population'], checkpoint['scores'], rng)
+    # Score and breed the generations.
+    while generation < generations:
+        scores = score_population(population, games, processes, seed * 1000003 + generation)
+        checkpoint = {'population': population, 'scores': scores}
+        save_checkpoint(folder, generation, seed, population, scores)
+        generation += 1
+        if generation < generations:
+            rng = random.Random(seed * 1000003 + generation)
+            population = next_generation(population, scores, rng)
+    # Return the best member.
+    best = max(range(len(checkpoint['scores'])), key = lambda index: checkpoint['scores'][index])
+    return checkpoint['population'][best]
+
+
+if __name__ == '__main__':
+    # Train from the command line.
+    opts, args = getopt.getopt(sys.argv[1:], 'f:g:m:n:p:s:x:')
+    settings = {}
+    export_path = ''
+    for option, value in opts:
+        if option == '-f':
+            settings['folder'] = value
+        elif option == '-g':
+            settings['generations'] = int(value)
+        elif option == '-m':
+            settings['games'] = int(value)
+        elif option == '-n':
+            settings['population_size'] = int(value)
+        elif option == '-p':
+            settings['processes'] = int(value)
+        elif option == '-s':
+            settings['seed'] = int(value)
+        elif option == '-x':
+            export_path = value
+    best = train(**settings)
+    if export_path:
+        with open(export_path, 'w') as export_file:
+            export_file.write(export_bot(best))
+        print('The best weights were exported to {}.'.format(export_path))
+    else:
+        print(export_bot(best))
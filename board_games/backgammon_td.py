@@ -0,0 +1,192 @@
+"""
+backgammon_td.py
+
+Training the network for TDBot by TD(lambda) self-play.
+
+The network plays both sides of a game, taking the play it scores best each
+turn. After each play, the network's score for the mover's new position is
+used to correct its score for the mover's previous position, and the gradients
+of earlier positions are blended in with eligibility traces. At the end of the
+game, the winner's last position is corrected toward a win, and the loser's
+toward a loss. The network is saved every so often and at the end, and
+training continues from the saved network. From the command line (in the
+folder above t_games):
+
+    python -m t_games.board_games.backgammon_td [-a alpha] [-b benchmark-games]
+        [-g games] [-l lambda] [-n hidden] [-o file] [-s seed]
+
+Training needs NumPy.
+
+Copyright (C) 2018 by Craig O'Brien and the t_games contributors.
+See the top level __init__.py file for details on the t_games license.
+
+Constants:
+ALPHA: The default learning rate. (float)
+GAMES: The default number of self-play games. (int)
+HIDDEN: The default number of hidden units. (int)
+LAMBDA: The default decay of the eligibility traces. (float)
+SAVE_EVERY: The number of games between saves of the network. (int)
+
+Functions:
+benchmark: Play TDBot against PubEvalBot. (int)
+self_play: Play one game against itself, training the network. (int)
+train: Train a network by self-play. (TDNetwork)
+"""
+
+
+from __future__ import print_function
+
+import getopt
+import random
+import sys
+
+from . import backgammon_game as backgammon
+
+
+ALPHA = 0.1
+
+GAMES = 10000
+
+HIDDEN = 40
+
+LAMBDA = 0.7
+
+SAVE_EVERY = 100
+
+
+def benchmark(network, games, seed = None):
+    """
+    Play TDBot against PubEvalBot. (int)
+
+    The return value is the points won by TDBot minus the points won by
+    PubEvalBot. Each bot plays half of the games as X.
+
+    Parameters:
+    network: The network for TDBot. (TDNetwork)
+    games: The number of games to play. (int)
+    seed: The seed for the dice. (int)
+    """
+    random.seed(seed)
+    td_bot = backgammon.TDBot(network)
+    pub_bot = backgammon.PubEvalBot(taken_names = [td_bot.name])
+    game = backgammon.Backgammon(td_bot, 'none')
+    margin = 0
+    for players, rounds in (([td_bot, pub_bot], (games + 1) // 2), ([pub_bot, td_bot], games // 2)):
+        if rounds:
+            results = game.tournament(players, rounds)
+            margin += sum(results['scores'][td_bot.name]) - sum(results['scores'][pub_bot.name])
+    return margin
+
+
+def self_play(network, rng, alpha = ALPHA, trace_decay = LAMBDA, max_turns = backgammon.ROLLOUT_TURNS):
+    """
+    Play one game against itself, training the network. (int)
+
+    The return value is the sign of the winner (1 for X, -1 for O), or 0 if the
+    game was not finished in max_turns.
+
+    Parameters:
+    network: The network to train. (TDNetwork)
+    rng: The random number generator for the dice. (random.Random)
+    alpha: The learning rate. (float)
+    trace_decay: The decay of the eligibility traces (lambda). (float)
+    max_turns: The most turns to play. (int)
+    """
+    position = backgammon.BackgammonPosition(backgammon.BackgammonBoard())
+    bots = {1: backgammon.TDBot(network), -1: backgammon.TDBot(network)}
+    bots[1].piece, bots[-1].piece = 'X', 'O'
+    values, traces = {}, {}
+    mover = rng.choice((1, -1))
+    for turn in range(max_turns):
+        # Roll the dice.
+        high, low = rng.randint(1, 6), rng.randint(1, 6)
+        rolls = [high] * 4 if high == low else [high, low]
+        plays = position.get_plays('X' if mover == 1 else 'O', rolls)
+        if plays:
+            # Make the play the network likes best.
+            bot = bots[mover]
+            vectors = []
+            for play in plays:
+                hits = position.make_play(play, mover)
+                vectors.append(bot.set_vector(bot.get_pub_position(position)))
+                position.unmake_play(play, mover, hits)
+            scores = list(network.evaluate(vectors))
+            best = scores.index(max(scores))
+            position.make_play(plays[best], mover)
+            # Check for the mover winning.
+            if position.off[mover] == 15:
+                for sign, reward in ((mover, 1), (-mover, 0)):
+                    if sign in values:
+                        error = alpha * (reward - values[sign])
+                        network.update([error * trace for trace in traces[sign]])
+                network.games += 1
+                return mover
+            # Learn from the change in the mover's score.
+            value, gradients = network.gradients(vectors[best])
+            if mover in values:
+                error = alpha * (value - values[mover])
+                network.update([error * trace for trace in traces[mover]])
+                traces[mover] = [trace_decay * trace + gradient for trace, gradient in
+                    zip(traces[mover], gradients)]
+            else:
+                traces[mover] = gradients
+            values[mover] = value
+        mover = -mover
+    network.games += 1
+    return 0
+
+
+def train(games = GAMES, hidden = HIDDEN, alpha = ALPHA, trace_decay = LAMBDA, seed = None,
+    path = backgammon.TD_PATH):
+    """
+    Train a network by self-play. (TDNetwork)
+
+    If there is already a network saved at path, training continues from it.
+
+    Parameters:
+    games: The number of self-play games. (int)
+    hidden: The number of hidden units for a new network. (int)
+    alpha: The learning rate. (float)
+    trace_decay: The decay of the eligibility traces (lambda). (float)
+    seed: The seed for the random numbers. (int)
+    path: The location to save the network to. (str)
+    """
+    if backgammon.numpy is None:
+        raise ImportError('Training a TDBot network requires NumPy.')
+    network = backgammon.load_network(path)
+    if network is None:
+        network = backgammon.TDNetwork(hidden, seed = seed)
+    rng = random.Random(seed)
+    for game_index in range(games):
+        self_play(network, rng, alpha, trace_decay)
+        if (game_index + 1) % SAVE_EVERY == 0:
+            network.save(path)
+    network.save(path)
+    return network
+
+
+if __name__ == '__main__':
+    # Train from the command line.
+    opts, args = getopt.getopt(sys.argv[1:], 'a:b:g:l:n:o:s:')
+    settings = {}
+    benchmark_games = 0
+    for option, value in opts:
+        if option == '-a':
+            settings['alpha'] = float(value)
+        elif option == '-b':
+            benchmark_games = int(value)
+        elif option == '-g':
+            settings['games'] = int(value)
+        elif option == '-l':
+            settings['trace_decay'] = float(value)
+        elif option == '-n':
+            settings['hidden'] = int(value)
+        elif option == '-o':
+            settings['path'] = value
+        elif option == '-s':
+            settings['seed'] = int(value)
+    network = train(**settings)
+    print('{!r} saved to {}.'.format(network, settings.get('path', backgammon.TD_PATH)))
+    if benchmark_games:
+        margin = benchmark(network, benchmark_games, settings.get('seed'))
+        print('Points against PubEvalBot in {} games: {:+}.'.format(benchmark_games, margin))
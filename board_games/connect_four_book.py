@@ -0,0 +1,230 @@
+"""
+connect_four_book.py
+
+Building opening books for the Connect Four bots.
+
+A book has the best column to play for every position reachable in the first
+few moves of a game without pop moves. Boards of up to SOLVE_CELLS cells are
+solved outright: each position is searched to the end of the game, so the book
+move is perfect play and the outcome (win, draw, or loss for the player to
+move) is stored with it. Larger boards are searched to a fixed depth by
+C4BotGamma, and the outcome is stored as unknown. The positions are keyed by
+the board's Zobrist hash, and written to a file that C4Book memory maps. From
+the command line (in the folder above t_games):
+
+    python -m t_games.board_games.connect_four_book [-c columns] [-d depth]
+        [-o file] [-p plies] [-r rows]
+
+Copyright (C) 2018 by Craig O'Brien and the t_games contributors.
+See the top level __init__.py file for details on the t_games license.
+
+Constants:
+DEPTH: The default search depth for positions that are not solved. (int)
+PLIES: The default number of moves into the game the book covers. (int)
+SOLVE_CELLS: The most cells on a board that is solved outright. (int)
+
+Functions:
+book_move: Get the best column and outcome code for a position. (tuple of int)
+build_book: Search the opening positions and write them to a book. (C4Book)
+column_order: Get the columns of a board from the center out. (list of int)
+solve: Get the outcome of a position with perfect play. (int)
+"""
+
+
+from __future__ import print_function
+
+import getopt
+import os
+import struct
+import sys
+
+from . import connect_four_game as connect_four
+
+
+DEPTH = 8
+
+PLIES = 4
+
+SOLVE_CELLS = 30
+
+
+def book_move(board, table, depth = DEPTH):
+    """
+    Get the best column and outcome code for a position. (tuple of int)
+
+    The outcome codes are the indexes of connect_four.BOOK_OUTCOMES.
+
+    Parameters:
+    board: The position to find a move for. (C4Board)
+    table: The known bounds on the outcomes of positions. (dict of int: tuple)
+    depth: The search depth if the board is too big to solve. (int)
+    """
+    piece = board.pieces[board.count % 2]
+    columns = column_order(board)
+    # Search the position if it is too big to solve.
+    if board.dimensions[0] * board.dimensions[1] > SOLVE_CELLS:
+        bot = connect_four.C4BotGamma(depth)
+        bot.symbol = piece
+        bot.set_up()
+        move, value = bot.search(board.copy())
+        return move[0], 3
+    # Otherwise find the move with the best outcome.
+    best_column, best = None, -2
+    for column in columns:
+        board.make_move((column, piece))
+        try:
+            if board.open_lines[board.pieces.index(piece)][4]:
+                outcome = 1
+            elif board.count == board.dimensions[0] * board.dimensions[1]:
+                outcome = 0
+            else:
+                outcome = -solve(board, -1, 1, table)
+        finally:
+            board.unmake_move((column, piece))
+        if outcome > best:
+            best_column, best = column, outcome
+            if best == 1:
+                break
+    return best_column, best + 1
+
+
+def build_book(dimensions = (7, 6), plies = PLIES, depth = DEPTH, path = ''):
+    """
+    Search the opening positions and write them to a book. (C4Book)
+
+    Parameters:
+    dimensions: The columns and rows of the board, in cells. (tuple of int)
+    plies: How many moves into the game the book covers. (int)
+    depth: The search depth if the board is too big to solve. (int)
+    path: The file to write the book to, defaults to BOOK_PATH for the size. (str)
+    """
+    # Get the file to write to.
+    dimensions = tuple(dimensions)
+    if not path:
+        path = connect_four.BOOK_PATH.format(*dimensions)
+    folder = os.path.dirname(path)
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder)
+    # Find a move for each position in the first few plies.
+    board = connect_four.C4Board(dimensions, 'XO')
+    records, table = {}, {}
+    positions = [()]
+    for ply in range(plies + 1):
+        next_positions = []
+        for moves in positions:
+            # Set up the position.
+            board.clear()
+            for column in moves:
+                board.make_move((column, board.pieces[board.count % 2]))
+            if board.position_hash in records or board.check_win() != 'game on':
+                continue
+            records[board.position_hash] = book_move(board, table, depth)
+            next_positions.extend(moves + (column,) for column in column_order(board))
+        positions = next_positions
+    # Drop any loaded copy of the old book.
+    if connect_four.BOOKS.get(path):
+        connect_four.BOOKS[path].close()
+    connect_four.BOOKS.pop(path, None)
+    # Write the book.
+    with open(path, 'wb') as book_file:
+        book_file.write(struct.pack(connect_four.BOOK_HEADER, connect_four.BOOK_MAGIC, 1, dimensions[0],
+            dimensions[1], connect_four.ZOBRIST_SEED))
+        for key in sorted(records):
+            book_file.write(struct.pack(connect_four.BOOK_RECORD, key, *records[key]))
+    return connect_four.C4Book(path)
+
+
+def column_order(board):
+    """
+    Get the columns of a board from the center out. (list of int)
+
+    Only columns with room for another piece are included.
+
+    Parameters:
+    board: The board to get the columns of. (C4Board)
+    """
+    columns, rows = board.dimensions
+    playable = [column for column in range(1, columns + 1) if board.heights[column] < rows]
+    return sorted(playable, key = lambda column: abs(2 * column - columns - 1))
+
+
+def solve(board, alpha, beta, table):
+    """
+    Get the outcome of a position with perfect play. (int)
+
+    The outcome is 1 for a win for the player to move, 0 for a draw, and -1 for
+    a loss. It is found by an alpha-beta search to the end of the game, with the
+    bounds found for each position kept in the table, so that later searches can
+    use them. The last player to move must not have won already.
+
+    Parameters:
+    board: The position to solve. (C4Board)
+    alpha: The outcome the player to move is already assured of. (int)
+    beta: The outcome the other player is already assured of. (int)
+    table: The known bounds on the outcomes of positions. (dict of int: tuple)
+    """
+    # Check the known bounds for the position.
+    key = board.position_hash
+    lower, upper = table.get(key, (-1, 1))
+    if lower >= beta or lower == upper:
+        return lower
+    if upper <= alpha:
+        return upper
+    alpha, beta = max(alpha, lower), min(beta, upper)
+    window = (alpha, beta)
+    # Take any immediate win.
+    piece_index = board.count % 2
+    piece = board.pieces[piece_index]
+    columns = column_order(board)
+    for column in columns:
+        board.make_move((column, piece))
+        won = board.open_lines[piece_index][4]
+        board.unmake_move((column, piece))
+        if won:
+            table[key] = (1, 1)
+            return 1
+    # Check for the board filling up.
+    if board.count >= board.dimensions[0] * board.dimensions[1] - 1:
+        table[key] = (0, 0)
+        return 0
+    # Search the moves.
+    best = -1
+    for column in columns:
+        board.make_move((column, piece))
+        try:
+            outcome = -solve(board, -beta, -alpha, table)
+        finally:
+            board.unmake_move((column, piece))
+        if outcome > best:
+            best = outcome
+            alpha = max(alpha, best)
+            if alpha >= beta:
+                break
+    # Store the new bounds for the position.
+    if best <= window[0]:
+        table[key] = (lower, min(upper, best))
+    elif best >= window[1]:
+        table[key] = (max(lower, best), upper)
+    else:
+        table[key] = (best, best)
+    return best
+
+
+if __name__ == '__main__':
+    # Build a book from the command line.
+    opts, args = getopt.getopt(sys.argv[1:], 'c:d:o:p:r:')
+    settings = {}
+    columns, rows = 7, 6
+    for option, value in opts:
+        if option == '-c':
+            columns = int(value)
+        elif option == '-d':
+            settings['depth'] = int(value)
+        elif option == '-o':
+            settings['path'] = value
+        elif option == '-p':
+            settings['plies'] = int(value)
+        elif option == '-r':
+            rows = int(value)
+    book = build_book((columns, rows), **settings)
+    print('{} positions written to {}.'.format(len(book), book.path))
@@ -7,8 +7,18 @@ Copyright (C) 2018 by Craig O'Brien and the t_games contributors.
 See the top level __init__.py file for details on the t_games license.
 
 Constants:
+BOOK_HEADER: The struct format for the header of a book file. (str)
+BOOK_MAGIC: The marker at the start of a book file. (bytes)
+BOOK_OUTCOMES: The outcomes of book positions, by their stored codes. (tuple of str)
+BOOK_PATH: The default location of the book files, by board size. (str)
+BOOK_RECORD: The struct format for the records of a book file. (str)
+BOOK_RECORD_SIZE: The number of bytes in each record of a book file. (int)
+BOOKS: The loaded opening books, by file location. (dict of str: C4Book)
 CREDITS: The design and programming credits for Connect Four. (str)
 RULES: The rules to Connect Four. (str)
+TABLE_SIZE: The default size of the bots' transposition tables. (int)
+WIN_LINES: The lines of four cells for each board size. (dict of tuple: tuple)
+ZOBRIST_SEED: The seed for the position hashing keys. (int)
 
 Classes:
 C4BotAlphaBeta: A Connect Four bot with a tree search and alpha beta
@@ -16,14 +26,22 @@ C4BotAlphaBeta: A Connect Four bot with a tree search and alpha beta
 C4BotGamma: An alpha-beta Connect Four bot with a better eval
     function. (C4BotAlphaBeta)
 C4Board: A board for Connect Four type games. (board.DimBoard)
+C4Book: A memory mapped opening book for Connect Four. (object)
 ConnectFour: A game of connect four. (game.Game)
+
+Functions:
+load_book: Load the opening book for a board size, if there is one. (C4Book or None)
+win_lines: Get the lines of four cells for a board size. (tuple)
 """
 
 
 from __future__ import print_function
 
+import mmap
+import os
 import random
 import string
+import struct
 
 from .. import board
 from .. import game
@@ -31,6 +49,20 @@ from .. import player
 from .. import utility
 
 
+BOOK_HEADER = '<4sBBBQ'
+
+BOOK_MAGIC = b'TGC4'
+
+BOOK_OUTCOMES = ('loss', 'draw', 'win', 'unknown')
+
+BOOK_PATH = os.path.join(utility.LOC, 'connect_four_{}x{}.book')
+
+BOOK_RECORD = '<QBB'
+
+BOOK_RECORD_SIZE = struct.calcsize(BOOK_RECORD)
+
+BOOKS = {}
+
 CREDITS = """
 Game Design: Ned Strongin and Howard Wexler
 Game Programming: Craig "Ichabod" O'Brien
@@ -47,45 +79,63 @@ are filled, the game is a draw.
 
 Options:
 bot-level= (b=): How good the computer opponent is. Can be easy (e),
-    medium (m), or hard (h). The default is medium.
+    medium (m), or hard (h). The default is medium. The easy bot thinks for a
+    quarter of a second, and the medium and hard bots think for one second.
+    The hard bot splits its search over all of the computer's processors.
 columns (c): How many columns the board should have (4-35, default 7).
 pop (p): Allow pop moves, where you remove a piece of yours that is at the
     bottom of a column.
 rows: (r): How many rows the board should have (4-20, default 6).
 """
 
+TABLE_SIZE = 2 ** 16
+
+WIN_LINES = {}
+
+ZOBRIST_SEED = 1974
+
 
 class C4BotAlphaBeta(player.AlphaBetaBot):
     """
     A Connect Four bot with a tree search and alpha beta pruning. (player.Bot)
 
+    If there is an opening book for the size of the board, positions in the book
+    are played from it without a search, unless pop moves are allowed.
+
+    Class Attributes:
+    line_values: The values of open lines by the pieces in them. (dict of int: int)
+
     Attributes:
-    board_strength: A strength rating for each cell on the board. (list of list)
     symbol: The symbol representing the bot in the game. (str)
 
     Methods:
     eval_player: Evaluate one player's position. (int)
-    find_shorts: Find all two or three pieces in a row. (tuple of list of tuple)
 
     Overridden Methods:
     __init__
     ask
     ask_int
     eval_board
-    set_up
     """
 
-    def __init__(self, depth = 6, fudge = 1, taken_names = [], initial = ''):
+    line_values = {2: 10, 3: 100}
+
+    def __init__(self, depth = 6, fudge = 1, taken_names = [], initial = '', table_size = TABLE_SIZE,
+        time_limit = 0, processes = 1):
         """
         Set up the bot. (None)
 
         Parameters:
-        depth: The depth of the search. (int)
+        depth: The depth of the search, or the most depth with a time limit. (int)
         fudge: A fudge factor to avoid early capitulation. (int or float)
         taken_names: Names already used by a player. (list of str)
         initial: The first letter of the bot's name. (str)
+        table_size: The number of entries in the transposition table. (int)
+        time_limit: The seconds to search for each move, or 0 for no limit. (float)
+        processes: The number of processes to search with, None for one per cpu. (int)
         """
-        super(C4BotAlphaBeta, self).__init__(depth, fudge, taken_names, initial)
+        super(C4BotAlphaBeta, self).__init__(depth, fudge, taken_names, initial, table_size, time_limit,
+            processes)
 
     def ask(self, prompt):
         """
@@ -113,8 +163,16 @@ class C4BotAlphaBeta(player.AlphaBetaBot):
         low: The lowest valid input. (int)
         high: The highest valid input. (int)
         """
-        clone = self.game.board.copy()
-        results = self.alpha_beta(clone, self.depth, -utility.MAX_INT, utility.MAX_INT, True)
+        # Play from the opening book if the position is in it.
+        board = self.game.board
+        if not board.poppable:
+            book = load_book(board.dimensions)
+            entry = book.lookup(board.position_hash) if book else None
+            if entry and board.heights[entry[0]] < board.dimensions[1]:
+                return entry[0]
+        # Otherwise search for the best move.
+        clone = board.copy()
+        results = self.search(clone)
         return results[0][0]
 
     def eval_board(self, board):
@@ -122,6 +180,8 @@ class C4BotAlphaBeta(player.AlphaBetaBot):
         Evaluate the board. (int)
 
         This is just the specified player's evaluation minus the other player's.
+        It only uses the board and the bot's symbol, so that the search can be run
+        in other processes.
 
         Parameters:
         board: The board to evaluate. (Connect4Board)
@@ -129,7 +189,7 @@ class C4BotAlphaBeta(player.AlphaBetaBot):
         status = board.check_win()
         # Get the standard board evaluation during play.
         if status == 'game on':
-            index = self.game.players.index(self)
+            index = board.pieces.index(self.symbol)
             result = self.eval_player(board, index) - self.eval_player(board, 1 - index)
         # Otherwise get the end of game evaluation based on the result.
         elif status == 'draw':
@@ -144,144 +204,62 @@ class C4BotAlphaBeta(player.AlphaBetaBot):
         """
         Evaluate one player's position. (int)
 
-        The value of the board is the board value of all the pieces, plus 10
-        for each two-in-a-row and 100 for each three-in-a-row. A win is worth
-        10,000, and a draw is worth 0.
+        The value of the board is the number of lines of four through each of the
+        player's pieces, plus 10 for each open line with two of their pieces and
+        100 for each open line with three of their pieces. An open line has none
+        of the other player's pieces. A win is worth 10,000, and a draw is worth 0.
 
         Parameters:
         board: The game board. (C4Board)
         player_index: The index (turn order) of the player to evaluate. (int)
         """
-        # get the player's piece symbol
-        piece = self.game.symbols[player_index]
-        # check board value of pieces
-        locations = [location for location, cell in board.cells.items() if cell.contents == piece]
-        score = 0
-        for column, row in locations:
-            score += self.board_strength[column][row]
-        # check for n-in-a-rows.
-        twos, threes = self.find_shorts(locations)
-        score += 10 * len(twos)
-        score += 100 * len(threes)
+        open_lines = board.open_lines[player_index]
+        score = board.strengths[player_index]
+        for pieces, value in self.line_values.items():
+            score += open_lines[pieces] * value
         return score
 
-    def find_shorts(self, locations):
-        """
-        Find all two or three pieces in a row. (tuple of list of tuple)
-
-        Parameters:
-        locations: The locations of one player's pieces. (list of tuple)
-        """
-        twos, threes = [], []
-        # loop through cells, checking forward and backward
-        for coordinate in locations:
-            for offset in ((0, 1), (1, 1), (1, 0), (1, -1)):
-                forward = coordinate + offset
-                backward = coordinate - offset
-                # check for threes
-                if forward in locations and backward in locations:
-                    threes.append((backward, coordinate, forward))
-                # check for twos, only forward to avoid doubles
-                elif forward in locations:
-                    twos.append((coordinate, forward))
-        return twos, threes
-
-    def set_up(self):
-        """Set up the bot for play. (None)"""
-        # Get the value of the first row of cells.
-        base = list(range(3, 3 + self.game.columns // 2))
-        if self.game.columns % 2:
-            base = base + [base[-1] + 2] + base[::-1]
-        else:
-            base[-1] += 1
-            base = base + base[::-1]
-        base = [0] + base
-        # Get the increase in value as rows get closer to the middle.
-        mod = [3] * len(base)
-        mod[:3] = [0, 1, 2]
-        mod[-2:] = [2, 1]
-        # Build up the values for the whole board.
-        board_strength = [base]
-        while len(board_strength) <= self.game.rows / 2:
-            board_strength.append([a + b for a, b in zip(board_strength[-1], mod)])
-        if not self.game.rows % 2:
-            board_strength.append(board_strength[-1])
-        while len(board_strength) <= self.game.rows:
-            board_strength.append([a - b for a, b in zip(board_strength[-1], mod)])
-        # Rotate the values and add a blank column (there not being a 0 play).
-        self.board_strength = list(zip(*board_strength))
-        self.board_strength = [[]] + self.board_strength
-
 
 class C4BotGamma(C4BotAlphaBeta):
     """
     An alpha-beta Connect Four bot with a better eval function. (C4BotAlphaBeta)
 
-    Eval based on two-way twos, one-way threes, and two-way threes; with modifications for those that are
-    currently playable and eventually playable.
+    Eval based on open lines of two and three pieces, with a bonus for threes that
+    can be completed on the next move.
 
     Class Attributes:
-    bin_values: The relative values of different lines of pieces. (dict)
-
-    Methods:
-    bin_shorts: Categorize n-in-a-rows by blockage. (dict of str: int)
+    line_values: The values of open lines by the pieces in them. (dict of int: int)
+    threat_value: The bonus for an open three that can be completed now. (int)
 
     Overridden Methods:
     eval_player
     """
 
-    bin_values = {'2-0': 50, '2-1': 25, '2-2': 0, '3-0': 200, '3-1': 100, '3-2': 0}
-
-    def bin_shorts(self, locations):
-        """
-        Categorize n-in-a-rows by blockage. (dict of str: int)
-
-        The keys of the return value are length of chain dash ends blocked.
-
-        Parameters:
-        locations: The locations of one player's pieces. (list of tuple)
-        """
-        # Get the short sequences of pieces.
-        raw_twos, raw_threes = self.find_shorts(locations)
-        # Count the short sequences.
-        bins = {'2-0': 0, '2-1': 0, '2-2': 0, '3-0': 0, '3-1': 0, '3-2': 0}
-        for chain in raw_twos + raw_threes:
-            # Find the spots beyond the short sequences.
-            offset = chain[1] - chain[0]
-            forward = chain[-1] + offset
-            backward = chain[0] - offset
-            # Use those to determine blocks.
-            blocks = 0
-            if forward not in self.game.board.cells or self.game.board.cells[forward].contents:
-                blocks += 1
-            if backward not in self.game.board.cells or self.game.board.cells[backward].contents:
-                blocks += 1
-            # Update the count for that situation.
-            bins['{}-{}'.format(len(chain), blocks)] += 1
-        return bins
+    line_values = {2: 25, 3: 100}
+    threat_value = 100
 
     def eval_player(self, board, player_index):
         """
         Evaluate one player's position. (int)
 
-        The value of the board is based on piece location and two or threes in  a row,
-        considering how blocked they are.
+        The value of the board is based on the open lines through the player's
+        pieces, with a bonus for each open three that could be completed by the
+        next piece played in that column.
 
         Parameters:
         board: The game board. (C4Board)
         player_index: The index (turn order) of the player to evaluate. (int)
         """
-        # get the player's piece symbol.
-        piece = self.game.symbols[player_index]
-        # Check board value of pieces.
-        locations = [location for location, cell in board.cells.items() if cell.contents == piece]
-        score = 0
-        for column, row in locations:
-            score += self.board_strength[column][row]
-        # Check for n-in-a-rows.
-        bins = self.bin_shorts(locations)
-        for bin in bins:
-            score += bins[bin] * self.bin_values[bin]
+        score = super(C4BotGamma, self).eval_player(board, player_index)
+        # Check for threats that can be completed now.
+        mask = board.masks[player_index]
+        for line_index in board.threats[player_index]:
+            for bit_index in board.lines[line_index]:
+                if not mask >> bit_index & 1:
+                    column, row = divmod(bit_index, board.stride)
+                    if board.heights[column + 1] == row:
+                        score += self.threat_value
+                    break
         return score
 
 
@@ -289,66 +267,101 @@ class C4Board(board.DimBoard):
     """
     A board for Connect Four type games. (board.DimBoard)
 
+    The pieces are stored as bitboards, one integer mask for each player. Each
+    column takes rows + 1 bits, from the bottom up, with the extra bit always
+    empty so that shifting a mask never carries pieces from one column into the
+    next. Four in a row can be found by shifting a mask against itself in each
+    direction. The cells for display and evaluation are only built from the masks
+    when they are asked for. The board also keeps a Zobrist hash of the position,
+    updated with each move, for the bots' transposition tables.
+
+    For evaluation, the board keeps count of each player's pieces in every line
+    of four cells, using the lines through each cell from win_lines. An open line
+    is one with none of the other player's pieces in it. A player with an open
+    line of four pieces has won, so checking for a win only needs those counts.
+
     Attributes:
+    cell_lines: The indexes of the lines through each bit. (list of tuple of int)
+    count: The number of pieces on the board. (int)
+    heights: The number of pieces in each column, with a dummy 0th column. (list of int)
+    line_counts: Each player's number of pieces in each line. (list of list of int)
+    lines: The bits in each line of four cells. (list of tuple of int)
+    masks: The bitboards for each of the pieces, in turn order. (list of int)
+    open_lines: Each player's number of open lines by pieces in them. (list of list of int)
     pieces: The pieces to be played. (str)
     poppable: A flag for being able to pop pieces. (bool)
     pops: How many pieces have been popped. (int)
-    wins: Winning four in a row combinations. (list of set of tuple)
+    position_hash: A Zobrist hash of the pieces on the board. (int)
+    shifts: The bit shifts for each direction of four in a row. (tuple of int)
+    strengths: Each player's total number of lines through their pieces. (list of int)
+    stride: The number of bits for each column. (int)
+    threats: Each player's open lines with three of their pieces. (list of set of int)
+    zobrist_keys: The hash keys for each player's pieces, by bit. (list of list of int)
 
     Methods:
     check_win: See if the game has been won. (str)
+    clear_bit: Remove a piece from the bitboards. (None)
+    clear_lines: Reset the line counts for an empty board. (None)
     column_height: Get the number of pieces in a column. (int)
+    connected: Check a bitboard for four in a row. (bool)
     last_piece: Get the last piece played. (str)
     make_move: Make a valid move. (None)
+    piece_locations: Get the locations of one player's pieces. (list of Coordinate)
     pop: Remove the bottom piece of a column. (None)
+    rehash: Calculate the position hash from scratch. (int)
+    reverse_column: Reverse the order of the pieces in a column. (None)
+    set_bit: Add a piece to the bitboards. (None)
+    shift_column: Move all of the pieces in a column up or down. (None)
+    unmake_move: Take back a move. (None)
 
     Overridden Methods:
     __init__
     __repr__
     __str__
+    clear
     copy
     get_moves
+    place
     """
 
-    def __init__(self, dimensions = (7, 6), pieces = [], wins = [], poppable = False):
+    def __init__(self, dimensions = (7, 6), pieces = [], poppable = False, zobrist_keys = []):
         """
-        Set up the board and the winning positions. (None)
+        Set up the board and the bitboards. (None)
 
         Parameters:
         dimensions: The columns and rows of the board, in cells. (tuple of int)
         pieces: The symbols for player pieces. (list of str)
-        wins: The winning four in a row combinations (list of set of tuple)
         poppable: A flag for being able to pop pieces. (bool)
+        zobrist_keys: The hash keys for each player's pieces. (list of list of int)
         """
-        # Do the basic board set up.
-        super(C4Board, self).__init__(dimensions)
+        # Store the definition, leaving the cells until they are needed.
+        self.dimensions = dimensions
+        self.cell_class = board.BoardCell
+        self.locations, self.location_index, self.offset_tables = board.dim_layout(dimensions)
+        self.extra_cells = []
+        self._cells = None
+        self._cell_list = None
         # Set the specified attributes.
         self.pieces = pieces
         self.poppable = poppable
         # Set the default attribute.
         self.pops = 0
-        # set up winning positions
-        self.wins = wins
-        if not self.wins:
-            # Loop through all the spaces.
-            for col in range(1, dimensions[0] + 1):
-                for row in range(1, dimensions[1] + 1):
-                    # Record any win to the right.
-                    if col < dimensions[0] - 2:
-                        win = ((col, row), (col + 1, row), (col + 2, row), (col + 3, row))
-                        self.wins.append(set([board.Coordinate(xy) for xy in win]))
-                    if row < dimensions[0] - 2:
-                        # Record any win up.
-                        win = ((col, row), (col, row + 1), (col, row + 2), (col, row + 3))
-                        self.wins.append(set(set([board.Coordinate(xy) for xy in win])))
-                        if col < dimensions[0] - 2:
-                            # Record any win up to the right.
-                            win = ((col, row), (col + 1, row + 1), (col + 2, row + 2), (col + 3, row + 3))
-                            self.wins.append(set([board.Coordinate(xy) for xy in win]))
-                        if col > 3:
-                            # Record any win up to the left.
-                            win = ((col, row), (col - 1, row + 1), (col - 2, row + 2), (col - 3, row + 3))
-                            self.wins.append(set([board.Coordinate(xy) for xy in win]))
+        # Set up the bitboards.
+        self.stride = dimensions[1] + 1
+        self.shifts = (1, self.stride - 1, self.stride, self.stride + 1)
+        self.masks = [0, 0]
+        self.heights = [0] * (dimensions[0] + 1)
+        self.count = 0
+        # Set up the position hash.
+        self.zobrist_keys = zobrist_keys
+        if not self.zobrist_keys:
+            rng = random.Random(ZOBRIST_SEED)
+            bits = dimensions[0] * self.stride
+            self.zobrist_keys = [[rng.getrandbits(64) for bit in range(bits)] for piece in range(2)]
+        self.position_hash = 0
+        # Set up the line counts.
+        self.lines, self.cell_lines = win_lines(dimensions)
+        self.clear_lines()
 
     def __repr__(self):
         """Generate a debugging text representation."""
@@ -375,20 +388,45 @@ class C4Board(board.DimBoard):
             text += row_text + '|\n'
         return text + head_foot.rstrip()
 
-    def check_win(self):
-        """See if the game has been won. (str)"""
-        # Get the locations with each player's pieces
-        winners = []
-        for piece in self.pieces:
-            played = set([cell.location for cell in self.cells.values() if cell.contents == piece])
-            # check against the winning positions
-            for win in self.wins:
-                if win <= played:
-                    winners.append(piece)
-                    break
+    @property
+    def cell_list(self):
+        """The cells of the board, in the order of the locations. (list of BoardCell)"""
+        # Build the cells from the bitboards if needed.
+        if self._cells is None:
+            self.cells
+        return self._cell_list
+
+    @property
+    def cells(self):
+        """The cells of the board, built from the bitboards. (dict of Coordinate: BoardCell)"""
+        if self._cells is None:
+            self._cell_list = [board.BoardCell(location) for location in self.locations]
+            self._cells = dict(zip(self.locations, self._cell_list))
+            for piece, mask in zip(self.pieces, self.masks):
+                for location in self.piece_locations(piece):
+                    self._cells[location].contents = piece
+        return self._cells
+
+    def check_win(self, full = False):
+        """
+        See if the game has been won. (str)
+
+        A player has won if they have an open line with four pieces in it. Those
+        counts are kept up to date by checking the lines through each piece as it
+        is placed or removed, so the check does not depend on the size of the
+        board. The full check looks for four in a row on the bitboards, and is for
+        validating the line counts.
+
+        Parameters:
+        full: A flag for checking the bitboards instead of the line counts. (bool)
+        """
+        # Check each player for four in a row.
+        if full:
+            winners = [piece for piece, mask in zip(self.pieces, self.masks) if self.connected(mask)]
+        else:
+            winners = [piece for piece, open_lines in zip(self.pieces, self.open_lines) if open_lines[4]]
         # Check for a draw.
-        full = [cell for cell in self.cells.values() if cell.contents]
-        filled = len(full) == self.dimensions[0] * self.dimensions[1]
+        filled = self.count == self.dimensions[0] * self.dimensions[1]
         if filled or len(winners) == 2:
             result = 'draw'
         # Check for a win.
@@ -399,6 +437,59 @@ class C4Board(board.DimBoard):
             result = 'game on'
         return result
 
+    def clear(self):
+        """Clear all pieces off the board. (None)"""
+        self.masks = [0, 0]
+        self.heights = [0] * (self.dimensions[0] + 1)
+        self.count = 0
+        self.position_hash = 0
+        self.clear_lines()
+        self._cells = None
+
+    def clear_bit(self, piece_index, bit_index):
+        """
+        Remove a piece from the bitboards. (None)
+
+        This updates the masks, the count, the position hash, and the line counts,
+        but not the column heights or the cells.
+
+        Parameters:
+        piece_index: The index of the piece being removed. (int)
+        bit_index: The bit the piece is being removed from. (int)
+        """
+        self.masks[piece_index] ^= 1 << bit_index
+        self.count -= 1
+        self.position_hash ^= self.zobrist_keys[piece_index][bit_index]
+        # Update the lines through the bit.
+        other_index = 1 - piece_index
+        mine, theirs = self.line_counts[piece_index], self.line_counts[other_index]
+        open_mine, open_theirs = self.open_lines[piece_index], self.open_lines[other_index]
+        line_indexes = self.cell_lines[bit_index]
+        for line_index in line_indexes:
+            pieces, others = mine[line_index], theirs[line_index]
+            mine[line_index] = pieces - 1
+            if not others:
+                # The line is still open, with one less piece.
+                open_mine[pieces] -= 1
+                open_mine[pieces - 1] += 1
+                if pieces == 3:
+                    self.threats[piece_index].discard(line_index)
+                elif pieces == 4:
+                    self.threats[piece_index].add(line_index)
+            if pieces == 1:
+                # The line opens up for the other player.
+                open_theirs[others] += 1
+                if others == 3:
+                    self.threats[other_index].add(line_index)
+        self.strengths[piece_index] -= len(line_indexes)
+
+    def clear_lines(self):
+        """Reset the line counts for an empty board. (None)"""
+        self.line_counts = [[0] * len(self.lines), [0] * len(self.lines)]
+        self.open_lines = [[len(self.lines), 0, 0, 0, 0], [len(self.lines), 0, 0, 0, 0]]
+        self.strengths = [0, 0]
+        self.threats = [set(), set()]
+
     def column_height(self, column):
         """
         Get the number of pieces in a column. (int)
@@ -406,16 +497,33 @@ class C4Board(board.DimBoard):
         Parameters:
         column: The column to check. (int)
         """
-        # Check rows until you get an empty cell.
-        for row in range(1, self.dimensions[1] + 1):
-            if not self.cells[(column, row)].contents:
-                break
-        return row - 1
+        return self.heights[column]
+
+    def connected(self, mask):
+        """
+        Check a bitboard for four in a row. (bool)
+
+        Parameters:
+        mask: The bitboard for one player's pieces. (int)
+        """
+        for shift in self.shifts:
+            pairs = mask & (mask >> shift)
+            if pairs & (pairs >> (2 * shift)):
+                return True
+        return False
 
     def copy(self):
         """Create a copy of the board for AI searches. (Connect4Board)"""
-        clone = C4Board(self.dimensions, pieces = self.pieces, wins = self.wins, poppable = self.poppable)
-        clone.copy_pieces(self)
+        clone = C4Board(self.dimensions, self.pieces, self.poppable, self.zobrist_keys)
+        clone.masks = self.masks[:]
+        clone.heights = self.heights[:]
+        clone.count = self.count
+        clone.pops = self.pops
+        clone.position_hash = self.position_hash
+        clone.line_counts = [counts[:] for counts in self.line_counts]
+        clone.open_lines = [counts[:] for counts in self.open_lines]
+        clone.strengths = self.strengths[:]
+        clone.threats = [threats.copy() for threats in self.threats]
         return clone
 
     def get_moves(self):
@@ -423,27 +531,23 @@ class C4Board(board.DimBoard):
         Get all legal moves from the current position. (list of (int, string))
         """
         # get the current piece
-        pieces_played = len([cell for cell in self.cells.values() if cell.contents])
-        current_piece = self.pieces[pieces_played % 2]
+        current_index = self.count % 2
+        current_piece = self.pieces[current_index]
         # get the open columns
-        columns = []
-        for column in range(1, self.dimensions[0] + 1):
-            if not self.cells[(column, self.dimensions[1])]:
-                columns.append(column)
+        rows = self.dimensions[1]
+        columns = [column for column in range(1, self.dimensions[0] + 1) if self.heights[column] < rows]
         # add the poppable columns, if popping is allowed.
         if self.poppable:
-            valid_pops = []
+            mask = self.masks[current_index]
             for column in range(1, self.dimensions[0] + 1):
-                if self.cells[(column, 1)].contents == current_piece:
-                    valid_pops.append(-column)
-            columns.extend(valid_pops)
+                if mask >> ((column - 1) * self.stride) & 1:
+                    columns.append(-column)
         # return the columns with the current piece.
         return [(column, current_piece) for column in columns]
 
     def last_piece(self):
         """Get the last piece played. (str)"""
-        pieces_played = len([cell for cell in self.cells.values() if cell.contents])
-        return self.pieces[1 - pieces_played % 2]
+        return self.pieces[1 - self.count % 2]
 
     def make_move(self, move):
         """
@@ -459,12 +563,63 @@ class C4Board(board.DimBoard):
             self.pop(column, piece)
         else:
             # Check the validity of the move.
-            height = self.column_height(column)
-            if height <= self.dimensions[1]:
-                self.place((column, height + 1), piece)
+            height = self.heights[column]
+            if height < self.dimensions[1]:
+                self.set_bit(self.pieces.index(piece), (column - 1) * self.stride + height)
+                self.heights[column] = height + 1
+                if self._cells is not None:
+                    self._cells[(column, height + 1)].contents = piece
             else:
                 raise ValueError('Invalid move: column {} is full'.format(column))
 
+    def piece_locations(self, piece):
+        """
+        Get the locations of one player's pieces. (list of Coordinate)
+
+        Parameters:
+        piece: The piece to find the locations of. (str)
+        """
+        mask = self.masks[self.pieces.index(piece)]
+        locations = []
+        while mask:
+            bit = mask & -mask
+            column, row = divmod(bit.bit_length() - 1, self.stride)
+            locations.append(board.Coordinate((column + 1, row + 1)))
+            mask ^= bit
+        return locations
+
+    def place(self, cell, piece):
+        """
+        Place a piece in a cell. (None)
+
+        Pieces may be placed anywhere, even with empty cells below them. The
+        height of a column is the number of pieces from the bottom up to the first
+        empty cell.
+
+        Paramters:
+        piece: The piece to place on the board, or None to empty it. (str)
+        cell: The location to place the piece in. (Coordinate)
+        """
+        column, row = cell
+        bit_index = (column - 1) * self.stride + row - 1
+        # Remove anything already there.
+        for index, mask in enumerate(self.masks):
+            if mask >> bit_index & 1:
+                self.clear_bit(index, bit_index)
+        # Add the piece.
+        if piece is not None:
+            self.set_bit(self.pieces.index(piece), bit_index)
+        # Update the column height.
+        occupied = (self.masks[0] | self.masks[1]) >> ((column - 1) * self.stride)
+        height = 0
+        while occupied & 1:
+            height += 1
+            occupied >>= 1
+        self.heights[column] = height
+        # Update any cells.
+        if self._cells is not None:
+            self._cells[(column, row)].contents = piece
+
     def pop(self, column, piece):
         """
         Remove the bottom piece of a column. (None)
@@ -475,18 +630,227 @@ class C4Board(board.DimBoard):
         """
         # Convert the column.
         column = abs(column)
+        piece_index = self.pieces.index(piece)
+        bit_index = (column - 1) * self.stride
         # Check for a valid move.
-        if self.cells[(column, 1)].contents == piece:
+        if self.masks[piece_index] >> bit_index & 1:
             # Move the pieces down.
-            for row in range(2, self.dimensions[1] + 1):
-                self.cells[(column, row - 1)].contents = self.cells[(column, row)].contents
-            self.cells[(column, self.dimensions[1])].contents = None
+            self.clear_bit(piece_index, bit_index)
+            self.shift_column(column, -1)
+            self.heights[column] -= 1
+            self._cells = None
             # Record the pop.
             self.pops += 1
         else:
             # Warn on invalid pops.
             raise ValueError('Invalid pop: column {} does not start with {!r}.'.format(column, piece))
 
+    def rehash(self):
+        """
+        Calculate the position hash from scratch. (int)
+
+        This is for checking the incremental updates of the hash.
+        """
+        self.position_hash = 0
+        for keys, mask in zip(self.zobrist_keys, self.masks):
+            bit_index = 0
+            while mask:
+                if mask & 1:
+                    self.position_hash ^= keys[bit_index]
+                mask >>= 1
+                bit_index += 1
+        return self.position_hash
+
+    def reverse_column(self, column):
+        """
+        Reverse the order of the pieces in a column. (None)
+
+        Parameters:
+        column: The column to reverse. (int)
+        """
+        pieces = [self.cells[(column, row)].contents for row in range(1, self.dimensions[1] + 1)]
+        pieces = [piece for piece in pieces if piece is not None][::-1]
+        pieces += [None] * (self.dimensions[1] - len(pieces))
+        for row, piece in enumerate(pieces, start = 1):
+            self.place((column, row), piece)
+
+    def set_bit(self, piece_index, bit_index):
+        """
+        Add a piece to the bitboards. (None)
+
+        This updates the masks, the count, the position hash, and the line counts,
+        but not the column heights or the cells.
+
+        Parameters:
+        piece_index: The index of the piece being added. (int)
+        bit_index: The bit the piece is being added to. (int)
+        """
+        self.masks[piece_index] |= 1 << bit_index
+        self.count += 1
+        self.position_hash ^= self.zobrist_keys[piece_index][bit_index]
+        # Update the lines through the bit.
+        other_index = 1 - piece_index
+        mine, theirs = self.line_counts[piece_index], self.line_counts[other_index]
+        open_mine, open_theirs = self.open_lines[piece_index], self.open_lines[other_index]
+        line_indexes = self.cell_lines[bit_index]
+        for line_index in line_indexes:
+            pieces, others = mine[line_index], theirs[line_index]
+            mine[line_index] = pieces + 1
+            if not others:
+                # The line is still open, with one more piece.
+                open_mine[pieces] -= 1
+                open_mine[pieces + 1] += 1
+                if pieces == 2:
+                    self.threats[piece_index].add(line_index)
+                elif pieces == 3:
+                    self.threats[piece_index].discard(line_index)
+            if not pieces:
+                # The line is closed to the other player.
+                open_theirs[others] -= 1
+                if others == 3:
+                    self.threats[other_index].discard(line_index)
+        self.strengths[piece_index] += len(line_indexes)
+
+    def shift_column(self, column, offset):
+        """
+        Move all of the pieces in a column up or down. (None)
+
+        This does not update the column height.
+
+        Parameters:
+        column: The column to shift. (int)
+        offset: How many rows to move the pieces up (or down if negative). (int)
+        """
+        shift = (column - 1) * self.stride
+        moving = [(piece_index, bit_index) for bit_index in range(shift, shift + self.dimensions[1])
+            for piece_index, mask in enumerate(self.masks) if mask >> bit_index & 1]
+        for piece_index, bit_index in moving:
+            self.clear_bit(piece_index, bit_index)
+        for piece_index, bit_index in moving:
+            self.set_bit(piece_index, bit_index + offset)
+
+    def unmake_move(self, move):
+        """
+        Take back a move. (None)
+
+        This lets a search make and take back moves on one board instead of
+        copying the board for each move.
+
+        Parameters:
+        move: The column and piece of the last move made. (tuple of int, string)
+        """
+        column, piece = move
+        piece_index = self.pieces.index(piece)
+        if column < 0 and self.poppable:
+            # Move the pieces back up and put the popped piece back.
+            column = abs(column)
+            self.shift_column(column, 1)
+            self.set_bit(piece_index, (column - 1) * self.stride)
+            self.heights[column] += 1
+            self.pops -= 1
+            self._cells = None
+        else:
+            # Remove the top piece of the column.
+            height = self.heights[column]
+            bit_index = (column - 1) * self.stride + height - 1
+            if not height or not self.masks[piece_index] >> bit_index & 1:
+                raise ValueError('Invalid unmake: column {} does not end with {!r}.'.format(column, piece))
+            self.clear_bit(piece_index, bit_index)
+            self.heights[column] = height - 1
+            if self._cells is not None:
+                self._cells[(column, height)].contents = None
+
+
+class C4Book(object):
+    """
+    A memory mapped opening book for Connect Four. (object)
+
+    The book is a header followed by fixed length records sorted by position
+    hash, so a position is found by a binary search of the memory mapped file
+    without reading the whole book. Each record has the best column to drop a
+    piece in and the outcome of the position for the player to move, if the
+    position was solved. Books are built offline by connect_four_book, one for
+    each board size, and only cover games without pop moves.
+
+    Attributes:
+    count: The number of positions in the book. (int)
+    data: The memory mapped book file. (mmap.mmap)
+    dimensions: The columns and rows of the board, in cells. (tuple of int)
+    path: The location of the book file. (str)
+
+    Methods:
+    close: Close the book file. (None)
+    lookup: Get the best column and outcome for a position. (tuple)
+
+    Overridden Methods:
+    __init__
+    __contains__
+    __len__
+    __repr__
+    """
+
+    def __init__(self, path):
+        """
+        Load the book. (None)
+
+        Parameters:
+        path: The location of the book file. (str)
+        """
+        self.path = path
+        with open(path, 'rb') as book_file:
+            self.data = mmap.mmap(book_file.fileno(), 0, access = mmap.ACCESS_READ)
+        magic, version, columns, rows, seed = struct.unpack_from(BOOK_HEADER, self.data)
+        if magic != BOOK_MAGIC or version != 1 or seed != ZOBRIST_SEED:
+            self.data.close()
+            raise ValueError('{!r} is not a Connect Four book.'.format(path))
+        self.dimensions = (columns, rows)
+        self.count = (len(self.data) - struct.calcsize(BOOK_HEADER)) // BOOK_RECORD_SIZE
+
+    def __contains__(self, position_hash):
+        """
+        Check for a position being in the book. (bool)
+
+        Parameters:
+        position_hash: The Zobrist hash of the position. (int)
+        """
+        return self.lookup(position_hash) is not None
+
+    def __len__(self):
+        """The number of positions in the book. (int)"""
+        return self.count
+
+    def __repr__(self):
+        """Create a debugging text representation. (str)"""
+        return '<C4Book of {} positions for a {}x{} board>'.format(self.count, *self.dimensions)
+
+    def close(self):
+        """Close the book file. (None)"""
+        self.data.close()
+
+    def lookup(self, position_hash):
+        """
+        Get the best column and outcome for a position. (tuple)
+
+        The outcome is one of BOOK_OUTCOMES, for the player to move. If the
+        position is not in the book, None is returned.
+
+        Parameters:
+        position_hash: The Zobrist hash of the position. (int)
+        """
+        start = struct.calcsize(BOOK_HEADER)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            offset = start + middle * BOOK_RECORD_SIZE
+            key, column, outcome = struct.unpack_from(BOOK_RECORD, self.data, offset)
+            if key == position_hash:
+                return column, BOOK_OUTCOMES[outcome]
+            elif key < position_hash:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
 
 class ConnectFour(game.Game):
     """
@@ -549,16 +913,8 @@ class ConnectFour(game.Game):
                 # Get the column to reverse.
                 query = 'Which column would you like to reverse? '
                 col = self.human.ask_int(query, low = 1, high = self.board.dimensions[0])
-                # Get the cell contents in reverse.
-                pieces = []
-                for row in range(self.board.dimensions[1], 0, -1):
-                    pieces.append(self.board.cells[(col, row)].contents)
-                # Put any non-empty cells back on the board.
-                row = 1
-                for piece in pieces:
-                    if piece is not None:
-                        self.board.cells[(col, row)].contents = piece
-                        row += 1
+                # Reverse the pieces in the column.
+                self.board.reverse_column(col)
                 return False
         # Handle invalid edge.
         else:
@@ -589,13 +945,14 @@ class ConnectFour(game.Game):
     def handle_options(self):
         """Determine and handle the options for the game. (None)"""
         super(ConnectFour, self).handle_options()
-        # Set the bot.
+        # Set the bot, with the level setting how long it thinks.
+        cells = self.columns * self.rows
         if self.bot_level.startswith('e'):
-            self.bot = C4BotAlphaBeta(taken_names = [self.human.name])
+            self.bot = C4BotAlphaBeta(cells, taken_names = [self.human.name], time_limit = 0.25)
         elif self.bot_level.startswith('m'):
-            self.bot = C4BotGamma(taken_names = [self.human.name])
+            self.bot = C4BotGamma(cells, taken_names = [self.human.name], time_limit = 1)
         else:
-            self.bot = C4BotGamma(depth = 8, taken_names = [self.human.name])
+            self.bot = C4BotGamma(cells, taken_names = [self.human.name], time_limit = 1, processes = None)
         self.players = [self.human, self.bot]
         self.symbols = []
 
@@ -664,3 +1021,63 @@ class ConnectFour(game.Game):
         # reset the bot
         self.bot.set_up()
         self.bot_random = False
+
+
+def load_book(dimensions, path = ''):
+    """
+    Load the opening book for a board size, if there is one. (C4Book or None)
+
+    Books are only loaded once, and kept in BOOKS. If the book is for a
+    different board size, None is returned.
+
+    Parameters:
+    dimensions: The columns and rows of the board, in cells. (tuple of int)
+    path: The location of the book file, defaults to BOOK_PATH for the size. (str)
+    """
+    if not path:
+        path = BOOK_PATH.format(*dimensions)
+    if path not in BOOKS:
+        BOOKS[path] = None
+        if os.path.exists(path):
+            try:
+                BOOKS[path] = C4Book(path)
+            except (ValueError, struct.error, mmap.error):
+                pass
+    book = BOOKS[path]
+    if book and book.dimensions == tuple(dimensions):
+        return book
+    else:
+        return None
+
+
+def win_lines(dimensions):
+    """
+    Get the lines of four cells for a board size. (tuple)
+
+    The return value is a list of the bits in each line of four cells, and a list
+    of the indexes of the lines through each bit. Bits are numbered as in the
+    C4Board bitboards. The lines are only calculated once for each board size.
+
+    Parameters:
+    dimensions: The columns and rows of the board, in cells. (tuple of int)
+    """
+    if dimensions not in WIN_LINES:
+        columns, rows = dimensions
+        stride = rows + 1
+        lines = []
+        cell_lines = [[] for bit_index in range(columns * stride)]
+        for column in range(columns):
+            for row in range(rows):
+                for column_step, row_step in ((1, 0), (0, 1), (1, 1), (1, -1)):
+                    # Check that the line fits on the board.
+                    end_column, end_row = column + 3 * column_step, row + 3 * row_step
+                    if end_column >= columns or not 0 <= end_row < rows:
+                        continue
+                    # Record the line and the cells it goes through.
+                    line = tuple((column + step * column_step) * stride + row + step * row_step
+                        for step in range(4))
+                    for bit_index in line:
+                        cell_lines[bit_index].append(len(lines))
+                    lines.append(line)
+        WIN_LINES[dimensions] = (lines, [tuple(line_indexes) for line_indexes in cell_lines])
+    return WIN_LINES[dimensions]
@@ -84,6 +84,7 @@ class Bisley(solitaire.Solitaire):
                     else:
                         self.human.error('I do not recognize that card.')
                 random.shuffle(card.game_location)
+                self.rehash()
         # Winning Strategy lets you lane one stack.
         elif game == 'strategy':
             if not losses:
@@ -19,6 +19,7 @@ FreeCell: A game of FreeCell. (Solitaire)
 import random
 
 from ... import utility
+from . import freecell_solver
 from . import solitaire_game as solitaire
 
 
@@ -52,6 +53,13 @@ fill-free (ff): The free cells are filled with the last four cards from the
 kings-only (ko): Only kings can be used to fill free cells.
 piles= (p=): The number of tableau piles. 4-10, defaults to 8.
 supercell (sc): One random card in each pile is turned face down.
+winnable (w): Random deals are drawn from the deals the solver has won.
+
+The winnable option needs a deal index for the number of cells and piles and
+the baker and kings-only options being used. Indexes are built by running
+freecell_solver.py. When there is an index, the game will tell you what the
+solver found for any numbered deal you play (without the challenge,
+egnellahc, fill-free, or supercell options).
 """
 
 STACK_HELP = """
@@ -86,8 +94,10 @@ class FreeCell(solitaire.Solitaire):
     fill_free: A flag for filling the free cells with the last four cards. (bool)
     kings_only: A flag for only allowing kings in empty lanes. (bool)
     supercell: A flag for flipping tableau cards over randomly. (bool)
+    winnable: A flag for only dealing deals known to be winnable. (bool)
 
     Overridden Methods:
+    get_deal_num
     set_checkers
     set_options
     """
@@ -97,7 +107,7 @@ class FreeCell(solitaire.Solitaire):
     credits = CREDITS
     help_text = {'moving-stacks': STACK_HELP}
     name = 'FreeCell'
-    num_options = 8
+    num_options = 9
     rules = RULES
 
     def do_gipf(self, arguments):
@@ -132,6 +142,40 @@ class FreeCell(solitaire.Solitaire):
         else:
             self.human.tell('There are no valid moves for the gipf of spades.')
 
+    def get_deal_num(self):
+        """
+        Get the number of the deal to shuffle for. (int or None)
+
+        Random deals are drawn from the deal index if the winnable option is set.
+        """
+        deal_num = super(FreeCell, self).get_deal_num()
+        # Only the standard deals are indexed.
+        if self.challenge or self.egnellahc or self.fill_free or self.supercell:
+            return deal_num
+        index = freecell_solver.load_index(self.options['num-cells'], self.options['num-tableau'],
+            self.baker, self.kings_only)
+        if index is None:
+            if self.winnable:
+                self.human.tell('\nThere is no deal index for these rules, the deal may not be winnable.')
+        elif deal_num is None and self.winnable:
+            # Pick a random winnable deal.
+            winners = index.winnable()
+            if winners:
+                deal_num = random.choice(winners)
+                self.human.tell('\nThe winnable deal number is {}.'.format(deal_num))
+                self.option_set.settings_text += ' deal-num={}'.format(deal_num)
+        elif deal_num is not None and deal_num in index:
+            # Report what the solver found for the deal.
+            status, length, nodes = index.lookup(deal_num)
+            if status == freecell_solver.SOLVABLE:
+                text = '\nThe solver won deal {} in {} moves, searching {} positions.'
+            elif status == freecell_solver.UNSOLVABLE:
+                text = '\nThe solver proved deal {} can not be won.'
+            else:
+                text = '\nThe solver gave up on deal {0} after searching {2} positions.'
+            self.human.tell(text.format(deal_num, length, nodes))
+        return deal_num
+
     def set_checkers(self):
         """Set up the game specific rules. (None)"""
         super(FreeCell, self).set_checkers()
@@ -158,7 +202,7 @@ class FreeCell(solitaire.Solitaire):
 
     def set_options(self):
         """Set the game options. (None)"""
-        self.options = {}
+        self.options = {'canonical-hash': True}
         # Set the tableau dimensions.
         self.option_set.add_option('cells', ['c'], action = 'key=num-cells', converter = int,
             default = 4, valid = range(1, 15), target = self.options,
@@ -180,3 +224,5 @@ class FreeCell(solitaire.Solitaire):
             question = 'Should the kings be the only card playable to empty lanes? bool')
         self.option_set.add_option('baker', ['b'],
             question = "Should tableau cards be built by suit (Baker's Game)? bool")
+        self.option_set.add_option('winnable', ['w'],
+            question = 'Should random deals be limited to deals known to be winnable? bool')
@@ -0,0 +1,538 @@
+"""
+freecell_solver.py
+
+A solver and a database of solved deals for FreeCell.
+
+The solver works on its own compact representation of the game rather than on
+the FreeCell game object, so that it can search many thousands of positions a
+second. Cards are integers (rank * 4 + suit index), piles are tuples of cards,
+and the piles and the free cells are kept sorted, so that positions that only
+differ by the order of the piles or cells are searched only once.
+
+The database is a binary file of fixed length records, one per deal number, so
+any deal can be looked up without reading the whole file. It is built with
+build_index, which solves the deals across a pool of processes. From the
+command line (in the folder above t_games):
+
+    python -m t_games.card_games.solitaire_games.freecell_solver [-b] [-c cells]
+        [-k] [-n nodes] [-p piles] first last
+
+Copyright (C) 2018 by Craig O'Brien and the t_games contributors.
+See the top level __init__.py file for details on the t_games license.
+
+Constants:
+INDEX_FOLDER: The default folder for deal indexes. (str)
+INDEX_HEADER: The struct format for the header of an index file. (str)
+INDEX_MAGIC: The marker at the start of an index file. (bytes)
+INDEX_RECORD: The struct format for the records of an index file. (str)
+NODE_LIMIT: The default number of positions to search for each deal. (int)
+RECORD_SIZE: The number of bytes in each record of an index file. (int)
+RED: Flags for the card integers being red. (list of bool)
+SOLVABLE: The status for a deal the solver won. (int)
+STATUS_TEXT: Descriptions of the statuses. (tuple of str)
+UNKNOWN: The status for a deal the solver gave up on. (int)
+UNSOLVABLE: The status for a deal with no solution. (int)
+
+Classes:
+DealIndex: An index of solved FreeCell deals. (object)
+FreeCellSolver: A best-first search solver for FreeCell. (object)
+
+Functions:
+build_index: Solve a range of deals and write them to an index. (DealIndex)
+card_text: Convert a card integer to text. (str)
+deal_layout: Recreate the tableau for a numbered FreeCell deal. (list of list)
+index_path: Get the file name for an index with given rules. (str)
+load_index: Load the index for given rules, if there is one. (DealIndex or None)
+solve_deal: Solve a numbered deal. (tuple of int)
+"""
+
+
+from __future__ import print_function
+
+import getopt
+import heapq
+import multiprocessing
+import os
+import struct
+import sys
+
+from ... import cards
+from ... import utility
+
+
+INDEX_FOLDER = os.path.join(utility.LOC, 'freecell_deals')
+
+INDEX_HEADER = '<4sBBBBBII'
+
+INDEX_MAGIC = b'TFCI'
+
+INDEX_RECORD = '<BHI'
+
+RECORD_SIZE = struct.calcsize(INDEX_RECORD)
+
+NODE_LIMIT = 100000
+
+RED = [suit in (1, 2) for rank in range(14) for suit in range(4)]
+
+UNKNOWN, SOLVABLE, UNSOLVABLE = range(3)
+
+STATUS_TEXT = ('unknown', 'solvable', 'unsolvable')
+
+
+class DealIndex(object):
+    """
+    An index of solved FreeCell deals. (object)
+
+    Attributes:
+    baker: A flag for building being by suit. (bool)
+    cells: The number of free cells. (int)
+    count: The number of deals in the index. (int)
+    first: The first deal number in the index. (int)
+    kings_only: A flag for only kings being allowed in empty lanes. (bool)
+    path: The location of the index file. (str)
+    piles: The number of tableau piles. (int)
+    records: The raw records of the index. (bytes)
+
+    Methods:
+    lookup: Get the status, solution length, and nodes searched for a deal. (tuple)
+    winnable: Get the deal numbers that are known to be winnable. (list of int)
+
+    Overridden Methods:
+    __init__
+    __contains__
+    __len__
+    __repr__
+    """
+
+    def __init__(self, path):
+        """
+        Load the index. (None)
+
+        Parameters:
+        path: The location of the index file. (str)
+        """
+        self.path = path
+        with open(path, 'rb') as index_file:
+            header = index_file.read(struct.calcsize(INDEX_HEADER))
+            self.records = index_file.read()
+        magic, version, self.cells, self.piles, baker, kings_only, self.first, self.count = \
+            struct.unpack(INDEX_HEADER, header)
+        if magic != INDEX_MAGIC or version != 1:
+            raise ValueError('{!r} is not a FreeCell deal index.'.format(path))
+        self.baker = bool(baker)
+        self.kings_only = bool(kings_only)
+
+    def __contains__(self, deal_num):
+        """
+        Check for a deal being in the index. (bool)
+
+        Parameters:
+        deal_num: The deal number to check for. (int)
+        """
+        return self.first <= deal_num < self.first + self.count
+
+    def __len__(self):
+        """The number of deals in the index. (int)"""
+        return self.count
+
+    def __repr__(self):
+        """Create a debugging text representation. (str)"""
+        text = '<DealIndex of deals {} to {} with {} cells and {} piles>'
+        return text.format(self.first, self.first + self.count - 1, self.cells, self.piles)
+
+    def lookup(self, deal_num):
+        """
+        Get the status, solution length, and nodes searched for a deal. (tuple of int)
+
+        If the deal is not in the index, None is returned.
+
+        Parameters:
+        deal_num: The deal number to look up. (int)
+        """
+        if deal_num not in self:
+            return None
+        return struct.unpack_from(INDEX_RECORD, self.records, (deal_num - self.first) * RECORD_SIZE)
+
+    def winnable(self):
+        """Get the deal numbers that are known to be winnable. (list of int)"""
+        statuses = self.records[::RECORD_SIZE]
+        return [self.first + index for index, status in enumerate(bytearray(statuses)) if status == SOLVABLE]
+
+
+
+class FreeCellSolver(object):
+    """
+    A best-first search solver for FreeCell. (object)
+
+    Positions are tuples of the foundation ranks (by suit), the free cell cards,
+    and the tableau piles. Safe sorts (of cards no other card could need to be
+    built on) are made automatically after every move.
+
+    Attributes:
+    baker: A flag for building being by suit. (bool)
+    cells: The number of free cells. (int)
+    kings_only: A flag for only kings being allowed in empty lanes. (bool)
+    node_limit: The maximum number of positions to search. (int)
+
+    Methods:
+    builds_on: Check that one card can be built on another. (bool)
+    score: Estimate how far a position is from being won. (int)
+    safe_sorts: Make any safe sorts in a position. (tuple)
+    solve: Search for a solution to a layout. (tuple)
+    successors: Generate the positions one move away from a position. (generator)
+
+    Overridden Methods:
+    __init__
+    """
+
+    def __init__(self, cells = 4, baker = False, kings_only = False, node_limit = NODE_LIMIT):
+        """
+        Set up the rules for the solver. (None)
+
+        Parameters:
+        cells: The number of free cells. (int)
+        baker: A flag for building being by suit. (bool)
+        kings_only: A flag for only kings being allowed in empty lanes. (bool)
+        node_limit: The maximum number of positions to search. (int)
+        """
+        self.cells = cells
+        self.baker = baker
+        self.kings_only = kings_only
+        self.node_limit = node_limit
+
+    def builds_on(self, card, target):
+        """
+        Check that one card can be built on another. (bool)
+
+        Parameters:
+        card: The card being moved. (int)
+        target: The card being built on. (int)
+        """
+        if (card >> 2) + 1 != target >> 2:
+            return False
+        elif self.baker:
+            return card & 3 == target & 3
+        else:
+            return RED[card] != RED[target]
+
+    def safe_sorts(self, foundations, cells, piles, moves):
+        """
+        Make any safe sorts in a position. (tuple)
+
+        The return value is the new foundations, cells, and piles. The sorts made are
+        added to the moves parameter.
+
+        Parameters:
+        foundations: The highest rank sorted for each suit. (tuple of int)
+        cells: The cards in the free cells. (tuple of int)
+        piles: The tableau piles. (tuple of tuple)
+        moves: The moves made so far. (list of str)
+        """
+        foundations = list(foundations)
+        cells = list(cells)
+        piles = list(piles)
+        while True:
+            for card, location in [(cell, cells) for cell in cells] + [(pile[-1], pile_index)
+                for pile_index, pile in enumerate(piles) if pile]:
+                rank, suit = card >> 2, card & 3
+                if foundations[suit] != rank - 1:
+                    continue
+                # Check that no card could still need to be built on this one.
+                if not self.baker and rank > 2:
+                    if RED[card]:
+                        lowest = min(foundations[0], foundations[3])
+                    else:
+                        lowest = min(foundations[1], foundations[2])
+                    if lowest < rank - 1:
+                        continue
+                # Make the sort.
+                foundations[suit] = rank
+                if location is cells:
+                    cells.remove(card)
+                else:
+                    piles[location] = piles[location][:-1]
+                moves.append('sort {}'.format(card_text(card)))
+                break
+            else:
+                break
+        return tuple(foundations), tuple(sorted(cells)), tuple(sorted(piles))
+
+    def score(self, foundations, cells, piles):
+        """
+        Estimate how far a position is from being won. (int)
+
+        Parameters:
+        foundations: The highest rank sorted for each suit. (tuple of int)
+        cells: The cards in the free cells. (tuple of int)
+        piles: The tableau piles. (tuple of tuple)
+        """
+        # Count the unsorted cards and the free cells used.
+        estimate = (52 - sum(foundations)) * 2 + len(cells)
+        # Count the cards sitting on top of lower cards of the same suit.
+        for pile in piles:
+            lowest = [14, 14, 14, 14]
+            for card in pile:
+                rank, suit = card >> 2, card & 3
+                if rank > lowest[suit]:
+                    estimate += 1
+                elif rank < lowest[suit]:
+                    lowest[suit] = rank
+            if not pile:
+                estimate -= 1
+        return estimate
+
+    def solve(self, layout, cells = (), foundations = (0, 0, 0, 0)):
+        """
+        Search for a solution to a layout. (tuple)
+
+        The return value is the status (SOLVABLE, UNSOLVABLE, or UNKNOWN), the list
+        of moves in the solution (as game commands), and the number of positions
+        searched.
+
+        Parameters:
+        layout: The cards in the tableau piles. (list of list of int)
+        cells: The cards in the free cells. (tuple of int)
+        foundations: The highest rank sorted for each suit. (tuple of int)
+        """
+        # Set up the start position.
+        start_moves = []
+        start = self.safe_sorts(foundations, cells, tuple(tuple(pile) for pile in layout), start_moves)
+        parents = {start: None}
+        queue = [(self.score(*start), 0, 0, start)]
+        count = 0
+        # Search the best positions first.
+        while queue:
+            estimate, depth, order, position = heapq.heappop(queue)
+            for moves, child in self.successors(*position):
+                if child in parents:
+                    continue
+                parents[child] = (position, moves)
+                # Check for a win.
+                if not any(child[2]):
+                    solution = ['sort {}'.format(card_text(card)) for card in sorted(child[1])]
+                    while child != start:
+                        child, moves = parents[child]
+                        solution = moves + solution
+                    return SOLVABLE, start_moves + solution, len(parents)
+                # Check for running out of time.
+                if len(parents) >= self.node_limit:
+                    return UNKNOWN, [], len(parents)
+                count += 1
+                heapq.heappush(queue, (self.score(*child) + depth // 4, depth + 1, count, child))
+        return UNSOLVABLE, [], len(parents)
+
+    def successors(self, foundations, cells, piles):
+        """
+        Generate the positions one move away from a position. (generator)
+
+        Each item generated is the list of moves made (including safe sorts) and the
+        new position.
+
+        Parameters:
+        foundations: The highest rank sorted for each suit. (tuple of int)
+        cells: The cards in the free cells. (tuple of int)
+        piles: The tableau piles. (tuple of tuple)
+        """
+        # Get the stack size limits.
+        free = self.cells - len(cells)
+        lanes = 0 if self.kings_only else piles.count(())
+        max_build = (1 + free) * 2 ** lanes
+        max_lane = (1 + free) * 2 ** max(lanes - 1, 0)
+        has_lane = not piles[0]
+        # Sort cards from the cells and the tops of the piles.
+        for cell_index, card in enumerate(cells):
+            if foundations[card & 3] == (card >> 2) - 1:
+                new_foundations = foundations[:card & 3] + (card >> 2,) + foundations[(card & 3) + 1:]
+                moves = ['sort {}'.format(card_text(card))]
+                yield moves, self.safe_sorts(new_foundations, cells[:cell_index] + cells[cell_index + 1:],
+                    piles, moves)
+        for pile_index, pile in enumerate(piles):
+            if pile and foundations[pile[-1] & 3] == (pile[-1] >> 2) - 1:
+                card = pile[-1]
+                new_foundations = foundations[:card & 3] + (card >> 2,) + foundations[(card & 3) + 1:]
+                new_piles = piles[:pile_index] + (pile[:-1],) + piles[pile_index + 1:]
+                moves = ['sort {}'.format(card_text(card))]
+                yield moves, self.safe_sorts(new_foundations, cells, new_piles, moves)
+        # Build cards from the cells.
+        for cell_index, card in enumerate(cells):
+            new_cells = cells[:cell_index] + cells[cell_index + 1:]
+            for pile_index, pile in enumerate(piles):
+                if pile and self.builds_on(card, pile[-1]):
+                    new_piles = piles[:pile_index] + (pile + (card,),) + piles[pile_index + 1:]
+                    moves = ['build {} {}'.format(card_text(card), card_text(pile[-1]))]
+                    yield moves, self.safe_sorts(foundations, new_cells, new_piles, moves)
+            if has_lane and (card >> 2 == 13 or not self.kings_only):
+                new_piles = ((card,),) + piles[1:]
+                moves = ['lane {}'.format(card_text(card))]
+                yield moves, self.safe_sorts(foundations, new_cells, new_piles, moves)
+        # Move stacks between the tableau piles.
+        for pile_index, pile in enumerate(piles):
+            if not pile:
+                continue
+            # Find the length of the stack on top of the pile.
+            run = 1
+            while run < len(pile) and self.builds_on(pile[-run], pile[-run - 1]):
+                run += 1
+            top_rank = pile[-1] >> 2
+            # Build the stack onto other piles.
+            for target_index, target in enumerate(piles):
+                if not target or target_index == pile_index:
+                    continue
+                size = (target[-1] >> 2) - top_rank
+                if 0 < size <= min(run, max_build) and self.builds_on(pile[-size], target[-1]):
+                    new_piles = list(piles)
+                    new_piles[pile_index] = pile[:-size]
+                    new_piles[target_index] = target + pile[-size:]
+                    moves = ['build {} {}'.format(card_text(pile[-size]), card_text(target[-1]))]
+                    yield moves, self.safe_sorts(foundations, cells, new_piles, moves)
+            # Move the stack into an empty lane.
+            if has_lane:
+                for size in range(1, min(run, max_lane) + 1):
+                    if size == len(pile) or (self.kings_only and pile[-size] >> 2 != 13):
+                        continue
+                    new_piles = list(piles)
+                    new_piles[0] = pile[-size:]
+                    new_piles[pile_index] = pile[:-size]
+                    moves = ['lane {}'.format(card_text(pile[-size]))]
+                    yield moves, self.safe_sorts(foundations, cells, new_piles, moves)
+            # Move the top card to a free cell.
+            if free:
+                new_piles = piles[:pile_index] + (pile[:-1],) + piles[pile_index + 1:]
+                moves = ['free {}'.format(card_text(pile[-1]))]
+                yield moves, self.safe_sorts(foundations, cells + (pile[-1],), new_piles, moves)
+
+
+def build_index(first, last, cells = 4, piles = 8, baker = False, kings_only = False,
+    node_limit = NODE_LIMIT, processes = None, path = ''):
+    """
+    Solve a range of deals and write them to an index. (DealIndex)
+
+    Parameters:
+    first: The first deal number to solve. (int)
+    last: The last deal number to solve. (int)
+    cells: The number of free cells. (int)
+    piles: The number of tableau piles. (int)
+    baker: A flag for building being by suit. (bool)
+    kings_only: A flag for only kings being allowed in empty lanes. (bool)
+    node_limit: The maximum number of positions to search for each deal. (int)
+    processes: The number of processes to use, None for one per cpu. (int)
+    path: The file to write the index to, defaults to index_path. (str)
+    """
+    # Get the file to write to.
+    if not path:
+        path = index_path(cells, piles, baker, kings_only)
+    folder = os.path.dirname(path)
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder)
+    # Solve the deals across the processes.
+    jobs = [(deal_num, cells, piles, baker, kings_only, node_limit) for deal_num in range(first, last + 1)]
+    pool = multiprocessing.Pool(processes)
+    try:
+        results = pool.map(solve_deal, jobs, chunksize = 4)
+    finally:
+        pool.close()
+        pool.join()
+    # Write the index.
+    with open(path, 'wb') as index_file:
+        index_file.write(struct.pack(INDEX_HEADER, INDEX_MAGIC, 1, cells, piles, baker, kings_only, first,
+            len(results)))
+        for status, length, nodes in results:
+            index_file.write(struct.pack(INDEX_RECORD, status, min(length, 65535), min(nodes, 2 ** 32 - 1)))
+    return DealIndex(path)
+
+
+def card_text(card):
+    """
+    Convert a card integer to text. (str)
+
+    Parameters:
+    card: The card to convert. (int)
+    """
+    return cards.Card.ranks[card >> 2] + cards.Card.suits[card & 3]
+
+
+def deal_layout(deal_num, piles = 8):
+    """
+    Recreate the tableau for a numbered FreeCell deal. (list of list of int)
+
+    This matches the layout dealt by the FreeCell game for the deal number.
+
+    Parameters:
+    deal_num: The deal number. (int)
+    piles: The number of tableau piles. (int)
+    """
+    deck = cards.Deck()
+    deck.shuffle(number = deal_num)
+    layout = [[] for pile in range(piles)]
+    for card_index in range(len(deck.cards)):
+        card = deck.cards.pop()
+        layout[card_index % piles].append(card.ranks.index(card.rank) * 4 + card.suits.index(card.suit))
+    return layout
+
+
+def index_path(cells = 4, piles = 8, baker = False, kings_only = False):
+    """
+    Get the file name for an index with given rules. (str)
+
+    Parameters:
+    cells: The number of free cells. (int)
+    piles: The number of tableau piles. (int)
+    baker: A flag for building being by suit. (bool)
+    kings_only: A flag for only kings being allowed in empty lanes. (bool)
+    """
+    name = 'freecell-c{}-p{}{}{}.idx'.format(cells, piles, '-baker' if baker else '',
+        '-ko' if kings_only else '')
+    return os.path.join(INDEX_FOLDER, name)
+
+
+def load_index(cells = 4, piles = 8, baker = False, kings_only = False):
+    """
+    Load the index for given rules, if there is one. (DealIndex or None)
+
+    Parameters:
+    cells: The number of free cells. (int)
+    piles: The number of tableau piles. (int)
+    baker: A flag for building being by suit. (bool)
+    kings_only: A flag for only kings being allowed in empty lanes. (bool)
+    """
+    path = index_path(cells, piles, baker, kings_only)
+    if os.path.exists(path):
+        return DealIndex(path)
+    else:
+        return None
+
+
+def solve_deal(job):
+    """
+    Solve a numbered deal. (tuple of int)
+
+    The return value is the status, the length of the solution, and the number of
+    positions searched.
+
+    Parameters:
+    job: The deal number, cells, piles, baker, kings-only, and node limit. (tuple)
+    """
+    deal_num, cells, piles, baker, kings_only, node_limit = job
+    solver = FreeCellSolver(cells, baker, kings_only, node_limit)
+    status, moves, nodes = solver.solve(deal_layout(deal_num, piles))
+    return status, len(moves), nodes
+
+
+if __name__ == '__main__':
+    # Build an index from the command line.
+    opts, args = getopt.getopt(sys.argv[1:], 'bc:kn:p:')
+    settings = {'cells': 4, 'piles': 8, 'baker': False, 'kings_only': False, 'node_limit': NODE_LIMIT}
+    for option, value in opts:
+        if option == '-b':
+            settings['baker'] = True
+        elif option == '-c':
+            settings['cells'] = int(value)
+        elif option == '-k':
+            settings['kings_only'] = True
+        elif option == '-n':
+            settings['node_limit'] = int(value)
+        elif option == '-p':
+            settings['piles'] = int(value)
+    index = build_index(int(args[0]), int(args[1]), **settings)
+    wins = len(index.winnable())
+    print('{} of {} deals solved, written to {}.'.format(wins, len(index), index.path))
@@ -67,7 +67,7 @@ class Gargantua(solitaire.MultiSolitaire):
             if not losses:
                 for card in self.deck.in_play:
                     if card.rank == 'A':
-                        card.up = True
+                        self.flip(card)
         # Otherwise I'm confused.
         else:
             self.human.tell("Gargantua decidedly dislikes miniscule linguistic particulates.")
@@ -317,6 +317,7 @@ class Klondike(solitaire.Solitaire):
             self.waste.append(card)
             card.up = True
             card.game_location = self.waste
+            self.rehash()
             go = False
         return go
 
@@ -337,7 +338,9 @@ class Klondike(solitaire.Solitaire):
             self.turn_count = 1
             # Reset the stock
             self.transfer(self.waste[:], self.stock, up = False)
+            self.position_hash ^= self.zobrist_cards(self.stock)
             self.stock.reverse()
+            self.position_hash ^= self.zobrist_cards(self.stock)
             # Reset the stock tracking
             self.stock_passes += 1
             self.max_passes = self.stock_passes + 1
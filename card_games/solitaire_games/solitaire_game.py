@@ -10,6 +10,7 @@ Constants:
 HELP_TEXt: General help for solitaire games. (str)
 MULTI_DECK_HELP: Help for multi-deck solitaire games. (str)
 SCORE_HELP: An explanation of how solitaire game scores are calculated. (str)
+ZOBRIST_SEED: The seed for the position hashing keys. (int)
 
 Classes:
 Solitaire: A generalized solitaire game. (game.Game)
@@ -22,6 +23,7 @@ import random
 
 from ... import cards
 from ... import game
+from . import winnability
 from .rule_checkers import *
 
 
@@ -44,7 +46,9 @@ There are various commands for the standard moves in a solitaire game:
     * turn: Turn cards over from the stock.
 
 In addition, the undo command will take back moves and the auto command will
-sort multiple cards at a time. Help is available for all of these commands.
+sort multiple cards at a time. The chance command estimates your chance of
+winning from the current position. Help is available for all of these
+commands.
 
 You can also just enter one or two cards without a command. The game will try
 to look for a move and make one if it can find one. If two cards are given, it
@@ -100,6 +104,8 @@ card moved to the foundation counts as sorted, whether it was moved there with
 a sort move or a match move.
 """
 
+ZOBRIST_SEED = 8013
+
 
 class Solitaire(game.Game):
     """
@@ -112,8 +118,12 @@ class Solitaire(game.Game):
     functions) to check rules specific to the game.
 
     Attributes:
+    auto_dirty: Ids of locations changed since auto checked them. (set of int)
+    auto_waiting: Ids of locations waiting on a suit to move. (dict of str: set)
     build_checkers: Functions for determining valid builds. (list of callable)
+    canonical_hash: A flag for hashing positions regardless of pile order. (bool)
     cells: Holding spaces for manuevering cards. (list of Card)
+    deal_num: The number of the deal, or None for a random deal. (int or None)
     dealers: The deal functions for setting up the tableau. (list of callable)
     deck: The deck of cards for the game. (cards.TrackingDeck)
     foundations: The piles to fill to win the game. (list of list of Card)
@@ -125,6 +135,7 @@ class Solitaire(game.Game):
     num_cells: The number of cells in the game. (int)
     options: The standard solitaire options for this game. (dict of str: object)
     pair_checkers: Functions for validating pairs in tableau stacks. (list)
+    position_hash: A Zobrist hash of the current card layout. (int)
     reserve: Piles where building is not permitted. (list of list of Card)
     sort_checkers: Functions for validating foundation moves. (list of callable)
     stock: A face down pile of cards for later play. (list of Card)
@@ -134,14 +145,20 @@ class Solitaire(game.Game):
     undo_count: The number of undos taken in the game. (int)
     waste: A face up pile of cards that can be played from. (list of Card)
     wrap_ranks: Flag for building by rank wrappng from king to ace. (bool)
+    zobrist_bases: Hash codes for the bottoms of the game locations. (dict of int: int)
+    zobrist_codes: Hash codes for the cards, by card id. (dict of int: int)
+    zobrist_keys: The random keys for the position hash. (list of int)
+    zobrist_width: The number of codes a card can be placed on. (int)
 
     Methods:
+    auto_location: Sort any sortable cards in a location for auto. (int)
     build_check: Check for a valid build. (bool)
     build_pair: Check for a valid pair of building cards. (str)
     cell_text: Generate the text for the cards in cells. (str)
     deal: Deal the initial set up for the game. (None)
     do_auto: Automatically play cards into the foundations. (bool)
     do_build: Build card(s) into stacks on the tableau. (bool)
+    do_chance: Estimate the chance of winning from the current position. (bool)
     do_free: Move a card to one of the free cells. (bool)
     do_lane: Move a card into an empty lane. (None)
     do_match: Match two cards and discard them. (None)
@@ -149,22 +166,27 @@ class Solitaire(game.Game):
     do_turn: Turn cards from the stock into the waste. (bool)
     do_undo: Undo one or more previous moves. (bool)
     find_foundation: Find the foundation a card should sort to. (list of Card)
+    flip: Turn a card face up or face down. (None)
     foundation_text: Generate the text for the foundation piles. (str)
     free_check: Check that a card can be moved to a free cell. (bool)
     game_over: Check for the foundations being full. (bool)
+    get_deal_num: Get the number of the deal to shuffle for. (int or None)
     guess: Guess what move to make for a particular card. (None)
     guess_two: Guess what move to make for two given cards. (bool)
     lane_check: Check for a valid move into a lane. (bool)
     match_check: Check for a valid match of two cards. (bool)
+    rehash: Calculate the position hash from scratch. (int)
     reserve_text: Generate text for the reserve piles. (str)
     set_checkers: Set the game specific rules. (None)
     set_solitaire: Special initialization for solitaire games. (None)
+    set_zobrist: Set up the keys for hashing positions. (None)
     sort_check: Check for a valid sort. (bool)
     stack_check: Check for a valid stack to move. (bool)
     stock_text: Generate text for the stock and waste. (str)
     super_stack: Find and validate any stack being moved. (list of Card)
     tableau_text: Generate text for the tableau piles. (str)
     transfer: Move a stack of cards from one game location to another. (None)
+    zobrist_cards: Calculate the hash keys for the cards in a location. (int)
 
     Overridden Methods:
     __str__
@@ -193,6 +215,36 @@ class Solitaire(game.Game):
             lines.append(self.stock_text())
         return '\n' + '\n\n'.join(lines)
 
+    def auto_location(self, location, max_rank):
+        """
+        Sort any sortable cards in a location for the auto command. (int)
+
+        The return value is the number of cards sorted. Cards that can't be sorted
+        wait on their suit, and their location is checked again when a card of that
+        suit is moved.
+
+        Parameters:
+        location: The location to check for sortable cards. (list of TrackingCard)
+        max_rank: The highest rank to sort. (int)
+        """
+        # Free cells have all their cards checked, other locations only their top card.
+        if location is self.cells:
+            cards = location
+        elif location:
+            cards = location[-1:]
+        else:
+            cards = []
+        # Check the cards.
+        sorts = 0
+        for card in cards:
+            card_foundation = self.find_foundation(card)
+            if card.rank_num <= max_rank and self.sort_check(card, card_foundation, False):
+                self.do_sort(str(card))
+                sorts += 1
+            else:
+                self.auto_waiting.setdefault(card.suit, set()).add(id(location))
+        return sorts
+
     def build_check(self, mover, target, moving_stack, show_error = True):
         """
         Check for a valid build. (bool)
@@ -310,40 +362,25 @@ class Solitaire(game.Game):
         else:
             self.human.error('\nThere was an error: the rank specified is not in the deck.')
             return True
+        # Check the free cells, the tableau, the waste, and the reserve, in that order.
+        locations = [self.cells] + self.tableau + [self.waste] + self.reserve
+        self.auto_waiting = {}
+        full_pass = True
         # Loop until there are no sortable cards.
         while True:
             sorts = 0
-            # Check free cells.
-            for card in self.cells:
-                card_foundation = self.find_foundation(card)
-                if card.rank_num <= max_rank and self.sort_check(card, card_foundation, False):
-                    self.do_sort(str(card))
-                    sorts += 1
-            # Check tableau.
-            for pile in self.tableau:
-                if pile:
-                    card = pile[-1]
-                    card_foundation = self.find_foundation(card)
-                    if card.rank_num <= max_rank and self.sort_check(card, card_foundation, False):
-                        self.do_sort(str(card))
-                        sorts += 1
-            # Check the waste.
-            if self.waste:
-                card = self.waste[-1]
-                card_foundation = self.find_foundation(card)
-                if card.rank_num <= max_rank and self.sort_check(card, card_foundation, False):
-                    self.do_sort(str(card))
-                    sorts += 1
-            # Check the reserve.
-            for pile in self.reserve:
-                if pile:
-                    card = pile[-1]
-                    card_foundation = self.find_foundation(card)
-                    if card.rank_num <= max_rank and self.sort_check(card, card_foundation, False):
-                        self.do_sort(str(card))
-                        sorts += 1
-            if not sorts:
+            # Only check locations that have changed since they were last checked.
+            for location in locations:
+                if full_pass or id(location) in self.auto_dirty:
+                    self.auto_dirty.discard(id(location))
+                    sorts += self.auto_location(location, max_rank)
+            # Confirm with a full pass, since game specific rules may depend on other piles.
+            if sorts:
+                full_pass = False
+            elif full_pass:
                 break
+            else:
+                full_pass = True
         return False
 
     def do_build(self, arguments):
@@ -371,6 +408,31 @@ class Solitaire(game.Game):
         else:
             return True
 
+    def do_chance(self, arguments):
+        """
+        Estimate your chance of winning from the current position.
+
+        The face down cards are shuffled many times, and each shuffle is played out
+        with a simple greedy strategy. The estimate is the fraction of those games
+        won, with a 95% confidence interval. Better play than the greedy strategy
+        can do better than the estimate.
+
+        An integer argument sets the number of shuffles to play out (default 100).
+        """
+        # Get the number of samples.
+        samples = winnability.SAMPLES
+        if arguments.strip():
+            try:
+                samples = int(arguments)
+            except ValueError:
+                self.human.error('\nInvalid number of samples: {!r}.'.format(arguments))
+                return True
+        # Make and show the estimate.
+        chance, low, high = winnability.estimate_wins(self, samples)
+        text = '\nYour chance of winning is about {:.1%} (between {:.1%} and {:.1%}).'
+        self.human.tell(text.format(chance, low, high))
+        return True
+
     def do_free(self, card):
         """
         Move a card to one of the free cells. (f)
@@ -458,7 +520,9 @@ class Solitaire(game.Game):
             # Put the waste back in the stock if necessary.
             if not self.stock:
                 self.transfer(self.waste[:], self.stock, up = False)
+                self.position_hash ^= self.zobrist_cards(self.stock)
                 self.stock.reverse()
+                self.position_hash ^= self.zobrist_cards(self.stock)
             # Flip over turn count cards.
             for card_index in range(self.turn_count):
                 self.transfer(self.stock[-1:], self.waste, undo_ndx = card_index)
@@ -503,13 +567,13 @@ class Solitaire(game.Game):
                     force_down = old_location is self.stock
                 # Check for having flipped a revealed card.
                 if flip:
-                    old_location[-1].up = False
+                    self.flip(old_location[-1], False)
                 # Move the cards back.
                 self.transfer(move_stack, old_location, track = False, undo_ndx = undo_index)
                 # Handle flipping the undone card(s) back down.
                 if force_down:
                     for card in move_stack:
-                        card.up = False
+                        self.flip(card, False)
                 # Handle multiple-transfer moves recursively.
                 if undo_index:
                     self.do_undo('')
@@ -532,6 +596,26 @@ class Solitaire(game.Game):
         """
         return self.foundations[self.deck.suits.index(card.suit)]
 
+    def flip(self, card, up = True):
+        """
+        Turn a card face up or face down. (None)
+
+        Parameters:
+        card: The card to turn over. (cards.TrackingCard)
+        up: A flag for the card ending up face up. (bool)
+        """
+        if card.up != up:
+            # Find the card in its location.
+            location = card.game_location
+            if location and location[-1] is card:
+                card_index = len(location) - 1
+            else:
+                card_index = [id(other) for other in location].index(id(card))
+            # Swap the card's hash key as it is turned over.
+            self.position_hash ^= self.zobrist_cards(location, card_index, card_index + 1)
+            card.up = up
+            self.position_hash ^= self.zobrist_cards(location, card_index, card_index + 1)
+
     def foundation_text(self):
         """Generate the text for the foundation piles. (str)"""
         return ' '.join([str(pile[-1]) if pile else '--' for pile in self.foundations])
@@ -587,6 +671,30 @@ class Solitaire(game.Game):
             # Carry on.
             return False
 
+    def get_deal_num(self):
+        """
+        Get the number of the deal to shuffle for. (int or None)
+
+        None is returned for a deal that can't be reproduced.
+        """
+        # Clear any previous deal number from the settings.
+        deal_text_index = self.option_set.settings_text.find('deal-num')
+        if deal_text_index != -1:
+            self.option_set.settings_text = self.option_set.settings_text[:(deal_text_index - 1)]
+        # Get the deal number from the user.
+        deal_num = -1
+        if self.raw_options.lower() != 'none':
+            prompt = '\nEnter the deal number, or return for a random deal: '
+            deal_num = self.human.ask_int(prompt, low = 0, default = -1, cmd = False)
+        if deal_num == -1:
+            deal_num = None
+        elif deal_num == 0:
+            deal_num = random.randint(1, 1000000)
+            self.human.tell('The random deal number is {}.'.format(deal_num))
+        if deal_num:
+            self.option_set.settings_text += ' deal-num={}'.format(deal_num)
+        return deal_num
+
     def guess(self, card_text):
         """
         Guess what move to make for a particular card. (bool)
@@ -743,6 +851,17 @@ class Solitaire(game.Game):
         self.scores[self.human.name] = sorted_count * 5 - self.move_count - deck_size - self.undo_count * 2
         return keep_playing
 
+    def rehash(self):
+        """
+        Calculate the position hash from scratch. (int)
+
+        This is for after cards have been moved without using the transfer method.
+        """
+        self.position_hash = 0
+        for location in self.tableau + self.foundations + self.reserve + [self.cells, self.stock, self.waste]:
+            self.position_hash ^= self.zobrist_cards(location)
+        return self.position_hash
+
     def reserve_text(self):
         """Generate text for the reserve piles. (str)"""
         reserve_text = []
@@ -777,9 +896,10 @@ class Solitaire(game.Game):
         """
         # Update the default solitaire options based on the game.
         options = {'deck-specs': [], 'num-tableau': 7, 'num-foundations': 4, 'num-reserve': 0,
-            'num-cells': 0, 'turn-count': 3, 'max-passes': -1, 'wrap-ranks': False}
+            'num-cells': 0, 'turn-count': 3, 'max-passes': -1, 'wrap-ranks': False, 'canonical-hash': False}
         options.update(self.options)
         # Initialize the specified attributes.
+        self.canonical_hash = options['canonical-hash']
         self.num_cells = options['num-cells']
         self.wrap_ranks = options['wrap-ranks']
         self.turn_count = options['turn-count']
@@ -787,21 +907,8 @@ class Solitaire(game.Game):
         # Initialize the derived attributes.
         # Initialize the deck.
         self.deck = cards.TrackingDeck(self, *options['deck-specs'])
-        deal_num = -1
-        deal_text_index = self.option_set.settings_text.find('deal-num')
-        if deal_text_index != -1:
-            self.option_set.settings_text = self.option_set.settings_text[:(deal_text_index - 1)]
-        if self.raw_options.lower() != 'none':
-            prompt = '\nEnter the deal number, or return for a random deal: '
-            deal_num = self.human.ask_int(prompt, low = 0, default = -1, cmd = False)
-        if deal_num == -1:
-            deal_num = None
-        elif deal_num == 0:
-            deal_num = random.randint(1, 1000000)
-            self.human.tell('The random deal number is {}.'.format(deal_num))
-        if deal_num:
-            self.option_set.settings_text += ' deal-num={}'.format(deal_num)
-        self.deck.shuffle(number = deal_num)
+        self.deal_num = self.get_deal_num()
+        self.deck.shuffle(number = self.deal_num)
         # Initialize the variable game locations
         self.tableau = [[] for pile in range(options['num-tableau'])]
         self.foundations = [[] for foundation in range(options['num-foundations'])]
@@ -812,6 +919,9 @@ class Solitaire(game.Game):
         self.stock = []
         self.stock_passes = 0
         self.waste = []
+        # Initialize the auto command tracking.
+        self.auto_dirty = set()
+        self.auto_waiting = {}
         # Initialize the undo history.
         self.moves = []
         self.undo_count = 0
@@ -824,8 +934,45 @@ class Solitaire(game.Game):
         """Set up the game. (None)"""
         self.set_solitaire()
         self.deal()
+        self.set_zobrist()
         self.scores[self.human.name] = -len(self.deck.cards) - len(self.deck.in_play)
 
+    def set_zobrist(self):
+        """
+        Set up the keys for hashing positions. (None)
+
+        Each card is keyed by what it is sitting on (the card below it, or the bottom
+        of its location) and whether it is face up. Each copy of a duplicate card has
+        its own keys, so that the copies' keys cannot cancel each other out. Cards in
+        the free cells are always keyed as sitting on the free cells, so the order of
+        the free cells does not matter. With the canonical-hash option, all of the
+        tableau piles share one bottom, so the order of the tableau piles does not
+        matter either.
+        """
+        # Get codes for the cards, with a separate code for each copy of a card.
+        self.zobrist_codes = {}
+        cards = sorted(self.deck.cards + self.deck.in_play, key = lambda card: card.up_text)
+        for code, card in enumerate(cards):
+            self.zobrist_codes[id(card)] = code
+        # Get codes for the bottoms of the locations.
+        base = len(self.zobrist_codes)
+        self.zobrist_bases = {}
+        for pile in self.tableau:
+            self.zobrist_bases[id(pile)] = base
+            if not self.canonical_hash:
+                base += 1
+        base += 1
+        for location in self.foundations + self.reserve + [self.cells, self.stock, self.waste]:
+            self.zobrist_bases[id(location)] = base
+            base += 1
+        # Generate the keys for every card on every code in either orientation.
+        self.zobrist_width = base
+        zobrist_random = random.Random(ZOBRIST_SEED)
+        key_count = len(self.zobrist_codes) * base * 2
+        self.zobrist_keys = [zobrist_random.getrandbits(64) for key in range(key_count)]
+        # Hash the initial position.
+        self.rehash()
+
     def sort_check(self, card, foundation, show_error = True):
         """
         Check for a valid sort. (bool)
@@ -940,14 +1087,22 @@ class Solitaire(game.Game):
         old_location = move_stack[0].game_location
         if track:
             self.moves.append([move_stack[:], old_location, new_location, undo_ndx])
+        # Remove the cards from the position hash (the whole location if they weren't on top).
+        start = len(old_location) - len(move_stack)
+        on_top = old_location[start:] == move_stack
+        self.position_hash ^= self.zobrist_cards(old_location, start if on_top else 0)
         # Move the cards.
         for card in move_stack:
             old_location.remove(card)
             card.up = up
+        if not on_top:
+            self.position_hash ^= self.zobrist_cards(old_location)
         new_location.extend(move_stack)
+        # Add the cards back into the position hash.
+        self.position_hash ^= self.zobrist_cards(new_location, len(new_location) - len(move_stack))
         # Turn over any revealed cards.
         if old_location and old_location is not self.stock and not old_location[-1].up:
-            old_location[-1].up = True
+            self.flip(old_location[-1])
             # Track turning over revealed cards.
             if track:
                 self.moves[-1].append(True)
@@ -956,6 +1111,11 @@ class Solitaire(game.Game):
         # Reset location tracking.
         for card in move_stack:
             card.game_location = new_location
+        # Flag the changed locations, and any waiting on the moved suits, for the auto command.
+        self.auto_dirty.add(id(old_location))
+        self.auto_dirty.add(id(new_location))
+        for card in move_stack:
+            self.auto_dirty.update(self.auto_waiting.pop(card.suit, ()))
         # Update the move counts.
         if not undo_ndx and track:
             self.move_count += 1
@@ -964,6 +1124,37 @@ class Solitaire(game.Game):
             else:
                 self.last_sort = 0
 
+    def zobrist_cards(self, location, start = 0, stop = None):
+        """
+        Calculate the hash keys for the cards in a location. (int)
+
+        The keys for the cards are xored together. Locations that are not part of the
+        layout (such as the deck) have no keys.
+
+        Parameters:
+        location: The game location holding the cards. (list of TrackingCard)
+        start: The index of the first card to get keys for. (int)
+        stop: The index after the last card to get keys for. (int)
+        """
+        # Get the code for whatever the first card is sitting on.
+        base = self.zobrist_bases.get(id(location))
+        if base is None:
+            return 0
+        loose = location is self.cells
+        if start and not loose:
+            under = self.zobrist_codes[id(location[start - 1])]
+        else:
+            under = base
+        # Combine the keys for the cards.
+        keys, width, codes = self.zobrist_keys, self.zobrist_width, self.zobrist_codes
+        hash_keys = 0
+        for card in location[start:stop]:
+            code = codes[id(card)]
+            hash_keys ^= keys[(code * width + under) * 2 + card.up]
+            if not loose:
+                under = code
+        return hash_keys
+
 
 class MultiSolitaire(Solitaire):
     """
@@ -981,7 +1172,7 @@ class MultiSolitaire(Solitaire):
     move_error: Warn the user about an invalid move. (None)
 
     Overridden Methods:
-    do_auto
+    auto_location
     do_build
     do_free
     do_lane
@@ -999,6 +1190,34 @@ class MultiSolitaire(Solitaire):
     aliases = {'alt': 'alternate'}
     name = 'MultiSolitaire Base'
 
+    def auto_location(self, location, max_rank):
+        """
+        Sort any sortable cards in a location for the auto command. (int)
+
+        The return value is the number of cards sorted.
+
+        Parameters:
+        location: The location to check for sortable cards. (list of TrackingCard)
+        max_rank: The highest rank to sort. (int)
+        """
+        # Free cells have all their cards checked, other locations only their top card.
+        if location is self.cells:
+            cards = location
+        elif location:
+            cards = location[-1:]
+        else:
+            cards = []
+        # Check the cards against each of their foundations.
+        sorts = 0
+        for card in cards:
+            for card_foundation in self.find_foundation(card):
+                if card.rank_num <= max_rank and self.sort_check(card, card_foundation, False):
+                    self.do_sort(str(card))
+                    sorts += 1
+                else:
+                    self.auto_waiting.setdefault(card.suit, set()).add(id(location))
+        return sorts
+
     def do_alternate(self, argument):
         """
         Redo the last command with different but matching cards. (alt)
@@ -1044,64 +1263,6 @@ class MultiSolitaire(Solitaire):
             self.human.error('\nThe last move is not alternatable.')
             return True
 
-    def do_auto(self, max_rank):
-        """
-        Automatically play cards to the foundations. (a)
-
-        If no argument is given, auto will play cards as long as it can. If a card
-        rank is given as an argument, auto will on play cards up to and including that
-        rank.
-        """
-        # Convert max rank to int
-        max_rank = max_rank.upper()
-        if max_rank.strip() == '':
-            max_rank = len(self.deck.ranks) - 1
-        elif max_rank in self.deck.ranks:
-            max_rank = self.deck.ranks.index(max_rank)
-        else:
-            self.human.error('\nThere was an error: the rank specified is not in the deck.')
-            return True
-        # Loop until there are no sortable cards
-        while True:
-            # Reset the loop.
-            sorts = 0
-            # Check the free cells.
-            for card in self.cells:
-                foundations = self.find_foundation(card)
-                for card_foundation in foundations:
-                    if card.rank_num <= max_rank and self.sort_check(card, card_foundation, False):
-                        self.do_sort(str(card))
-                        sorts += 1
-            # Check the tableau piles.
-            for pile in self.tableau:
-                if pile:
-                    card = pile[-1]
-                    foundations = self.find_foundation(card)
-                    for card_foundation in foundations:
-                        if card.rank_num <= max_rank and self.sort_check(card, card_foundation, False):
-                            self.do_sort(str(card))
-                            sorts += 1
-            # Check the waste.
-            if self.waste:
-                card = self.waste[-1]
-                foundations = self.find_foundation(card)
-                for card_foundation in foundations:
-                    if card.rank_num <= max_rank and self.sort_check(card, card_foundation, False):
-                        self.do_sort(str(card))
-                        sorts += 1
-            # Check the reserve piles.
-            for pile in self.reserve:
-                if pile:
-                    card = pile[-1]
-                    foundations = self.find_foundation(card)
-                    for card_foundation in foundations:
-                        if card.rank_num <= max_rank and self.sort_check(card, card_foundation, False):
-                            self.do_sort(str(card))
-                            sorts += 1
-            if not sorts:
-                break
-        return False
-
     def do_build(self, arguments):
         """
         Build card(s) into stacks on the tableau. (b)
@@ -1434,9 +1595,10 @@ class MultiSolitaire(Solitaire):
         For an ulimited number of passes through the stock, set max_passes to -1.
         """
         options = {'deck-specs': [], 'num-tableau': 7, 'num-foundations': 4, 'num-reserve': 0,
-            'num-cells': 0, 'turn-count': 3, 'max-passes': -1, 'wrap-ranks': False}
+            'num-cells': 0, 'turn-count': 3, 'max-passes': -1, 'wrap-ranks': False, 'canonical-hash': False}
         options.update(self.options)
         # Initialize the specified attributes.
+        self.canonical_hash = options['canonical-hash']
         self.num_cells = options['num-cells']
         self.wrap_ranks = options['wrap-ranks']
         self.turn_count = options['turn-count']
@@ -1444,21 +1606,8 @@ class MultiSolitaire(Solitaire):
         # Initialize the derived attributes.
         # Initialze the deck.
         self.deck = cards.MultiTrackingDeck(self, *options['deck-specs'])
-        deal_num = -1
-        deal_text_index = self.option_set.settings_text.find('deal-num')
-        if deal_text_index != -1:
-            self.option_set.settings_text = self.option_set.settings_text[:(deal_text_index - 1)]
-        if self.raw_options.lower() != 'none':
-            prompt = '\nEnter the deal number, or return for a random deal: '
-            deal_num = self.human.ask_int(prompt, low = 0, default = -1, cmd = False)
-        if deal_num == -1:
-            deal_num = None
-        elif deal_num == 0:
-            deal_num = random.randint(1, 1000000)
-            self.human.tell('The random deal number is {}.'.format(deal_num))
-        if deal_num:
-            self.option_set.settings_text += ' deal-num={}'.format(deal_num)
-        self.deck.shuffle(number = deal_num)
+        self.deal_num = self.get_deal_num()
+        self.deck.shuffle(number = self.deal_num)
         # Initialize the piles of piles.
         self.tableau = [[] for pile in range(options['num-tableau'])]
         self.foundations = [[] for foundation in range(options['num-foundations'])]
@@ -1469,6 +1618,9 @@ class MultiSolitaire(Solitaire):
         self.stock = []
         self.stock_passes = 0
         self.waste = []
+        # Initialize the auto command tracking.
+        self.auto_dirty = set()
+        self.auto_waiting = {}
         # Initialize the undo history.
         self.moves = []
         self.undo_count = 0
@@ -74,6 +74,7 @@ class Strategy(solitaire.Solitaire):
                         self.human.error('I do not recognize that card.')
                 # Reverse the pile.
                 card.game_location.reverse()
+                self.rehash()
                 go = False
         # A Roulette win lets you swap (spin) two adjacent cards.
         elif game == 'roulette':
@@ -96,6 +97,7 @@ class Strategy(solitaire.Solitaire):
                         if abs(indexes[0] - indexes[1]) == 1:
                             # Swap (spin) the two cards.
                             pile[indexes[0]], pile[indexes[1]] = pile[indexes[1]], pile[indexes[0]]
+                            self.rehash()
                             break
                         else:
                             self.human.tell('Those cards are not next to each other.')
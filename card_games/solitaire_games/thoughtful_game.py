@@ -223,10 +223,18 @@ class Thoughtful(solitaire.Solitaire):
         """
         # Record the move.
         old_location = move_stack[0].game_location
+        if new_location is old_location:
+            locations = [old_location]
+        else:
+            locations = [old_location, new_location]
+        for location in locations:
+            self.position_hash ^= self.zobrist_cards(location)
         # Move the cards.
         for card in move_stack:
             old_location.remove(card)
             new_location.insert(0, card)
+        for location in locations:
+            self.position_hash ^= self.zobrist_cards(location)
         # Reset location tracking.
         for card in move_stack:
             card.game_location = new_location
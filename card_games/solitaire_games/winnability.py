@@ -0,0 +1,315 @@
+"""
+winnability.py
+
+Monte Carlo estimates of the chance of winning a solitaire game.
+
+Games with face down cards can't be solved exactly, because you don't know
+where the face down cards are. Instead, the face down cards are shuffled into
+a sample layout (a determinization) that matches everything that can be seen,
+and the sample is played out with a simple greedy strategy. The fraction of
+the samples won estimates the chance of winning from the current position.
+
+Since the greedy strategy is not perfect play, the estimate is best treated as
+a lower bound on the chance of winning.
+
+Copyright (C) 2018 by Craig O'Brien and the t_games contributors.
+See the top level __init__.py file for details on the t_games license.
+
+Constants:
+DEAL_ATTRIBUTES: Game attributes that are set by dealing the cards. (tuple of str)
+MAX_STEPS: The maximum number of moves in a playout. (int)
+SAMPLES: The default number of samples to play out. (int)
+Z_SCORE: The z-score for the confidence interval (95%). (float)
+
+Classes:
+PlayoutBot: A silent player for playing out sample games. (player.Bot)
+
+Functions:
+determinize: Create a sample game from a snapshot of a game. (Solitaire)
+estimate_wins: Estimate the chance of winning a solitaire game. (tuple of float)
+greedy_playout: Play a solitaire game out with a greedy strategy. (bool)
+playout_moves: Get the moves for the greedy strategy, best first. (list of tuple)
+sample_playout: Play out one sample of a game snapshot. (bool)
+snapshot: Record the state of a solitaire game. (dict)
+wilson_interval: Calculate a confidence interval for a win rate. (tuple of float)
+"""
+
+
+import math
+import multiprocessing
+import random
+
+from ... import cards
+from ... import player
+
+
+DEAL_ATTRIBUTES = ('foundation_rank',)
+
+MAX_STEPS = 1000
+
+SAMPLES = 100
+
+Z_SCORE = 1.96
+
+
+class PlayoutBot(player.Bot):
+    """
+    A silent player for playing out sample games. (player.Bot)
+
+    Overridden Methods:
+    error
+    tell
+    """
+
+    def error(self, *args, **kwargs):
+        """
+        Ignore warnings about invalid plays. (None)
+
+        Parameters:
+        The parameters are as the built-in print function.
+        """
+        pass
+
+    def tell(self, *args, **kwargs):
+        """
+        Ignore information about the game. (None)
+
+        Parameters:
+        The parameters are as the built-in print function.
+        """
+        pass
+
+
+def determinize(state, rng):
+    """
+    Create a sample game from a snapshot of a game. (Solitaire)
+
+    The face down cards in the snapshot are shuffled among themselves. Setting
+    up the sample deals the cards again, so any attributes set by the deal are
+    put back to their values in the snapshot.
+
+    Parameters:
+    state: A snapshot of a game, from the snapshot function. (dict)
+    rng: The random number generator for shuffling. (random.Random)
+    """
+    # Set up a game with the same options.
+    game = state['class'](PlayoutBot(), 'none')
+    game.options.update(state['options'])
+    for option, setting in state['settings'].items():
+        setattr(game, option, setting)
+    game.scores = {}
+    game.player_index = 0
+    game.set_up()
+    # Undo any changes from dealing the cards again.
+    for attribute, value in state['deal'].items():
+        setattr(game, attribute, value)
+    # Shuffle the face down cards.
+    layout = [location[:] for location in state['layout']]
+    hidden = [(location_index, card_index) for location_index, location in enumerate(layout)
+        for card_index, (text, up) in enumerate(location) if not up]
+    hidden_text = [layout[location_index][card_index][0] for location_index, card_index in hidden]
+    rng.shuffle(hidden_text)
+    for (location_index, card_index), text in zip(hidden, hidden_text):
+        layout[location_index][card_index] = (text, False)
+    # Gather the cards back from the deal.
+    deck = game.deck
+    card_pool = {}
+    for card in deck.cards + deck.in_play:
+        card_pool.setdefault(card.rank + card.suit, []).append(card)
+    deck.cards, deck.in_play = [], []
+    # Lay the cards out as in the snapshot.
+    locations = game.tableau + game.foundations + game.reserve + [game.cells, game.stock, game.waste]
+    for location, location_layout in zip(locations, layout):
+        del location[:]
+        for text, up in location_layout:
+            card = card_pool[text].pop()
+            card.up = up
+            card.game_location = location
+            card.deck_location = deck.in_play
+            location.append(card)
+            deck.in_play.append(card)
+    # Any cards left over were discarded.
+    for text_cards in card_pool.values():
+        for card in text_cards:
+            card.game_location = deck.discards
+            card.deck_location = deck.discards
+            deck.discards.append(card)
+    game.stock_passes = state['stock-passes']
+    game.set_zobrist()
+    return game
+
+
+def estimate_wins(game, samples = SAMPLES, processes = None, seed = None, playout = None):
+    """
+    Estimate the chance of winning a solitaire game. (tuple of float)
+
+    The return value is the estimated chance of winning, and the low and high ends
+    of the 95% confidence interval for that chance.
+
+    The playout function defaults to greedy_playout. It must be defined at the
+    top level of a module, so that it can be sent to other processes.
+
+    Parameters:
+    game: The game to estimate the chance of winning for. (Solitaire)
+    samples: The number of samples to play out. (int)
+    processes: The number of processes to use, None for one per cpu. (int)
+    seed: The seed for shuffling the samples, None for a random seed. (int)
+    playout: A function that plays a sample out, returning True for a win. (callable)
+    """
+    # Set up the samples.
+    if playout is None:
+        playout = greedy_playout
+    state = snapshot(game)
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    jobs = [(state, seed + sample_index, playout) for sample_index in range(samples)]
+    # Play the samples out.
+    if processes == 1:
+        wins = sum(map(sample_playout, jobs))
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            wins = sum(pool.imap_unordered(sample_playout, jobs, chunksize = 4))
+        finally:
+            pool.close()
+            pool.join()
+    return wilson_interval(wins, samples)
+
+
+def greedy_playout(game, max_steps = MAX_STEPS):
+    """
+    Play a solitaire game out with a greedy strategy. (bool)
+
+    The best move is made each turn, skipping moves that return to a position
+    already played. If there are no such moves, cards are turned from the stock.
+    The return value is True if the game was won.
+
+    Parameters:
+    game: The game to play out. (Solitaire)
+    max_steps: The maximum number of moves to make. (int)
+    """
+    seen = set([game.position_hash])
+    target = len(game.deck.cards) + len(game.deck.in_play)
+    for step in range(max_steps):
+        # Check for a win.
+        if sum(len(foundation) for foundation in game.foundations) == target:
+            return True
+        # Make the best move that doesn't repeat a position.
+        for priority, move_stack, new_location in playout_moves(game):
+            game.transfer(move_stack, new_location)
+            if hasattr(game, 'auto_sort_check') and len(new_location) > len(move_stack):
+                # Handle games that sort whole stacks after building.
+                game.auto_sort_check()
+            if game.position_hash in seen:
+                game.do_undo('')
+            else:
+                seen.add(game.position_hash)
+                break
+        else:
+            # Turn over cards if there are no moves.
+            move_count = len(game.moves)
+            game.do_turn('')
+            if len(game.moves) == move_count or game.position_hash in seen:
+                break
+            seen.add(game.position_hash)
+    return sum(len(foundation) for foundation in game.foundations) == target
+
+
+def playout_moves(game):
+    """
+    Get the moves for the greedy strategy, best first. (list of tuple)
+
+    The moves are tuples of the priority (lower is better), the cards to move,
+    and the location to move them to. Builds that just shuffle stacks around the
+    tableau are not included.
+
+    Parameters:
+    game: The game to get moves for. (Solitaire)
+    """
+    moves = []
+    multi = isinstance(game.deck, cards.MultiTrackingDeck)
+    lane = [] in game.tableau
+    targets = [pile[-1] for pile in game.tableau if pile]
+    # Get the single cards that can be moved.
+    singles = [pile[-1] for pile in game.reserve + [game.waste] if pile] + game.cells
+    tops = singles + targets
+    # Get the sorting moves.
+    for card in tops:
+        foundations = game.find_foundation(card)
+        for foundation in (foundations if multi else [foundations]):
+            if game.sort_check(card, foundation, False):
+                moves.append((0, [card], foundation))
+                break
+    # Get the moves of single cards to the tableau.
+    for card in singles:
+        for target in targets:
+            if game.build_check(card, target, [card], False):
+                moves.append((2, [card], target.game_location))
+        if lane and game.lane_check(card, [card], False):
+            moves.append((4, [card], game.tableau[game.tableau.index([])]))
+    # Get the moves of tableau stacks.
+    for pile in game.tableau:
+        for card_index, card in enumerate(pile):
+            if not card.up:
+                continue
+            move_stack = game.super_stack(card)
+            if not move_stack:
+                continue
+            reveals = card_index and not pile[card_index - 1].up
+            for target in targets:
+                if target.game_location is not pile and game.build_check(card, target, move_stack, False):
+                    if reveals or not card_index:
+                        moves.append((1 if reveals else 3, move_stack, target.game_location))
+            if reveals and lane and game.lane_check(card, move_stack, False):
+                moves.append((3, move_stack, game.tableau[game.tableau.index([])]))
+    moves.sort(key = lambda move: move[0])
+    return moves
+
+
+def sample_playout(job):
+    """
+    Play out one sample of a game snapshot. (bool)
+
+    Parameters:
+    job: The snapshot of the game, the seed, and the playout function. (tuple)
+    """
+    state, seed, playout = job
+    return playout(determinize(state, random.Random(seed)))
+
+
+def snapshot(game):
+    """
+    Record the state of a solitaire game. (dict)
+
+    The snapshot can be passed between processes.
+
+    Parameters:
+    game: The game to record. (Solitaire)
+    """
+    locations = game.tableau + game.foundations + game.reserve + [game.cells, game.stock, game.waste]
+    layout = [[(card.rank + card.suit, card.up) for card in location] for location in locations]
+    settings = {option: setting for option, setting in game.option_set.settings.items() if option != 'bots'}
+    deal = {attribute: getattr(game, attribute) for attribute in DEAL_ATTRIBUTES if hasattr(game, attribute)}
+    return {'class': game.__class__, 'deal': deal, 'layout': layout, 'options': dict(game.options),
+        'settings': settings, 'stock-passes': game.stock_passes}
+
+
+def wilson_interval(wins, samples):
+    """
+    Calculate a confidence interval for a win rate. (tuple of float)
+
+    The return value is the win rate, and the low and high ends of the Wilson score
+    interval for it.
+
+    Parameters:
+    wins: The number of samples won. (int)
+    samples: The number of samples played. (int)
+    """
+    if not samples:
+        return 0.0, 0.0, 1.0
+    rate = wins / float(samples)
+    z_squared = Z_SCORE ** 2
+    center = (rate + z_squared / (2 * samples)) / (1 + z_squared / samples)
+    spread = Z_SCORE * math.sqrt(rate * (1 - rate) / samples + z_squared / (4 * samples ** 2))
+    spread /= 1 + z_squared / samples
+    return rate, max(0.0, center - spread), min(1.0, center + spread)
@@ -8,9 +8,11 @@ See the top level __init__.py file for details on the t_games license.
 
 Constants:
 BOT_NAMES: Names for computer opponents. (dict of str: str)
+WORKER_TABLES: Transposition tables kept by worker processes. (dict of str: list)
 
 Classes:
 BotError: An invalid play by a bot. (ValueError)
+SearchTimeout: The time for a bot's search has run out. (Exception)
 Player: The base player class. (object)
 Humanoid: A player that communicates using input and print. (Player)
 Human: A human being, with stored data. (Humanoid)
@@ -19,15 +21,20 @@ Nameless: A player with a random name. (Player)
 Bot: A full computer player. (Nameless)
 AlphaBetaBot: A robot player using alpha-beta pruning. (Bot)
 Cyborg: A computer player that is run by a person. (Nameless, Humanoid)
+
+Functions:
+search_move: Search one root move in a worker process. (int or None)
 """
 
 
 from __future__ import print_function
 
+import multiprocessing
 import os
 import random
 import re
 import string
+import time
 
 from . import utility
 
@@ -66,12 +73,19 @@ BOT_NAMES = {'a': 'Ash/Abby/Adam/Alan/Alice/Ada/Adele/Alonzo/Angus/Astro',
     'y': 'Yamina/Yasmin/Yoland/Yvette/Yadira/Yaakov/Yitzhak/Yves/Yannick/Yaron',
     'z': 'Zahara/Zelda/Zoe/Zuma/Zenaida/Zachary/Zafar/Zane/Zebulon/Zen'}
 
+WORKER_TABLES = {}
+
 
 class BotError(ValueError):
     """An invalid play by a bot. (ValueError)"""
     pass
 
 
+class SearchTimeout(Exception):
+    """The time for a bot's search has run out. (Exception)"""
+    pass
+
+
 class Player(object):
     """
     The base player class. (object)
@@ -580,42 +594,104 @@ class AlphaBetaBot(Bot):
     The AlphaBetaBot assumes you have a board game, and the board has a get_moves
     method which returns all legal moves, a copy method which returns an
     indepent copy of the board, and a check_win method that returns 'game on'
-    until the game is over.
+    until the game is over. Moves must be hashable. If the board has an
+    unmake_move method that takes back a move, the search makes and takes back
+    moves on the one board instead of copying it for each move.
+
+    If the bot has a table size and the board has a position_hash attribute that
+    is updated as moves are made, search results are stored in a transposition
+    table. Each entry holds the depth searched, whether the value is exact or a
+    bound, and the best move found. The best move is searched first when the
+    position comes up again. The table is kept from move to move, and cleared
+    at the start of each game.
+
+    If the bot has a time limit, the search method deepens the search one level
+    at a time until the time runs out or the depth is reached, and returns the
+    best move of the last search that finished. Each search starts with the best
+    move of the one before, and then tries killer moves (moves that caused a
+    cutoff at the same depth) and moves with a history of causing cutoffs.
+
+    If the bot has more than one process, the moves at the root of the search
+    are split between a pool of processes. The first move is searched first, to
+    get a bound for the others, and then the rest of the moves are sent to the
+    pool, each with the best bound found so far. For this the board must be able
+    to be pickled, and eval_board must only use the board and attributes of the
+    bot, since the bot is sent to the other processes without its game.
 
     Attributes:
-    depth: The depth of the search. (int)
+    depth: The depth of the search, or the most depth with a time limit. (int)
+    deadline: When the current search must stop, or 0 for no limit. (float)
     fudge: A fudge factor to avoid early capitulation. (int or float)
+    history: Cutoff scores for moves, for ordering moves. (dict)
+    killers: The last two moves to cause a cutoff at each ply. (dict of int: list)
+    pool: The worker processes for a parallel search. (multiprocessing.Pool)
+    processes: The number of processes to search with, None for one per cpu. (int)
+    root_depth: The depth of the current search. (int)
+    root_move: The best move of the last finished search. (object)
+    table: The transposition table. (list of tuple)
+    table_size: The number of entries in the transposition table. (int)
+    time_limit: The seconds to search for each move, or 0 for no limit. (float)
 
     Methods:
     alpha_beta: Tree search with alpha-beta pruning. (tuple)
     eval_board: Evaluate the board. (int)
+    order_moves: Sort moves by how likely they are to cause a cutoff. (list)
+    search: Search for the best move, within any time limit. (tuple)
+    split_search: Search the root moves in parallel. (tuple)
+    store_cutoff: Record a move that caused a cutoff. (None)
+    store_position: Store a search result in the transposition table. (None)
 
     Overridden Methods:
     __init__
+    __getstate__
+    clean_up
+    set_up
     """
 
-    def __init__(self, depth, fudge, taken_names = [], initial = ''):
+    def __init__(self, depth, fudge, taken_names = [], initial = '', table_size = 0, time_limit = 0,
+        processes = 1):
         """
         Set up the bot. (None)
 
         Parameters:
-        depth: The depth of the search. (int)
+        depth: The depth of the search, or the most depth with a time limit. (int)
         fudge: A fudge factor to avoid early capitulation. (int or float)
         taken_names: Names already used by a player. (list of str)
         initial: The first letter of the bot's name. (str)
+        table_size: The number of entries in the transposition table. (int)
+        time_limit: The seconds to search for each move, or 0 for no limit. (float)
+        processes: The number of processes to search with, None for one per cpu. (int)
         """
         # Do the standard initialization.
         super(AlphaBetaBot, self).__init__(taken_names, initial)
         # Initialize the alpha-beta attributes.
         self.depth = depth
         self.fudge = fudge
+        self.table_size = table_size
+        self.time_limit = time_limit
+        self.processes = processes
+        # Initialize the search tracking.
+        self.deadline = 0
+        self.history = {}
+        self.killers = {}
+        self.pool = None
+        self.root_depth = depth
+        self.root_move = None
+        self.table = [None] * table_size
+
+    def __getstate__(self):
+        """Get the bot's attributes for sending to another process. (dict)"""
+        state = self.__dict__.copy()
+        for name in ('game', 'pool', 'table'):
+            state.pop(name, None)
+        return state
 
     def alpha_beta(self, board, depth, alpha, beta, max_player):
         """
         Tree search with alpha-beta pruning. (tuple)
 
         The return value is a tuple of the best move found and the estimated board
-        value for that move.
+        value for that move. If the deadline passes, SearchTimeout is raised.
 
         Parameters:
         board: The board position at this point in the tree. (ConnectFourBoard)
@@ -624,23 +700,57 @@ class AlphaBetaBot(Bot):
         beta: The best score for the minimizing player. (int)
         max_player: Flag for evaluating the maximizing player. (int)
         """
+        # Check the time.
+        if self.deadline and time.time() > self.deadline:
+            raise SearchTimeout()
         # Initialize loops
         best_move = None
+        start_alpha, start_beta = alpha, beta
+        # Check the transposition table.
+        table_move = None
+        key = getattr(board, 'position_hash', None) if self.table_size else None
+        if key is not None:
+            entry = self.table[key % self.table_size]
+            if entry and entry[0] == key and entry[1] == max_player:
+                entry_depth, bound, value, table_move = entry[2:]
+                if entry_depth >= depth:
+                    if bound == 'exact':
+                        return table_move, value
+                    elif bound == 'lower':
+                        alpha = max(alpha, value)
+                    else:
+                        beta = min(beta, value)
+                    if beta <= alpha:
+                        return table_move, value
         # check for terminal node
         if depth == 0 or board.check_win() != 'game on':
             value = self.eval_board(board)
-            fudge = self.fudge * (self.depth - depth)
+            fudge = self.fudge * (self.root_depth - depth)
             # ?? this is meant to prevent giving up in a forced win situation. Not sure it works.
             value -= fudge
+            if key is not None:
+                self.store_position(key, max_player, depth, 'exact', value, None)
             return None, value
-        elif max_player:
+        # Search the moves most likely to cause a cutoff first.
+        if table_move is None and depth == self.root_depth:
+            table_move = self.root_move
+        moves = self.order_moves(board.get_moves(), depth, table_move)
+        unmake = hasattr(board, 'unmake_move')
+        if max_player:
             # maximize loop
             board_value = -utility.MAX_INT
-            for move in board.get_moves():
+            for move in moves:
                 # evaluate the move
-                clone = board.copy()
-                clone.make_move(move)
-                sub_move, move_value = self.alpha_beta(clone, depth - 1, alpha, beta, False)
+                if unmake:
+                    board.make_move(move)
+                    try:
+                        sub_move, move_value = self.alpha_beta(board, depth - 1, alpha, beta, False)
+                    finally:
+                        board.unmake_move(move)
+                else:
+                    clone = board.copy()
+                    clone.make_move(move)
+                    sub_move, move_value = self.alpha_beta(clone, depth - 1, alpha, beta, False)
                 # check for better move
                 if move_value > board_value:
                     board_value = move_value
@@ -648,15 +758,23 @@ class AlphaBetaBot(Bot):
                 # adjust and check alpha
                 alpha = max(alpha, board_value)
                 if beta <= alpha:
+                    self.store_cutoff(move, depth)
                     break
         else:
             # minimize loop
             board_value = utility.MAX_INT
-            for move in board.get_moves():
+            for move in moves:
                 # evaluate the move
-                clone = board.copy()
-                clone.make_move(move)
-                sub_move, move_value = self.alpha_beta(clone, depth - 1, alpha, beta, True)
+                if unmake:
+                    board.make_move(move)
+                    try:
+                        sub_move, move_value = self.alpha_beta(board, depth - 1, alpha, beta, True)
+                    finally:
+                        board.unmake_move(move)
+                else:
+                    clone = board.copy()
+                    clone.make_move(move)
+                    sub_move, move_value = self.alpha_beta(clone, depth - 1, alpha, beta, True)
                 # check for worse move
                 if move_value < board_value:
                     board_value = move_value
@@ -664,10 +782,27 @@ class AlphaBetaBot(Bot):
                 # adjust and check beta
                 beta = min(beta, board_value)
                 if beta <= alpha:
+                    self.store_cutoff(move, depth)
                     break
+        # Store the result in the transposition table.
+        if key is not None:
+            if board_value <= start_alpha:
+                bound = 'upper'
+            elif board_value >= start_beta:
+                bound = 'lower'
+            else:
+                bound = 'exact'
+            self.store_position(key, max_player, depth, bound, board_value, best_move)
         # return best move found with board value
         return best_move, board_value
 
+    def clean_up(self):
+        """Do any necessary post-game processing. (None)"""
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
     def eval_board(self, board):
         """
         Evaluate the board. (int)
@@ -677,12 +812,171 @@ class AlphaBetaBot(Bot):
         """
         return NotImplemented
 
+    def order_moves(self, moves, depth, first = None):
+        """
+        Sort moves by how likely they are to cause a cutoff. (list)
+
+        The first move goes first, then the killer moves for the depth, then the
+        rest by their history scores. Otherwise the moves stay in the same order.
+
+        Parameters:
+        moves: The legal moves. (list)
+        depth: How many more iterations of the search there should be. (int)
+        first: The move to search first. (object)
+        """
+        killers = self.killers.get(self.root_depth - depth, ())
+        history = self.history
+        return sorted(moves, key = lambda move: (move != first, move not in killers, -history.get(move, 0)))
+
+    def search(self, board):
+        """
+        Search for the best move, within any time limit. (tuple)
+
+        The return value is a tuple of the best move found and the estimated board
+        value for that move.
+
+        Parameters:
+        board: The current board position. (board.Board)
+        """
+        self.killers = {}
+        self.root_move = None
+        parallel = self.processes != 1
+        # Without a time limit, search to the full depth.
+        if not self.time_limit:
+            self.root_depth = self.depth
+            if parallel and self.depth > 1:
+                return self.split_search(board, self.depth)
+            return self.alpha_beta(board, self.depth, -utility.MAX_INT, utility.MAX_INT, True)
+        # Otherwise deepen the search until time runs out.
+        start = time.time()
+        result = None
+        for depth in range(1, self.depth + 1):
+            self.root_depth = depth
+            # Always finish the first search.
+            self.deadline = start + self.time_limit if result else 0
+            try:
+                if parallel and depth > 1:
+                    result = self.split_search(board, depth)
+                else:
+                    result = self.alpha_beta(board, depth, -utility.MAX_INT, utility.MAX_INT, True)
+            except SearchTimeout:
+                break
+            self.root_move = result[0]
+            if time.time() > start + self.time_limit:
+                break
+        self.deadline = 0
+        return result
+
+    def set_up(self):
+        """Do any necessary pre-game processing. (None)"""
+        self.history = {}
+        self.table = [None] * self.table_size
+
+    def split_search(self, board, depth):
+        """
+        Search the root moves in parallel. (tuple)
+
+        The return value is a tuple of the best move found and the estimated board
+        value for that move. If the deadline passes, SearchTimeout is raised.
+
+        Parameters:
+        board: The current board position. (board.Board)
+        depth: How many more iterations of the search there should be. (int)
+        """
+        # Search the first move here, to get a bound for the rest.
+        moves = self.order_moves(board.get_moves(), depth, self.root_move)
+        clone = board.copy()
+        clone.make_move(moves[0])
+        best_move = moves[0]
+        sub_move, alpha = self.alpha_beta(clone, depth - 1, -utility.MAX_INT, utility.MAX_INT, False)
+        # Search the rest of the moves in the pool.
+        if self.pool is None:
+            self.pool = multiprocessing.Pool(self.processes)
+        workers = self.processes or multiprocessing.cpu_count()
+        waiting, running = moves[1:], []
+        while waiting or running:
+            # Keep each worker busy, with the best bound so far.
+            while waiting and len(running) < workers:
+                move = waiting.pop(0)
+                job = (self, board, move, depth - 1, alpha)
+                running.append((move, self.pool.apply_async(search_move, (job,))))
+            # Tighten the bound with each result as it comes in.
+            running[0][1].wait(0.001)
+            for move, result in [item for item in running if item[1].ready()]:
+                running.remove((move, result))
+                value = result.get()
+                if value is None:
+                    raise SearchTimeout()
+                if value > alpha:
+                    alpha = value
+                    best_move = move
+        return best_move, alpha
+
+    def store_cutoff(self, move, depth):
+        """
+        Record a move that caused a cutoff. (None)
+
+        Parameters:
+        move: The move that caused the cutoff. (object)
+        depth: How many more iterations of the search there were. (int)
+        """
+        # Keep the last two killer moves for the ply.
+        killers = self.killers.setdefault(self.root_depth - depth, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+        # Score the move by how much of the tree the cutoff saved.
+        self.history[move] = self.history.get(move, 0) + depth * depth
+
+    def store_position(self, key, max_player, depth, bound, value, move):
+        """
+        Store a search result in the transposition table. (None)
+
+        Each position hash has one slot in the table, and the newest result for a
+        slot replaces any older one.
+
+        Parameters:
+        key: The position hash of the board. (int)
+        max_player: Flag for the maximizing player being on move. (bool)
+        depth: How many more iterations of the search there were. (int)
+        bound: 'exact', or whether the value is a 'lower' or 'upper' bound. (str)
+        value: The value of the position. (int)
+        move: The best move found in the position. (object)
+        """
+        self.table[key % self.table_size] = (key, max_player, depth, bound, value, move)
+
 
 class Cyborg(Nameless, Humanoid):
     """A computer player that is run by a person. (Nameless, Humanoid)"""
     pass
 
 
+def search_move(job):
+    """
+    Search one root move in a worker process. (int or None)
+
+    The job is the bot, the board, the move, the depth left, and the best value
+    found so far. The return value is the value of the move, or None if the
+    bot's deadline passed. Each worker process keeps a transposition table for
+    each bot, from move to move.
+
+    Parameters:
+    job: The details of the search. (tuple)
+    """
+    bot, board, move, depth, alpha = job
+    # Get the worker's table for the bot.
+    table = WORKER_TABLES.get(bot.name)
+    if table is None or len(table) != bot.table_size:
+        table = WORKER_TABLES[bot.name] = [None] * bot.table_size
+    bot.table = table
+    # Search the move.
+    board.make_move(move)
+    try:
+        return bot.alpha_beta(board, depth, alpha, utility.MAX_INT, False)[1]
+    except SearchTimeout:
+        return None
+
+
 if __name__ == '__main__':
     # Run the unit testing.
     from t_tests.player_test import *
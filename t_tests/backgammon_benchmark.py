@@ -0,0 +1,104 @@
+"""
+backgammon_benchmark.py
+
+A stress benchmark of Backgammon play generation and evaluation.
+
+An ExpectimaxBot plays games against a PubEvalBot from fixed seeds. Every move
+the ExpectimaxBot makes generates and evaluates the replies to each of its
+candidate plays for all 21 rolls, so the rate of positions searched measures
+the speed of play generation and evaluation together. The results are written
+as JSON, so that runs can be compared. From the command line (in the folder
+above t_games):
+
+    python -m t_games.t_tests.backgammon_benchmark [-c candidates] [-g games] [-o file]
+        [-s seed] [-t seconds]
+
+Copyright (C) 2018 by Craig O'Brien and the t_games contributors.
+See the top level __init__.py file for details on the t_games license.
+
+Constants:
+CANDIDATES: The default number of candidate plays searched. (int)
+GAMES: The default number of games to play. (int)
+SEED: The default seed for the dice. (int)
+TIME_LIMIT: The default search time for each move, in seconds. (float)
+
+Functions:
+run_benchmark: Benchmark searching Backgammon positions. (dict)
+"""
+
+
+from __future__ import print_function
+
+import getopt
+import json
+import platform
+import random
+import sys
+import time
+
+from t_games.board_games import backgammon_game as backgammon
+from t_games.t_tests import unitility
+
+
+CANDIDATES = 4
+
+GAMES = 2
+
+SEED = 1
+
+TIME_LIMIT = 60.0
+
+
+def run_benchmark(games = GAMES, seed = SEED, time_limit = TIME_LIMIT, candidates = CANDIDATES):
+    """
+    Benchmark searching Backgammon positions. (dict)
+
+    The default time limit is high enough that every candidate is searched, so
+    the same seed searches the same positions on every run.
+
+    Parameters:
+    games: The number of games to play. (int)
+    seed: The seed for the dice. (int)
+    time_limit: The search time for each move, in seconds. (float)
+    candidates: The number of candidate plays to search. (int)
+    """
+    random.seed(seed)
+    backgammon.PLAY_CACHE.clear()
+    game = backgammon.Backgammon(unitility.AutoBot(), 'none')
+    searcher = backgammon.ExpectimaxBot(time_limit, candidates)
+    opponent = backgammon.PubEvalBot(taken_names = [searcher.name])
+    start = time.time()
+    game.tournament([searcher, opponent], games)
+    seconds = time.time() - start
+    stats = searcher.stats
+    cache = backgammon.PLAY_CACHE
+    return {'python': platform.python_version(), 'platform': platform.platform(),
+        'numpy': backgammon.numpy is not None, 'games': games, 'seed': seed, 'time-limit': time_limit,
+        'candidates': candidates, 'seconds': seconds, 'moves': stats['moves'], 'plays': stats['plays'],
+        'positions': stats['positions'], 'search-seconds': stats['seconds'],
+        'positions-per-second': stats['positions'] / max(stats['seconds'], 1e-9),
+        'cache-hits': cache.hits, 'cache-misses': cache.misses}
+
+
+if __name__ == '__main__':
+    # Run the benchmark from the command line.
+    opts, args = getopt.getopt(sys.argv[1:], 'c:g:o:s:t:')
+    settings = {}
+    out_path = ''
+    for option, value in opts:
+        if option == '-c':
+            settings['candidates'] = int(value)
+        elif option == '-g':
+            settings['games'] = int(value)
+        elif option == '-o':
+            out_path = value
+        elif option == '-s':
+            settings['seed'] = int(value)
+        elif option == '-t':
+            settings['time_limit'] = float(value)
+    report = run_benchmark(**settings)
+    if out_path:
+        with open(out_path, 'w') as out_file:
+            json.dump(report, out_file, indent = 2, sort_keys = True)
+    else:
+        print(json.dumps(report, indent = 2, sort_keys = True))
@@ -11,6 +11,7 @@ START_TEXT_X: The starting text from the 'X' player's perspective. (str)
 
 Classes:
 BackAutoBearTest: Tests of Backgammon.auto_bear. (unittest.TestCase)
+BackBearoffTest: Tests of the one-sided bearoff database. (unittest.TestCase)
 BackBoardSetTest: A test case that can set up a board. (unittest.TestCase)
 BackBotTest: A test case of bots playing Backgammon. (unittest.TestCase)
 BackBotMatchTest: A test case of bots playing match Backgammon. (TestCase)
@@ -21,16 +22,27 @@ BackDoBearOTest: Tests of the bear command for X pieces. (unittest.TestCase)
 BackDoEnterTestO: Tests of the enter command for O pieces. (unittest.TestCase)
 BackDoEnterTestX: Tests of the enter command for X pieces. (unittest.TestCase)
 BackDoubleTest: Test handling of doubling requests. (unittest.TestCase)
+BackExpectimaxBotTest: A test case of ExpectimaxBot playing Backgammon. (TestCase)
+BackExpectimaxTest: Tests of searching the opponent's rolls. (BackBoardSetTest)
 BackGameOverTest: Test checking for Backgammon game end/final score. (TestCase)
+BackGeneticsTest: Tests of training bots with a genetic algorithm. (TestCase)
 BackGetRollsTest: Test getting the rolls from the dice. (unittest.TestCase)
 BackGetStartTest: Tests of getting the start of a move. (unittest.TestCase)
 BackGetTotalsTest: Test totalling dice in Backgammon. (unittest.TestCase)
+BackHitsTest: Tests of counting the rolls that hit blots. (BackBoardSetTest)
 BackMoveTest: Test movement on a BackgammonBoard. (unittest.TestCase)
 BackPipCountTest: Tests of BackgammonBoard.get_pip_count. (BackBoardSetTest)
+BackPlayCacheTest: Tests of the cache of legal plays. (BackBoardSetTest)
 BackPlayTest: Test backgammon play generation. (BackBoardSetTest)
+BackPositionTest: Tests of the compact Backgammon position. (BackBoardSetTest)
 BackPrintTest: Test printing a backgammon board. (unittest.TestCase)
+BackPubEvalTest: Tests of evaluating boards with PubEvalBot. (BackBoardSetTest)
+BackRolloutCommandTest: Tests of the rollout command. (unittest.TestCase)
+BackRolloutTest: Tests of rolling out positions. (BackBoardSetTest)
 BackSetUpTest: Tests of setting up the board. (unittest.TestCase)
+BackTDTest: Tests of the TD trained network and bot. (unittest.TestCase)
 BackValidateMoveTest: Test validating moves in Backgammon. (unittest.TestCase)
+BackWeightedSumsTest: Tests of scoring features with weighted_sums. (TestCase)
 
 Functions:
 make_play: Make a BackgammonPlay from a list as tuples. (BackgammonPlay)
@@ -38,10 +50,18 @@ make_play: Make a BackgammonPlay from a list as tuples. (BackgammonPlay)
 
 
 import io
+import itertools
+import os
+import random
+import shutil
+import tempfile
 import unittest
 import sys
 
+from t_games.board_games import backgammon_bearoff as bearoff
 from t_games.board_games import backgammon_game as backgammon
+from t_games.board_games import backgammon_genetics as genetics
+from t_games.board_games import backgammon_td as td
 from t_games import player
 from t_games.t_tests import unitility
 
@@ -120,6 +140,81 @@ class BackAutoBearTest(unittest.TestCase):
         self.assertEqual([3], self.game.rolls)
 
 
+class BackBearoffTest(unittest.TestCase):
+    """Tests of the one-sided bearoff database. (unittest.TestCase)"""
+
+    def setUp(self):
+        """Set up the test case. (None)"""
+        self.folder = tempfile.mkdtemp()
+        self.database = bearoff.build_database(4, os.path.join(self.folder, 'test.db'))
+        self.bearoff = backgammon.BEAROFF
+        backgammon.BEAROFF = self.database
+        self.human = unitility.AutoBot()
+        self.game = backgammon.Backgammon(self.human, 'none')
+        self.game.layout = ((5, 2),)
+        self.game.set_up()
+        self.game.player_index = self.game.players.index(self.human)
+        self.bot = self.game.bot
+        self.bot.set_up()
+
+    def tearDown(self):
+        """Clean up after the test. (None)"""
+        backgammon.BEAROFF = self.bearoff
+        self.database.close()
+        shutil.rmtree(self.folder)
+
+    def testBotPlay(self):
+        """Test the bot bearing off a piece rather than spreading its pieces."""
+        self.game.rolls = [4, 1]
+        play = self.bot.get_endgame(self.game.board, [5, 5])
+        for move in play:
+            self.game.board.move(*move[:2], piece = 'O')
+        self.assertEqual((0, 0, 0, 0, 1, 0), self.game.board.get_bearoff_position('O'))
+
+    def testContains(self):
+        """Test positions with too many pieces not being in the database."""
+        contains = [(0, 1, 0, 3, 0, 0) in self.database, (0, 5, 0, 0, 0, 0) in self.database]
+        self.assertEqual([True, False], contains)
+
+    def testIndex(self):
+        """Test that the positions are numbered in order without gaps."""
+        positions = [position for position in itertools.product(range(5), repeat = 6)
+            if sum(position) <= 4]
+        indexes = sorted(bearoff.position_index(position) for position in positions)
+        self.assertEqual(list(range(len(self.database))), indexes)
+
+    def testLookup(self):
+        """Test the distribution for one piece on the six point."""
+        expected, chances = self.database.lookup((0, 0, 0, 0, 0, 1))
+        self.assertAlmostEqual(0.75, chances[1], places = 4)
+        self.assertAlmostEqual(1, sum(chances), places = 4)
+        mean = sum(rolls * chance for rolls, chance in enumerate(chances))
+        self.assertAlmostEqual(mean, expected, places = 4)
+
+    def testMissing(self):
+        """Test loading a database that has not been built."""
+        self.assertIsNone(bearoff.load_database(os.path.join(self.folder, 'missing.db')))
+
+    def testNotHome(self):
+        """Test getting the bearoff position of pieces outside of home."""
+        self.game.board.move(20, 8)
+        self.assertIsNone(self.game.board.get_bearoff_position('O'))
+
+    def testPips(self):
+        """Test showing the race equity with the pip counts."""
+        self.game.do_pips('')
+        self.assertEqual('Race equity: 0.600 (80.0% to win)\n', self.human.info[-1])
+
+    def testPosition(self):
+        """Test getting a bearoff position from the board."""
+        self.assertEqual((0, 0, 0, 0, 2, 0), self.game.board.get_bearoff_position('X'))
+
+    def testWinChance(self):
+        """Test the chance of winning a race."""
+        chance = self.database.win_chance((0, 0, 0, 0, 0, 1), (1, 0, 0, 0, 0, 0))
+        self.assertAlmostEqual(0.75, chance, places = 4)
+
+
 class BackBoardSetTest(unittest.TestCase):
     """A test case that can set up a board. (unittest.TestCase)"""
 
@@ -871,6 +966,90 @@ class BackDoubleTest(unittest.TestCase):
         self.assertEqual('You won the match. :)\n', self.bot_x.info[-1])
 
 
+BackExpectimaxBotTest = unitility.bot_test(backgammon.Backgammon, [backgammon.ExpectimaxBot,
+    backgammon.PubEvalBot], 1, [2], bot_params = [(0.02,), ()])
+
+
+class BackExpectimaxTest(BackBoardSetTest):
+    """Tests of searching the opponent's rolls. (BackBoardSetTest)"""
+
+    def setUp(self):
+        """Set up the test case. (None)"""
+        self.bot = backgammon.ExpectimaxBot(time_limit = 60)
+        self.bot.piece = 'X'
+        self.setBoard(moves = [(1, 3), (6, 3), (6, 4)], bar = ['O'])
+        self.board.cells[OUT].contents = ['X', 'O', 'O']
+
+    def testChoose(self):
+        """Test choosing a legal play."""
+        plays = self.board.get_plays('X', [6, 1])
+        self.assertIn(self.bot.choose_play(self.board, plays), plays)
+        self.assertEqual(min(len(plays), self.bot.max_candidates), self.bot.stats['plays'])
+
+    def testDeadline(self):
+        """Test giving up the search when the time runs out."""
+        position = backgammon.BackgammonPosition(self.board)
+        self.assertIsNone(self.bot.expected_score(position, 1, 0))
+
+    def testEvaluatorBot(self):
+        """Test scoring the leaves with a bot's board evaluation."""
+        self.bot.evaluator = backgammon.AdditiveBot()
+        plays = self.board.get_plays('X', [6, 1])
+        self.assertIn(self.bot.choose_play(self.board, plays), plays)
+
+    def testEvaluatorFunction(self):
+        """Test scoring the leaves with a function."""
+        calls = []
+        def pip_score(positions, piece):
+            calls.append(piece)
+            return [-sum(men for men in position.points if men > 0) for position in positions]
+        self.bot.evaluator = pip_score
+        plays = self.board.get_plays('X', [6, 1])
+        self.assertIn(self.bot.choose_play(self.board, plays), plays)
+        self.assertEqual(set(['X']), set(calls))
+
+    def testGetBoard(self):
+        """Test making a board from a position."""
+        self.board.count_pieces()
+        check = backgammon.BackgammonPosition(self.board).get_board()
+        locations = [BAR, OUT] + list(range(1, 25))
+        self.assertEqual([self.board.cells[location].contents for location in locations],
+            [check.cells[location].contents for location in locations])
+        self.assertEqual(self.board.pips, check.pips)
+
+    def testLoss(self):
+        """Test scoring the opponent bearing off their last piece as a loss."""
+        position = backgammon.BackgammonPosition()
+        position.off = {1: 14, -1: 15}
+        position.points[1] = 1
+        self.assertEqual([-backgammon.utility.MAX_INT], self.bot.score_positions([position]))
+
+    def testLossShortLayout(self):
+        """Test scoring a loss in a game with fewer than 15 pieces each."""
+        self.bot.game = backgammon.Backgammon(unitility.AutoBot(), 'layout = hyper')
+        self.bot.game.set_up()
+        position = backgammon.BackgammonPosition()
+        position.off = {1: 2, -1: 3}
+        position.points[1] = 1
+        self.assertEqual([-backgammon.utility.MAX_INT], self.bot.score_positions([position]))
+
+    def testPubPositionO(self):
+        """Test the pubeval vector of a position for O."""
+        self.bot.piece = 'O'
+        check = self.bot.get_position(self.board)
+        self.assertEqual(check, self.bot.get_pub_position(backgammon.BackgammonPosition(self.board)))
+
+    def testPubPositionX(self):
+        """Test the pubeval vector of a position for X."""
+        check = self.bot.get_position(self.board)
+        self.assertEqual(check, self.bot.get_pub_position(backgammon.BackgammonPosition(self.board)))
+
+    def testRolls(self):
+        """Test the chances of the distinct rolls."""
+        total = sum(chances for rolls, chances in backgammon.ROLLS)
+        self.assertEqual((21, 36), (len(backgammon.ROLLS), total))
+
+
 class BackGameOverTest(unittest.TestCase):
     """Test checking for Backgammon game end and final score. (unittest.TestCase)"""
 
@@ -1038,6 +1217,82 @@ class BackGameOverTest(unittest.TestCase):
         self.assertEqual([1, 0, 0], self.game.win_loss_draw)
 
 
+class BackGeneticsTest(unittest.TestCase):
+    """Tests of training bots with a genetic algorithm. (unittest.TestCase)"""
+
+    def setUp(self):
+        """Set up the test case. (None)"""
+        self.rng = random.Random(1)
+        self.mother = genetics.random_vectors(self.rng)
+        self.father = genetics.random_vectors(self.rng)
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Clean up after the test. (None)"""
+        shutil.rmtree(self.folder)
+
+    def testCheckpoint(self):
+        """Test writing and reading a checkpoint."""
+        genetics.save_checkpoint(self.folder, 0, 5, [self.mother], [0])
+        genetics.save_checkpoint(self.folder, 1, 5, [self.mother, self.father], [2, -2])
+        checkpoint = genetics.load_checkpoint(self.folder)
+        check = {'generation': 1, 'seed': 5, 'population': [self.mother, self.father], 'scores': [2, -2]}
+        self.assertEqual(check, checkpoint)
+
+    def testCheckpointNone(self):
+        """Test reading a checkpoint from an empty folder."""
+        self.assertIsNone(genetics.load_checkpoint(self.folder))
+
+    def testCrossover(self):
+        """Test that crossover takes each weight from a parent."""
+        child = genetics.crossover(self.mother, self.father, self.rng)
+        for phase in backgammon.BackGeneBot.phases:
+            for weight, mother, father in zip(child[phase], self.mother[phase], self.father[phase]):
+                self.assertIn(weight, (mother, father))
+
+    def testExport(self):
+        """Test that an exported bot uses the exported weights."""
+        namespace = {'AdditiveBot': backgammon.AdditiveBot}
+        exec(genetics.export_bot(self.mother, 'TestBot'), namespace)
+        bot = namespace['TestBot']()
+        self.assertEqual(self.mother, bot.vectors)
+
+    def testMatch(self):
+        """Test that a match is repeatable from its seed."""
+        job = (self.mother, self.father, 2, 7)
+        self.assertEqual(genetics.play_match(job), genetics.play_match(job))
+
+    def testMutateClamp(self):
+        """Test that mutated weights stay in range."""
+        mutant = genetics.mutate(self.mother, self.rng, rate = 1, size = 1000)
+        for phase in backgammon.BackGeneBot.phases:
+            low, high = genetics.WEIGHT_RANGES[phase]
+            self.assertTrue(all(low <= weight <= high for weight in mutant[phase]))
+
+    def testMutateRate(self):
+        """Test that no weights change with a mutation rate of zero."""
+        self.assertEqual(self.mother, genetics.mutate(self.mother, self.rng, rate = 0))
+
+    def testNextGeneration(self):
+        """Test that the best members survive to the next generation."""
+        population = [self.mother, self.father] + [genetics.random_vectors(self.rng) for dummy in range(4)]
+        children = genetics.next_generation(population, [0, 5, 0, 0, 9, 0], self.rng)
+        self.assertEqual([population[4], population[1]], children[:2])
+        self.assertEqual(6, len(children))
+
+    def testResume(self):
+        """Test that resuming from a checkpoint matches training without stopping."""
+        genetics.train(1, 4, 1, 1, 3, self.folder)
+        resumed = genetics.train(2, 4, 1, 1, 3, self.folder)
+        other_folder = os.path.join(self.folder, 'other')
+        self.assertEqual(genetics.train(2, 4, 1, 1, 3, other_folder), resumed)
+
+    def testScores(self):
+        """Test that round robin scores balance out."""
+        population = [self.mother, self.father, genetics.random_vectors(self.rng)]
+        self.assertEqual(0, sum(genetics.score_population(population, 1, 1)))
+
+
 class BackGetRollsTest(unittest.TestCase):
     """Test getting the rolls from the dice. (unittest.TestCase)"""
 
@@ -1160,6 +1415,70 @@ class BackGetTotalsTest(unittest.TestCase):
         self.assertEqual({4: [4], 8: [4, 4], 12: [4, 4, 4], 16: [4, 4, 4, 4]}, self.game.get_totals())
 
 
+class BackHitsTest(BackBoardSetTest):
+    """Tests of counting the rolls that hit blots. (BackBoardSetTest)"""
+
+    def setUp(self):
+        """Set up the test case. (None)"""
+        self.bot = backgammon.BackgammonBot()
+        self.setBoard(layout = ())
+        self.board.cells[10].contents = ['X']
+        self.blots = {'X': [10], 'O': []}
+
+    def testBar(self):
+        """Test hits from a piece on the bar."""
+        self.board.cells[10].contents = []
+        self.board.cells[4].contents = ['X']
+        self.board.cells[BAR].contents = ['O']
+        direct, indirect = self.bot.calculate_hits(self.board, {'X': [4], 'O': []})
+        self.assertEqual((11, 15), (direct['X'], indirect['X']))
+
+    def testBlocked(self):
+        """Test combinations stopping on held points not hitting."""
+        self.board.cells[7].contents = ['O']
+        self.board.cells[8].contents = ['X', 'X']
+        self.board.cells[9].contents = ['X', 'X']
+        direct, indirect = self.bot.calculate_hits(self.board, self.blots)
+        self.assertEqual((11, 11), (direct['X'], indirect['X']))
+
+    def testCombined(self):
+        """Test hits that need both dice."""
+        self.board.cells[2].contents = ['O', 'O']
+        direct, indirect = self.bot.calculate_hits(self.board, self.blots)
+        self.assertEqual((0, 6), (direct['X'], indirect['X']))
+
+    def testDescribeBoard(self):
+        """Test the board features keeping the hits out of 36 rolls."""
+        self.setBoard(layout = ((10, 1), (20, 1)), moves = [(15, 7), (5, 7)])
+        self.bot.piece = 'O'
+        features, points = self.bot.describe_board(self.board)
+        self.assertEqual([11, 14], features[3:5])
+
+    def testDirect(self):
+        """Test hits from a piece three points away."""
+        self.board.cells[7].contents = ['O']
+        direct, indirect = self.bot.calculate_hits(self.board, self.blots)
+        self.assertEqual((11, 14), (direct['X'], indirect['X']))
+
+    def testShotTable(self):
+        """Test the number of rolls hitting at each distance."""
+        counts = []
+        for shots in backgammon.SHOT_TABLE[1:]:
+            rolls = 0
+            for roll_bits, steps in shots:
+                rolls |= roll_bits
+            counts.append(bin(rolls).count('1'))
+        check = [11, 12, 14, 15, 15, 17, 6, 6, 5, 3, 2, 3, 0, 0, 1, 1, 0, 1, 0, 1, 0, 0, 0, 1]
+        self.assertEqual(check, counts)
+
+    def testUnion(self):
+        """Test rolls hitting from two pieces only counting once."""
+        self.board.cells[7].contents = ['O']
+        self.board.cells[6].contents = ['O']
+        direct, indirect = self.bot.calculate_hits(self.board, self.blots)
+        self.assertEqual((20, 24), (direct['X'], indirect['X']))
+
+
 class BackMoveTest(unittest.TestCase):
     """Test movement on a BackgammonBoard. (TestCase)"""
     # Most of this should be covered by board_test.LineBoardTest.
@@ -1198,6 +1517,40 @@ class BackMoveTest(unittest.TestCase):
         self.assertEqual(['O'], self.board.cells[7].contents)
         self.assertEqual(['X'], self.board.cells[BAR].contents)
 
+    def testCopyTracking(self):
+        """Test that moves on a copy don't change the original's tracking."""
+        clone = self.board.copy()
+        clone.move(13, 7)
+        self.assertEqual((set(), set([6, 8, 13, 24])), (self.board.blots['X'], self.board.made['X']))
+        self.assertEqual((set([7]), set([6, 8, 13, 24])), (clone.blots['X'], clone.made['X']))
+
+    def testCountPieces(self):
+        """Test recounting after changing the pieces directly."""
+        self.board.cells[24].contents = ['X']
+        self.board.cells[BAR].contents = ['X']
+        self.board.count_pieces()
+        self.assertEqual(({'X': 1, 'O': 0}, set([24])), (self.board.bar, self.board.blots['X']))
+        self.assertEqual(168, self.board.pips['X'])
+
+    def testOffset(self):
+        """Test finding the cell an offset away with the shared offset tables."""
+        self.board.move(13, 7)
+        self.assertEqual(['X'], self.board.offset(13, -6).contents)
+        self.assertRaises(KeyError, self.board.offset, 3, -3)
+
+    def testTrackBlots(self):
+        """Test tracking blots and made points."""
+        self.board.move(13, 7)
+        self.board.move(8, 7)
+        self.assertEqual((set(), set([6, 7, 8, 13, 24])), (self.board.blots['X'], self.board.made['X']))
+
+    def testTrackCapture(self):
+        """Test tracking a capture."""
+        self.board.move(13, 7)
+        self.board.move(1, 7)
+        self.assertEqual({'X': 1, 'O': 0}, self.board.bar)
+        self.assertEqual((set([1, 7]), set()), (self.board.blots['O'], self.board.blots['X']))
+
 
 class BackPipCountTest(BackBoardSetTest):
     """Tests of BackgammonBoard.get_pip_count. (BackBoardSetTest)"""
@@ -1206,6 +1559,11 @@ class BackPipCountTest(BackBoardSetTest):
         """Get both pip counts at the same time. (tuple of int)"""
         return (self.board.get_pip_count('X'), self.board.get_pip_count('O'))
 
+    def testEnter(self):
+        """Test the pip counts after a piece is hit and enters."""
+        self.setBoard(moves = [(13, 7), (1, 7), (BAR, 20)])
+        self.assertEqual((174, 161), self.getDoublePip())
+
     def testHyper(self):
         """Test the pip counts at the beginning of hypergammon."""
         self.setBoard(layout = ((24, 1), (23, 1), (22, 1)))
@@ -1227,6 +1585,48 @@ class BackPipCountTest(BackBoardSetTest):
         self.assertEqual((167, 167), self.getDoublePip())
 
 
+class BackPlayCacheTest(BackBoardSetTest):
+    """Tests of the cache of legal plays. (BackBoardSetTest)"""
+
+    def setUp(self):
+        """Set up the test case. (None)"""
+        self.cache = backgammon.PlayCache(max_size = 2)
+        self.setBoard()
+
+    def getPlays(self, piece = 'O', rolls = [6, 5]):
+        """Get the plays for the board from the test cache. (list of BackgammonPlay)"""
+        return self.cache.get_plays(backgammon.BackgammonPosition(self.board), piece, rolls)
+
+    def testCopies(self):
+        """Test that using up the moves in a play does not change the cache."""
+        plays = self.getPlays()
+        for play in plays:
+            while play:
+                play.next_move()
+        self.assertTrue(all(self.getPlays()))
+
+    def testEvict(self):
+        """Test that the least recently used plays are removed first."""
+        self.getPlays()
+        self.getPlays(rolls = [1, 2])
+        self.getPlays()
+        self.getPlays(rolls = [3, 4])
+        self.getPlays()
+        self.getPlays(rolls = [1, 2])
+        self.assertEqual((2, 4), (self.cache.hits, self.cache.misses))
+
+    def testHit(self):
+        """Test finding plays in the cache."""
+        first = self.getPlays()
+        self.assertEqual(first, self.getPlays(rolls = [5, 6]))
+        self.assertEqual((1, 1), (self.cache.hits, self.cache.misses))
+
+    def testPiece(self):
+        """Test that plays are stored separately for each piece."""
+        self.assertNotEqual(set(self.getPlays()), set(self.getPlays(piece = 'X')))
+        self.assertEqual((0, 2), (self.cache.hits, self.cache.misses))
+
+
 class BackPlayTest(BackBoardSetTest):
     """Test backgammon play generation. (BackBoardSetTest)"""
 
@@ -1291,6 +1691,25 @@ class BackPlayTest(BackBoardSetTest):
         check = set(check)
         self.assertEqual(check, self.legal_moves)
 
+    def testDoublesOrder(self):
+        """Test that doubles are played with pieces farther back moving first."""
+        self.setBoard(rolls = [1, 1, 1, 1])
+        self.assertTrue(self.legal_moves)
+        for play in self.legal_moves:
+            starts = [start for start, end in play]
+            self.assertEqual(sorted(starts), starts)
+
+    def testDoublesUnique(self):
+        """Test that doubles have one play to each resulting position."""
+        self.setBoard(rolls = [2, 2, 2, 2])
+        positions = []
+        for play in self.board.get_plays('O', [2, 2, 2, 2]):
+            position = backgammon.BackgammonPosition(self.board)
+            for start, end, roll in play.moves:
+                position.make_move(0 if start == BAR else start, end, -1)
+            positions.append(tuple(position.points))
+        self.assertEqual(len(set(positions)), len(positions))
+
     def testDoublesStr(self):
         """Test human readable representation of move with doubles."""
         play = backgammon.BackgammonPlay(13, 7, 6)
@@ -1377,6 +1796,64 @@ class BackPlayTest(BackBoardSetTest):
         self.assertEqual(set(check), self.legal_moves)
 
 
+class BackPositionTest(BackBoardSetTest):
+    """Tests of the compact Backgammon position. (BackBoardSetTest)"""
+
+    def testBar(self):
+        """Test reading pieces on the bar from a board."""
+        self.setBoard(bar = ['X', 'O', 'O'])
+        position = backgammon.BackgammonPosition(self.board)
+        self.assertEqual((1, -2), (position.points[25], position.points[0]))
+
+    def testHitO(self):
+        """Test O hitting an X piece."""
+        self.setBoard(moves = [(6, 5)])
+        position = backgammon.BackgammonPosition(self.board)
+        self.assertTrue(position.make_move(1, 5, -1))
+        self.assertEqual((-1, 1), (position.points[5], position.points[25]))
+
+    def testHitX(self):
+        """Test X hitting an O piece."""
+        self.setBoard(moves = [(1, 3)])
+        position = backgammon.BackgammonPosition(self.board)
+        self.assertTrue(position.make_move(6, 3, 1))
+        self.assertEqual((1, -1), (position.points[3], position.points[0]))
+
+    def testOff(self):
+        """Test reading born off pieces from a board."""
+        self.setBoard(layout = ((1, 4), (2, 2), (3, 2)), moves = [(23, OUT), (24, OUT)])
+        position = backgammon.BackgammonPosition(self.board)
+        self.assertEqual({1: 0, -1: 2}, position.off)
+
+    def testStart(self):
+        """Test reading the starting position from a board."""
+        self.setBoard()
+        position = backgammon.BackgammonPosition(self.board)
+        check = [0, -2, 0, 0, 0, 0, 5, 0, 3, 0, 0, 0, -5, 5, 0, 0, 0, -3, 0, -5, 0, 0, 0, 0, 2, 0]
+        self.assertEqual(check, position.points)
+
+    def testUnmake(self):
+        """Test that unmaking moves restores the position."""
+        self.setBoard(moves = [(1, 3)], bar = ['X'])
+        position = backgammon.BackgammonPosition(self.board)
+        points, off = position.points[:], dict(position.off)
+        moves = [(25, 22, 1), (6, 3, 1), (22, 16, 1), (3, OUT, 1), (0, 2, -1), (24, 21, -1)]
+        hits = [position.make_move(*move) for move in moves]
+        for move, hit in reversed(list(zip(moves, hits))):
+            position.unmake_move(move[0], move[1], move[2], hit)
+        self.assertEqual((points, off), (position.points, position.off))
+
+    def testUnmakePlay(self):
+        """Test that taking back a play restores the position."""
+        self.setBoard(moves = [(6, 3)], bar = ['O'])
+        position = backgammon.BackgammonPosition(self.board)
+        check = position.points[:]
+        for play in self.board.get_plays('O', [3, 5]):
+            hits = position.make_play(play, -1)
+            position.unmake_play(play, -1, hits)
+            self.assertEqual(check, position.points)
+
+
 class BackPrintTest(unittest.TestCase):
     """Test printing of the board on the screen. (TestCase)"""
 
@@ -1454,6 +1931,98 @@ class BackPrintTest(unittest.TestCase):
         self.assertEqual(check, self.board.get_text('X'))
 
 
+class BackPubEvalTest(BackBoardSetTest):
+    """Tests of evaluating boards with PubEvalBot. (BackBoardSetTest)"""
+
+    def setUp(self):
+        """Set up the test case. (None)"""
+        self.bot = backgammon.PubEvalBot()
+        self.bot.piece = 'X'
+
+    def testBatch(self):
+        """Test evaluating boards together against evaluating them one at a time."""
+        self.setBoard()
+        boards = [self.board]
+        self.setBoard(layout = ((1, 5), (2, 5), (3, 5)))
+        boards.append(self.board)
+        checks = [self.bot.eval_board(board) for board in boards]
+        for score, check in zip(self.bot.eval_boards(boards), checks):
+            self.assertAlmostEqual(check, score)
+
+    def testWin(self):
+        """Test evaluating a board with all of the bot's pieces born off."""
+        self.setBoard(layout = ((1, 1),), moves = [(1, OUT)])
+        self.board.cells[OUT].contents = ['X'] * 15
+        self.assertEqual([backgammon.utility.MAX_INT], self.bot.eval_boards([self.board]))
+
+
+class BackRolloutCommandTest(unittest.TestCase):
+    """Tests of the rollout command. (unittest.TestCase)"""
+
+    def setUp(self):
+        self.bot = unitility.AutoBot()
+        self.game = backgammon.Backgammon(self.bot, 'none')
+        self.game.layout = ((1, 1),)
+        self.game.set_up()
+        self.game.player_index = self.game.players.index(self.bot)
+
+    def testInvalid(self):
+        """Test a rollout with an invalid number of trials."""
+        self.game.do_rollout('many')
+        self.assertEqual(["\nInvalid number of trials: 'many'.\n"], self.bot.errors)
+
+    def testResults(self):
+        """Test the text of the rollout results."""
+        self.game.do_rollout('36')
+        self.assertEqual('Win: 100.0% (gammon 100.0%, backgammon 0.0%)\n', self.bot.info[-3])
+
+
+class BackRolloutTest(BackBoardSetTest):
+    """Tests of rolling out positions. (BackBoardSetTest)"""
+
+    def testBackgammon(self):
+        """Test winning a backgammon."""
+        self.setBoard(layout = ((1, 1),), bar = ['O'])
+        results = backgammon.rollout(self.board, 'X', 36, processes = 1, seed = 1)
+        self.assertEqual((1.0, 1.0, 1.0, 3.0), (results['win'], results['gammon'], results['backgammon'],
+            results['equity']))
+
+    def testDoubleTooGood(self):
+        """Test playing on for a gammon instead of doubling."""
+        self.assertFalse(backgammon.should_double({'equity': 1.5}))
+
+    def testDoubleWeak(self):
+        """Test not doubling a weak position."""
+        self.assertFalse(backgammon.should_double({'equity': 0.1}))
+
+    def testGammon(self):
+        """Test winning a gammon."""
+        self.setBoard(layout = ((1, 1),))
+        results = backgammon.rollout(self.board, 'X', 36, processes = 1, seed = 1)
+        self.assertEqual((1.0, 1.0, 0.0, 2.0), (results['win'], results['gammon'], results['backgammon'],
+            results['equity']))
+
+    def testLoss(self):
+        """Test the results for the player losing the race."""
+        self.setBoard(layout = ((1, 1),), moves = [(1, 23)])
+        results = backgammon.rollout(self.board, 'X', 36, processes = 1, seed = 1)
+        self.assertEqual((1, 35), (results['win'] * 36, results['lose-gammon'] * 36))
+
+    def testSeed(self):
+        """Test that rollouts with the same seed match."""
+        self.setBoard(layout = ((1, 3), (3, 2), (5, 2)))
+        first = backgammon.rollout(self.board, 'X', 72, processes = 1, seed = 5)
+        self.assertEqual(first, backgammon.rollout(self.board, 'X', 72, processes = 1, seed = 5))
+
+    def testTake(self):
+        """Test taking a double."""
+        self.assertTrue(backgammon.should_take({'equity': 0.4}))
+
+    def testTakeDrop(self):
+        """Test refusing a double."""
+        self.assertFalse(backgammon.should_take({'equity': 0.7}))
+
+
 class BackSetUpTest(unittest.TestCase):
     """Tests of setting up the board. (unittest.TestCase)"""
 
@@ -1477,6 +2046,93 @@ class BackSetUpTest(unittest.TestCase):
         self.assertEqual(['O'] * 3, self.board.cells[17].contents)
 
 
+class BackTDTest(unittest.TestCase):
+    """Tests of the TD trained network and bot. (unittest.TestCase)"""
+
+    def setUp(self):
+        """Set up the test case. (None)"""
+        if backgammon.numpy is None:
+            self.skipTest('NumPy is not installed.')
+        self.network = backgammon.TDNetwork(8, seed = 1)
+        self.bot = backgammon.TDBot(self.network)
+        self.bot.piece = 'X'
+        board = backgammon.BackgammonBoard()
+        self.vectors = [self.bot.set_vector(self.bot.get_position(board))]
+        board.move(13, 7)
+        self.vectors.append(self.bot.set_vector(self.bot.get_position(board)))
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Clean up after the test. (None)"""
+        shutil.rmtree(self.folder)
+
+    def testBatch(self):
+        """Test that batched scores match scoring one vector at a time."""
+        scores = self.network.evaluate(self.vectors)
+        for score, vector in zip(scores, self.vectors):
+            self.assertAlmostEqual(self.network.gradients(vector)[0], score)
+
+    def testGame(self):
+        """Test TDBot playing a game against PubEvalBot."""
+        game = backgammon.Backgammon(unitility.AutoBot(), 'none')
+        results = game.tournament([self.bot, backgammon.PubEvalBot(taken_names = [self.bot.name])], 1)
+        self.assertEqual(1, sum(sum(scores) > 0 for scores in results['scores'].values()))
+
+    def testGradients(self):
+        """Test the gradients against a numerical estimate."""
+        value, gradients = self.network.gradients(self.vectors[1])
+        for parameter, gradient in zip(self.network.parameters, gradients):
+            index = int(abs(gradient).argmax())
+            parameter.flat[index] += 1e-6
+            change = (self.network.gradients(self.vectors[1])[0] - value) / 1e-6
+            parameter.flat[index] -= 1e-6
+            self.assertAlmostEqual(gradient.flat[index], change, places = 5)
+
+    def testNoNetwork(self):
+        """Test TDBot without a network scoring like PubEvalBot."""
+        bot = backgammon.TDBot()
+        bot.network = None
+        pub_bot = backgammon.PubEvalBot()
+        for bot_piece in (bot, pub_bot):
+            bot_piece.piece = 'X'
+        position = self.bot.get_position(backgammon.BackgammonBoard())
+        self.assertEqual(pub_bot.eval_positions([position]), bot.eval_positions([position]))
+
+    def testSave(self):
+        """Test saving and loading a network."""
+        self.network.games = 12
+        path = os.path.join(self.folder, 'test.npz')
+        self.network.save(path)
+        network = backgammon.load_network(path)
+        self.assertEqual(12, network.games)
+        for score, check in zip(network.evaluate(self.vectors), self.network.evaluate(self.vectors)):
+            self.assertAlmostEqual(check, score, places = 5)
+
+    def testSaveMissing(self):
+        """Test loading a network that has not been saved."""
+        self.assertIsNone(backgammon.load_network(os.path.join(self.folder, 'missing.npz')))
+
+    def testSelfPlay(self):
+        """Test a game of self-play training the network."""
+        before = self.network.evaluate(self.vectors)
+        winner = td.self_play(self.network, random.Random(1))
+        self.assertIn(winner, (1, -1))
+        self.assertEqual(1, self.network.games)
+        self.assertNotAlmostEqual(before[0], self.network.evaluate(self.vectors)[0])
+
+    def testWin(self):
+        """Test the score of a won position."""
+        position = [0] * 26 + [15, 0]
+        self.assertEqual([1.0], self.bot.eval_positions([position]))
+
+    def testWinShortLayout(self):
+        """Test the score of a won position with fewer than 15 pieces."""
+        self.bot.game = backgammon.Backgammon(unitility.AutoBot(), 'layout = hyper')
+        self.bot.game.set_up()
+        position = [0] * 26 + [3, 0]
+        self.assertEqual([1.0], self.bot.eval_positions([position]))
+
+
 class BackValidateMoveTest(unittest.TestCase):
     """Test validating moves in Backgammon. (unittest.TestCase)"""
 
@@ -1622,6 +2278,54 @@ class BackValidateMoveTest(unittest.TestCase):
         self.assertEqual((1, 1, 1, 1), steps)
 
 
+class BackWeightedSumsTest(unittest.TestCase):
+    """Tests of scoring features with weighted_sums. (unittest.TestCase)"""
+
+    def setUp(self):
+        """Set up the test case. (None)"""
+        self.numpy = backgammon.numpy
+        self.rows = [[1, 2, 3], [0, -1, 4], [2, 2, 2]]
+        self.weights = [0.5, -1, 2]
+
+    def tearDown(self):
+        """Clean up after the test. (None)"""
+        backgammon.numpy = self.numpy
+
+    def testEmpty(self):
+        """Test scoring no rows."""
+        self.assertEqual([], backgammon.weighted_sums([], self.weights))
+
+    def testFeatureScales(self):
+        """Test the shot weights being scaled to sixths of the rolls."""
+        backgammon.numpy = None
+        features = [0, 0, 0, 12, 18, 0, 0, 1]
+        vectors = {'mixed': [1, 1, 1, 2, 3, 1, 1, 1]}
+        self.assertAlmostEqual(14, backgammon.phase_sums([features], ['mixed'], vectors)[0])
+        bot = backgammon.AdditiveBot()
+        bot.vectors = vectors
+        self.assertAlmostEqual(14, bot.eval_board(features, 'mixed'))
+
+    def testNumPy(self):
+        """Test scoring rows with NumPy, if it is installed."""
+        if self.numpy is None:
+            self.skipTest('NumPy is not installed.')
+        scores = backgammon.weighted_sums(self.rows, self.weights)
+        for score, check in zip(scores, [4.5, 9, 3]):
+            self.assertAlmostEqual(check, score)
+
+    def testPhases(self):
+        """Test scoring rows against the weights for their phases."""
+        backgammon.numpy = None
+        vectors = {'mixed': self.weights, 'race': [1, 1, 1]}
+        scores = backgammon.phase_sums(self.rows, ['mixed', 'race', 'mixed'], vectors)
+        self.assertEqual([4.5, 3, 3], scores)
+
+    def testPython(self):
+        """Test scoring rows without NumPy."""
+        backgammon.numpy = None
+        self.assertEqual([4.5, 9, 3], backgammon.weighted_sums(self.rows, self.weights))
+
+
 def make_play(moves):
     """
     Make a BackgammonPlay from a list of moves as tuples. (BackgammonPlay)
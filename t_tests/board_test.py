@@ -84,6 +84,14 @@ class BoardTest(unittest.TestCase):
         """Test the value of an offset."""
         self.assertEqual(4, self.board.offset(2, 2).location)
 
+    def testOffsetOff(self):
+        """Test an offset off of the board."""
+        self.assertRaises(KeyError, self.board.offset, 4, 1)
+
+    def testOffsetTable(self):
+        """Test the indexes in an offset table."""
+        self.assertEqual([1, 2, 3, 4, board.NO_CELL], self.board.offset_table(1))
+
     def testPlaceEmpty(self):
         """Test placing a piece on an empty spot."""
         self.board.place(3, '?')
@@ -331,6 +339,10 @@ class DimBoardTest(unittest.TestCase):
         self.board.place((1, 2), '@')
         self.board.place((3, 2), '&')
 
+    def testCellList(self):
+        """Test the cells by index being the cells by location."""
+        self.assertIs(self.board.cells[(2, 3)], self.board.cell_list[self.board.location_index[(2, 3)]])
+
     def testCopyIndependence(self):
         """Test the indenpendence of a copy of the board."""
         new_board = self.board.copy()
@@ -343,12 +355,25 @@ class DimBoardTest(unittest.TestCase):
         new_board = self.board.copy()
         self.assertEqual(new_board.cells, self.board.cells)
 
+    def testLayoutShared(self):
+        """Test boards of the same size sharing offset tables."""
+        self.assertIs(self.board.offset_tables, self.board.copy().offset_tables)
+
     def testLocations(self):
         """Test the locations of a dim board."""
         check = [(1, 1), (1, 2), (1, 3), (2, 1), (2, 2), (2, 3), (3, 1), (3, 2), (3, 3)]
         locations = sorted(self.board.cells.keys())
         self.assertEqual(check, locations)
 
+    def testOffsetEdge(self):
+        """Test an offset off of the edge of the board."""
+        self.assertRaises(KeyError, self.board.offset, (3, 2), (1, 0))
+
+    def testOffsetTables(self):
+        """Test the offset tables for neighboring squares being made up front."""
+        directions = [(x, y) for x in (-1, 0, 1) for y in (-1, 0, 1) if x or y]
+        self.assertTrue(all(direction in self.board.offset_tables for direction in directions))
+
     def testOffsetValue(self):
         """Test the value of an offset."""
         center = board.Coordinate((2, 2))
@@ -443,6 +468,10 @@ class LineBoardTest(unittest.TestCase):
         """Test the class of an offset."""
         self.assertTrue(isinstance(self.board.offset(2, 2), board.MultiCell))
 
+    def testOffsetTable(self):
+        """Test the table for stepping back being made up front."""
+        self.assertEqual([board.NO_CELL, 0, 1, 2, 3], self.board.offset_tables[-1])
+
     def testPlaceEmpty(self):
         """Test placing a piece on an empty spot."""
         self.board.place(3, ['?'])
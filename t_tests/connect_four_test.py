@@ -7,16 +7,32 @@ Constants:
 C4Bots: The bot classes used in testing. (list of player.Bot)
 
 Classes:
-ABFindShortsTest: Tests of finding two or three pieces in a row. (TestCase)
 BoardCheckWinTest: Tests of C4Board.check_win. (unittest.TestCase)
+BoardHashTest: Tests of the C4Board position hash. (unittest.TestCase)
+BoardLinesTest: Tests of the C4Board line counts. (unittest.TestCase)
+BoardMoveTest: Tests of moves on the C4Board bitboards. (unittest.TestCase)
+C4BookTest: Tests of the Connect Four opening books. (unittest.TestCase)
 C4BotTest: Tests of the ConnectFour bots. (unittest.TestCase)
+C4EvalTest: Tests of the ConnectFour bots' evaluations. (unittest.TestCase)
+C4SearchTest: Tests of the bots' iterative deepening search. (unittest.TestCase)
+C4TableTest: Tests of the bots' transposition tables. (unittest.TestCase)
+
+Functions:
+play: Play columns in order on a board, alternating pieces. (None)
+set_up_game: Set up a Connect Four game for testing. (ConnectFour)
 """
 
 
+import os
+import pickle
 import random
+import shutil
+import tempfile
+import time
 import unittest
 
-from t_games import board
+from t_games import utility
+from t_games.board_games import connect_four_book as book
 from t_games.board_games import connect_four_game as connect_four
 from t_games.t_tests import unitility
 
@@ -24,54 +40,18 @@ from t_games.t_tests import unitility
 C4Bots = [connect_four.C4BotAlphaBeta, connect_four.C4BotGamma, connect_four.C4BotGamma]
 
 
-class ABFindShortsTest(unittest.TestCase):
-    """Tests of finding two or three pieces in a row. (unittest.TestCase)"""
-
-    def setUp(self):
-        self.bot = connect_four.C4BotAlphaBeta()
-        pieces = [(2, 0), (3, 0), (4, 0), (3, 1), (2, 2), (3, 2), (5, 2), (4, 3), (6, 3), (3, 4), (5, 4)]
-        pieces.append((3, 5))
-        self.shorts = self.bot.find_shorts([board.Coordinate(piece) for piece in pieces])
-
-    def testTwoHorizontal(self):
-        """Test detecting a horizontal two length short."""
-        self.assertIn(((2, 2), (3, 2)), self.shorts[0])
-
-    def testTwoNegative(self):
-        """Test detecting a negative slope two length short."""
-        self.assertIn(((5, 4), (6, 3)), self.shorts[0])
-
-    def testTwoPositive(self):
-        """Test detecting a positive slope two length short."""
-        self.assertIn(((5, 2), (6, 3)), self.shorts[0])
-
-    def testTwoVertical(self):
-        """Test detecting a vertical two length short."""
-        self.assertIn(((3, 4), (3, 5)), self.shorts[0])
-
-    def testThreeHorizontal(self):
-        """Test detecting a horizontal three length short."""
-        self.assertIn(((2, 0), (3, 0), (4, 0)), self.shorts[1])
-
-    def testThreeNegative(self):
-        """Test detecting a negative slope three length short."""
-        self.assertIn(((3, 4), (4, 3), (5, 2)), self.shorts[1])
-
-    def testThreePositive(self):
-        """Test detecting a positive slope three length short."""
-        self.assertIn(((3, 2), (4, 3), (5, 4)), self.shorts[1])
-
-    def testThreeVertical(self):
-        """Test detecting a vertical three length short."""
-        self.assertIn(((3, 0), (3, 1), (3, 2)), self.shorts[1])
-
-
 class BoardCheckWinTest(unittest.TestCase):
     """Tests of C4Board.check_win. (unittest.TestCase)"""
 
     def setUp(self):
         self.board = connect_four.C4Board(pieces = ['X', 'O'])
 
+    def testFullCheck(self):
+        """Test the full check agreeing with the line counts."""
+        for col in range(1, 5):
+            self.board.place((col, 1), 'X')
+        self.assertEqual(self.board.check_win(full = True), self.board.check_win())
+
     def testHorizontalLeft(self):
         """Test detecting a horizontal win touching the left edge."""
         row = random.randint(1, 6)
@@ -238,6 +218,22 @@ class BoardCheckWinTest(unittest.TestCase):
             self.board.place((col + delta, row + delta), 'X')
         self.assertEqual('X', self.board.check_win())
 
+    def testRandomGames(self):
+        """Test the line counts matching the full check through games with pops."""
+        rng = random.Random(49)
+        for game in range(20):
+            self.board = connect_four.C4Board(pieces = ['X', 'O'], poppable = True)
+            while self.board.check_win() == 'game on':
+                self.board.make_move(rng.choice(self.board.get_moves()))
+                self.assertEqual(self.board.check_win(full = True), self.board.check_win())
+
+    def testUnmake(self):
+        """Test a win being taken back."""
+        for col in (1, 1, 2, 2, 3, 3, 4):
+            self.board.make_move((col, self.board.pieces[self.board.count % 2]))
+        self.board.unmake_move((4, 'X'))
+        self.assertEqual('game on', self.board.check_win())
+
     def testVerticalHigh(self):
         """Test detecting a vertical win touching the top edge."""
         col = random.randint(1, 7)
@@ -260,8 +256,484 @@ class BoardCheckWinTest(unittest.TestCase):
         self.assertEqual('O', self.board.check_win())
 
 
+class BoardHashTest(unittest.TestCase):
+    """Tests of the C4Board position hash. (unittest.TestCase)"""
+
+    def setUp(self):
+        self.board = connect_four.C4Board(pieces = ['X', 'O'], poppable = True)
+
+    def testCopy(self):
+        """Test a copy having the same hash."""
+        play(self.board, 4, 3, 3)
+        self.assertEqual(self.board.position_hash, self.board.copy().position_hash)
+
+    def testEmpty(self):
+        """Test the hash of an empty board."""
+        self.assertEqual(0, self.board.position_hash)
+
+    def testMoves(self):
+        """Test the hash being updated with moves."""
+        play(self.board, 4, 3, 3, 5, 4, 4)
+        self.assertEqual(self.board.rehash(), self.board.position_hash)
+
+    def testPlace(self):
+        """Test the hash being updated when placing pieces."""
+        self.board.place((2, 3), 'X')
+        self.board.place((2, 3), 'O')
+        self.board.place((5, 1), 'X')
+        self.assertEqual(self.board.rehash(), self.board.position_hash)
+
+    def testPop(self):
+        """Test the hash being updated with pop moves."""
+        play(self.board, 4, 4, 4, 3)
+        self.board.make_move((-4, 'X'))
+        self.assertEqual(self.board.rehash(), self.board.position_hash)
+
+    def testTransposition(self):
+        """Test the same position reached by different moves having the same hash."""
+        play(self.board, 4, 3, 5)
+        position_hash = self.board.position_hash
+        self.board.clear()
+        play(self.board, 5, 3, 4)
+        self.assertEqual(position_hash, self.board.position_hash)
+
+
+class BoardLinesTest(unittest.TestCase):
+    """Tests of the C4Board line counts. (unittest.TestCase)"""
+
+    def setUp(self):
+        self.board = connect_four.C4Board(pieces = ['X', 'O'], poppable = True)
+
+    def recount(self):
+        """Count the lines on a new board with the same pieces."""
+        recount = connect_four.C4Board(pieces = ['X', 'O'])
+        for piece in recount.pieces:
+            for location in self.board.piece_locations(piece):
+                recount.place(location, piece)
+        return recount.line_counts, recount.open_lines, recount.strengths, recount.threats
+
+    def testBigBoard(self):
+        """Test the number of lines on the largest board."""
+        lines, cell_lines = connect_four.win_lines((35, 19))
+        self.assertEqual(32 * 19 + 35 * 16 + 2 * 32 * 16, len(lines))
+
+    def testCellLines(self):
+        """Test the number of lines through the cells in the bottom row."""
+        counts = [len(self.board.cell_lines[column * 7]) for column in range(7)]
+        self.assertEqual([3, 4, 5, 7, 5, 4, 3], counts)
+
+    def testClosed(self):
+        """Test lines being closed by the other player's pieces."""
+        play(self.board, 1, 2, 1, 2)
+        self.assertEqual(1, self.board.open_lines[0][2])
+
+    def testLines(self):
+        """Test the number of lines on a standard board."""
+        self.assertEqual(69, len(self.board.lines))
+
+    def testMoves(self):
+        """Test the line counts being updated with moves."""
+        play(self.board, 4, 4, 3, 5, 2, 3, 3)
+        counts = (self.board.line_counts, self.board.open_lines, self.board.strengths, self.board.threats)
+        self.assertEqual(self.recount(), counts)
+
+    def testPop(self):
+        """Test the line counts being updated with pop moves."""
+        play(self.board, 4, 4, 4, 3, 5)
+        self.board.make_move((-4, 'X'))
+        counts = (self.board.line_counts, self.board.open_lines, self.board.strengths, self.board.threats)
+        self.assertEqual(self.recount(), counts)
+
+    def testThreat(self):
+        """Test tracking open lines with three pieces."""
+        play(self.board, 1, 7, 2, 7, 3)
+        self.assertEqual(1, len(self.board.threats[0]))
+
+    def testUnmake(self):
+        """Test the line counts being restored when moves are taken back."""
+        play(self.board, 4, 4, 3, 5)
+        for move in ((-4, 'X'), (3, 'O'), (2, 'X')):
+            self.board.make_move(move)
+        for move in ((2, 'X'), (3, 'O'), (-4, 'X')):
+            self.board.unmake_move(move)
+        counts = (self.board.line_counts, self.board.open_lines, self.board.strengths, self.board.threats)
+        self.assertEqual(self.recount(), counts)
+
+
+class BoardMoveTest(unittest.TestCase):
+    """Tests of moves on the C4Board bitboards. (unittest.TestCase)"""
+
+    def setUp(self):
+        self.board = connect_four.C4Board(pieces = ['X', 'O'], poppable = True)
+
+    def testBigBoardWin(self):
+        """Test detecting a win in the far corner of the largest board."""
+        self.board = connect_four.C4Board((35, 19), pieces = ['X', 'O'])
+        for delta in range(4):
+            self.board.place((35 - delta, 16 + delta), 'O')
+        self.assertEqual('O', self.board.check_win())
+
+    def testCells(self):
+        """Test the cells matching the moves made."""
+        play(self.board, 4, 4, 3)
+        self.assertEqual(['X', 'O', 'X'], [self.board.cells[location].contents for location in
+            ((4, 1), (4, 2), (3, 1))])
+
+    def testCellsCopy(self):
+        """Test the cells of a copy matching the original."""
+        play(self.board, 4, 4, 3, 5)
+        clone = self.board.copy()
+        self.assertEqual(str(self.board), str(clone))
+
+    def testCopyIndependent(self):
+        """Test that moves on a copy do not change the original."""
+        play(self.board, 4)
+        clone = self.board.copy()
+        clone.make_move((4, 'O'))
+        self.assertEqual(1, self.board.column_height(4))
+
+    def testFullColumn(self):
+        """Test an error for playing in a full column."""
+        play(self.board, *([1] * 6))
+        with self.assertRaises(ValueError):
+            self.board.make_move((1, 'X'))
+
+    def testFullColumnMoves(self):
+        """Test a full column not being a legal move."""
+        play(self.board, *([2] * 6))
+        self.assertNotIn(2, [column for column, piece in self.board.get_moves()])
+
+    def testLastPiece(self):
+        """Test getting the last piece played."""
+        play(self.board, 4, 5)
+        self.assertEqual('O', self.board.last_piece())
+
+    def testNoWrap(self):
+        """Test that pieces at the top of one column and the bottom of the next are not a win."""
+        for cell in ((1, 5), (1, 6), (2, 1), (2, 2)):
+            self.board.place(cell, 'X')
+        self.assertEqual('game on', self.board.check_win())
+
+    def testOffset(self):
+        """Test finding the cell an offset away with the shared offset tables."""
+        play(self.board, 4, 4, 3)
+        self.assertEqual('O', self.board.offset((4, 1), (0, 1)).contents)
+        self.assertEqual('X', self.board.offset((4, 2), (-1, -1)).contents)
+
+    def testOffsetChanged(self):
+        """Test finding the cell an offset away after the cells change."""
+        play(self.board, 4, 4)
+        self.board.offset((4, 1), (0, 1))
+        self.board.make_move((-4, 'X'))
+        self.assertEqual('O', self.board.offset((4, 2), (0, -1)).contents)
+
+    def testOffsetOffBoard(self):
+        """Test an offset off of the board."""
+        self.assertRaises(KeyError, self.board.offset, (7, 6), (1, 0))
+
+    def testPieceLocations(self):
+        """Test getting the locations of a player's pieces."""
+        play(self.board, 4, 4, 3)
+        self.assertEqual([(3, 1), (4, 1)], sorted(self.board.piece_locations('X')))
+
+    def testPlaceHeight(self):
+        """Test the column height after placing pieces with a gap."""
+        self.board.place((3, 1), 'X')
+        self.board.place((3, 3), 'O')
+        self.assertEqual(1, self.board.column_height(3))
+
+    def testPop(self):
+        """Test popping a piece out of the bottom of a column."""
+        play(self.board, 4, 4, 4)
+        self.board.make_move((-4, 'X'))
+        self.assertEqual(['O', 'X', None], [self.board.cells[(4, row)].contents for row in range(1, 4)])
+
+    def testPopMoves(self):
+        """Test pop moves only being legal for the player's own pieces."""
+        play(self.board, 1, 2)
+        self.assertEqual([-1], [column for column, piece in self.board.get_moves() if column < 0])
+
+    def testReverseColumn(self):
+        """Test reversing the pieces in a column."""
+        play(self.board, 4, 4, 4, 3)
+        self.board.reverse_column(4)
+        self.assertEqual(['X', 'O', 'X', None], [self.board.cells[(4, row)].contents for row in range(1, 5)])
+
+    def testUnmake(self):
+        """Test taking back a move."""
+        play(self.board, 4, 4, 3)
+        before = (self.board.masks[:], self.board.heights[:], self.board.count, self.board.position_hash)
+        self.board.make_move((3, 'O'))
+        self.board.unmake_move((3, 'O'))
+        after = (self.board.masks, self.board.heights, self.board.count, self.board.position_hash)
+        self.assertEqual(before, after)
+
+    def testUnmakeCells(self):
+        """Test taking back a move after the cells have been built."""
+        play(self.board, 4, 4)
+        self.board.cells
+        self.board.unmake_move((4, 'O'))
+        self.assertIsNone(self.board.cells[(4, 2)].contents)
+
+    def testUnmakeInvalid(self):
+        """Test an error for taking back a move that was not made."""
+        play(self.board, 4, 4)
+        with self.assertRaises(ValueError):
+            self.board.unmake_move((4, 'X'))
+
+    def testUnmakePop(self):
+        """Test taking back a pop move."""
+        play(self.board, 4, 4, 4, 5)
+        before = (self.board.masks[:], self.board.heights[:], self.board.count, self.board.position_hash)
+        self.board.make_move((-4, 'X'))
+        self.board.unmake_move((-4, 'X'))
+        after = (self.board.masks, self.board.heights, self.board.count, self.board.position_hash)
+        self.assertEqual(before, after)
+
+
+class C4BookTest(unittest.TestCase):
+    """Tests of the Connect Four opening books. (unittest.TestCase)"""
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = connect_four.BOOK_PATH.format(4, 4)
+        self.book = book.build_book((4, 4), 2, path = os.path.join(self.folder, 'test.book'))
+        self.loaded = connect_four.BOOKS.get(self.path, False)
+        connect_four.BOOKS[self.path] = self.book
+        self.game = set_up_game((4, 4))
+
+    def tearDown(self):
+        if self.loaded is False:
+            del connect_four.BOOKS[self.path]
+        else:
+            connect_four.BOOKS[self.path] = self.loaded
+        self.book.close()
+        shutil.rmtree(self.folder)
+
+    def testBadFile(self):
+        """Test a file that is not a book not being loaded."""
+        path = os.path.join(self.folder, 'bad.book')
+        with open(path, 'wb') as bad_file:
+            bad_file.write(b'This is not a book.')
+        self.assertIsNone(connect_four.load_book((4, 4), path))
+
+    def testBotPlay(self):
+        """Test the bot playing the book move without searching."""
+        bot = connect_four.C4BotGamma(depth = 1)
+        bot.game = self.game
+        bot.symbol = 'X'
+        bot.set_up()
+        bot.search = None
+        self.assertEqual(self.book.lookup(self.game.board.position_hash)[0], bot.ask_int('Column? '))
+
+    def testBotPop(self):
+        """Test the bot not using the book when pop moves are allowed."""
+        self.game.board.poppable = True
+        bot = connect_four.C4BotGamma(depth = 1)
+        bot.game = self.game
+        bot.symbol = 'X'
+        bot.set_up()
+        bot.search = lambda board: ((3, 'X'), 0)
+        self.assertEqual(3, bot.ask_int('Column? '))
+
+    def testEmptyBoard(self):
+        """Test the solved outcome of an empty four by four board."""
+        self.assertEqual((2, 'draw'), self.book.lookup(self.game.board.position_hash))
+
+    def testForcedWin(self):
+        """Test solving a position with a win for the player to move."""
+        play(self.game.board, 1, 1, 2, 2, 3, 3)
+        self.assertEqual(1, book.solve(self.game.board, -1, 1, {}))
+
+    def testForcedWinMove(self):
+        """Test the book move in a position with a win for the player to move."""
+        play(self.game.board, 1, 1, 2, 2, 3, 3)
+        self.assertEqual((4, 2), book.book_move(self.game.board, {}))
+
+    def testLength(self):
+        """Test the number of positions in a two ply book."""
+        self.assertEqual(1 + 4 + 16, len(self.book))
+
+    def testMissing(self):
+        """Test looking up a position that is not in the book."""
+        play(self.game.board, 1, 1, 1)
+        self.assertNotIn(self.game.board.position_hash, self.book)
+
+    def testWrongSize(self):
+        """Test not loading a book for a different board size."""
+        self.assertIsNone(connect_four.load_book((5, 4), self.book.path))
+
+
 C4BotTest = unitility.bot_test(connect_four.ConnectFour, C4Bots, 1, [2], bot_params = [(), (), (8,)])
 
 
+class C4EvalTest(unittest.TestCase):
+    """Tests of the ConnectFour bots' evaluations. (unittest.TestCase)"""
+
+    def setUp(self):
+        self.game = set_up_game()
+        self.board = set_up_game(columns = (1, 7, 2, 7, 3)).board
+
+    def testOpenLines(self):
+        """Test evaluating strength and open lines."""
+        bot = connect_four.C4BotAlphaBeta()
+        bot.game = self.game
+        self.assertEqual(self.board.strengths[0] + 10 + 100, bot.eval_player(self.board, 0))
+
+    def testSearchedBoard(self):
+        """Test evaluating the board given rather than the game board."""
+        bot = connect_four.C4BotGamma()
+        bot.game = self.game
+        self.assertNotEqual(bot.eval_player(self.game.board, 0), bot.eval_player(self.board, 0))
+
+    def testThreat(self):
+        """Test the bonus for a three that can be completed now."""
+        bot = connect_four.C4BotGamma()
+        bot.game = self.game
+        base = self.board.strengths[0] + 25 + 100
+        self.assertEqual(base + bot.threat_value, bot.eval_player(self.board, 0))
+
+
+class C4SearchTest(unittest.TestCase):
+    """Tests of the bots' iterative deepening search. (unittest.TestCase)"""
+
+    def setUp(self):
+        self.game = set_up_game(columns = (4, 4, 3, 5))
+
+    def make_bot(self, depth, time_limit, processes = 1):
+        """Make a bot for the test game."""
+        bot = connect_four.C4BotGamma(depth, time_limit = time_limit, processes = processes)
+        bot.game = self.game
+        bot.symbol = 'X'
+        self.game.players = [bot, self.game.human]
+        bot.set_up()
+        return bot
+
+    def testBoardRestored(self):
+        """Test the board being the same after a search runs out of time."""
+        bot = self.make_bot(42, 0.1)
+        board = self.game.board.copy()
+        bot.search(board)
+        check = (self.game.board.masks, self.game.board.position_hash)
+        self.assertEqual(check, (board.masks, board.position_hash))
+
+    def testDeepens(self):
+        """Test searching past the first depth within the time limit."""
+        bot = self.make_bot(42, 0.5)
+        bot.search(self.game.board.copy())
+        self.assertGreater(bot.root_depth, 1)
+
+    def testFixedDepth(self):
+        """Test searching to the full depth without a time limit."""
+        bot = self.make_bot(4, 0)
+        move, value = bot.search(self.game.board.copy())
+        board = self.game.board.copy()
+        check = self.make_bot(4, 0).alpha_beta(board, 4, -utility.MAX_INT, utility.MAX_INT, True)
+        self.assertEqual(check[1], value)
+
+    def testKillers(self):
+        """Test only keeping the last two killer moves."""
+        bot = self.make_bot(4, 0)
+        for column in range(1, 4):
+            bot.store_cutoff((column, 'X'), 2)
+        self.assertEqual([(3, 'X'), (2, 'X')], bot.killers[2])
+
+    def testLegalMove(self):
+        """Test returning a legal move when time runs out."""
+        bot = self.make_bot(42, 0.1)
+        move, value = bot.search(self.game.board.copy())
+        self.assertIn(move, self.game.board.get_moves())
+
+    def testOrder(self):
+        """Test ordering the first move, then killer moves, then by history."""
+        bot = self.make_bot(4, 0)
+        bot.store_cutoff((5, 'X'), 4)
+        bot.store_cutoff((6, 'X'), 2)
+        bot.store_cutoff((6, 'X'), 2)
+        moves = [(column, 'X') for column in range(1, 8)]
+        order = [column for column, piece in bot.order_moves(moves, 4, (2, 'X'))]
+        self.assertEqual([2, 5, 6, 1, 3, 4, 7], order)
+
+    def testParallel(self):
+        """Test a parallel search finding the same value as a serial search."""
+        bot = self.make_bot(4, 0, 2)
+        try:
+            move, value = bot.search(self.game.board.copy())
+        finally:
+            bot.clean_up()
+        self.assertEqual(self.make_bot(4, 0).search(self.game.board.copy())[1], value)
+
+    def testPickle(self):
+        """Test sending a bot to another process without its game."""
+        bot = pickle.loads(pickle.dumps(self.make_bot(4, 0)))
+        self.assertFalse(hasattr(bot, 'game') or hasattr(bot, 'table'))
+
+    def testTimeLimit(self):
+        """Test stopping the search when time runs out."""
+        bot = self.make_bot(42, 0.2)
+        start = time.time()
+        bot.search(self.game.board.copy())
+        self.assertLess(time.time() - start, 1)
+
+
+class C4TableTest(unittest.TestCase):
+    """Tests of the bots' transposition tables. (unittest.TestCase)"""
+
+    def setUp(self):
+        self.game = set_up_game(columns = (4, 4, 3, 5))
+
+    def search(self, table_size):
+        """Search the test position with a given table size."""
+        bot = connect_four.C4BotGamma(depth = 5, table_size = table_size)
+        bot.game = self.game
+        bot.symbol = 'X'
+        self.game.players = [bot, self.game.human]
+        bot.set_up()
+        return bot, bot.alpha_beta(self.game.board.copy(), 5, -utility.MAX_INT, utility.MAX_INT, True)
+
+    def testNewGame(self):
+        """Test the table being cleared at the start of a game."""
+        bot, result = self.search(1024)
+        bot.set_up()
+        self.assertEqual([None] * 1024, bot.table)
+
+    def testSameValue(self):
+        """Test the table not changing the value of the search."""
+        self.assertEqual(self.search(0)[1][1], self.search(1024)[1][1])
+
+    def testStored(self):
+        """Test the root position being stored with its best move."""
+        bot, result = self.search(1024)
+        entry = bot.table[self.game.board.position_hash % 1024]
+        self.assertEqual((self.game.board.position_hash, 5, result[0]), (entry[0], entry[2], entry[5]))
+
+
+def play(board, *columns):
+    """
+    Play columns in order on a board, alternating pieces. (None)
+
+    Parameters:
+    board: The board to play on. (C4Board)
+    columns: The columns to play, starting with the player to move. (int)
+    """
+    for column in columns:
+        board.make_move((column, board.pieces[board.count % 2]))
+
+
+def set_up_game(dimensions = (7, 6), columns = ()):
+    """
+    Set up a Connect Four game for testing. (ConnectFour)
+
+    Parameters:
+    dimensions: The columns and rows of the board. (tuple of int)
+    columns: The columns to play on the board, starting with X. (tuple of int)
+    """
+    game = connect_four.ConnectFour(unitility.AutoBot(), 'none')
+    game.symbols = ['X', 'O']
+    game.board = connect_four.C4Board(dimensions, game.symbols)
+    play(game.board, *columns)
+    return game
+
+
 if __name__ == '__main__':
     unittest.main()
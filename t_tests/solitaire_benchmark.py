@@ -0,0 +1,308 @@
+"""
+solitaire_benchmark.py
+
+Benchmarks of the solitaire engine on fixed deals.
+
+Each solitaire variant is dealt from fixed seeds, and each deal has a script of
+commands recorded by a seeded random player. The scripts are saved once in
+SCRIPT_PATH, so that every run replays the same commands, even if changes to
+the engine change the moves a random player would make. The benchmark times
+dealing, move validation, replaying the script through handle_cmd, sorting
+with the auto command, and undoing the script. The timings are written as
+JSON, so that runs can be compared to catch regressions. From the command line
+(in the folder above t_games):
+
+    python -m t_games.t_tests.solitaire_benchmark [-f scripts] [-o file] [-r repeats]
+        [variant ...]
+
+To record new scripts (which makes new timings incomparable to old ones):
+
+    python -m t_games.t_tests.solitaire_benchmark -w [-f scripts] [-m moves]
+        [-s seeds] [variant ...]
+
+Copyright (C) 2018 by Craig O'Brien and the t_games contributors.
+See the top level __init__.py file for details on the t_games license.
+
+Constants:
+MOVES: The default number of commands recorded for each deal. (int)
+PHASES: The names of the timed phases. (tuple of str)
+REPEATS: The default number of times to repeat each timing. (int)
+SCRIPT_PATH: The default file of recorded scripts. (str)
+SEEDS: The default seeds for the deals. (list of int)
+VARIANTS: The solitaire games to benchmark, by name. (dict of str: type)
+
+Functions:
+deal_game: Deal a solitaire game from a fixed seed. (Solitaire)
+load_scripts: Load the recorded scripts. (dict)
+record_script: Record a script of commands for a deal. (list of str)
+record_scripts: Record scripts for the variants and save them. (dict)
+run_benchmark: Benchmark the solitaire variants. (dict)
+summarize: Summarize a list of timings. (dict of str: float)
+time_deal: Time the phases of playing a deal. (dict of str: float)
+"""
+
+
+from __future__ import print_function
+
+import getopt
+import json
+import os
+import platform
+import random
+import sys
+import timeit
+
+from t_games.card_games.solitaire_games import bisley_game
+from t_games.card_games.solitaire_games import canfield_game
+from t_games.card_games.solitaire_games import forty_thieves_game
+from t_games.card_games.solitaire_games import freecell_game
+from t_games.card_games.solitaire_games import gargantua_game
+from t_games.card_games.solitaire_games import klondike_game
+from t_games.card_games.solitaire_games import monte_carlo_game
+from t_games.card_games.solitaire_games import pyramid_game
+from t_games.card_games.solitaire_games import quadrille_game
+from t_games.card_games.solitaire_games import spider_game
+from t_games.card_games.solitaire_games import strategy_game
+from t_games.card_games.solitaire_games import winnability
+from t_games.card_games.solitaire_games import yukon_game
+from t_games import utility
+
+
+MOVES = 200
+
+PHASES = ('deal', 'validate', 'replay', 'auto', 'undo')
+
+REPEATS = 5
+
+SCRIPT_PATH = os.path.join(utility.LOC, 't_tests', 'solitaire_scripts.json')
+
+SEEDS = [1, 2, 3]
+
+VARIANTS = {'bisley': bisley_game.Bisley, 'canfield': canfield_game.Canfield,
+    'forty-thieves': forty_thieves_game.FortyThieves, 'freecell': freecell_game.FreeCell,
+    'gargantua': gargantua_game.Gargantua, 'klondike': klondike_game.Klondike,
+    'monte-carlo': monte_carlo_game.MonteCarlo, 'pyramid': pyramid_game.Pyramid,
+    'quadrille': quadrille_game.Quadrille, 'spider': spider_game.Spider,
+    'strategy': strategy_game.Strategy, 'yukon': yukon_game.Yukon}
+
+
+def deal_game(game_class, seed):
+    """
+    Deal a solitaire game from a fixed seed. (Solitaire)
+
+    Parameters:
+    game_class: The solitaire game to deal. (type)
+    seed: The seed for the random deal. (int)
+    """
+    random.seed(seed)
+    game = game_class(winnability.PlayoutBot(), 'none')
+    game.scores = {}
+    game.player_index = 0
+    game.set_up()
+    return game
+
+
+def load_scripts(path = SCRIPT_PATH):
+    """
+    Load the recorded scripts. (dict)
+
+    The return value has the number of commands recorded for each deal under
+    'moves', and the scripts under 'variants'. Each variant's scripts are keyed
+    by the seed of the deal, as text, and are lists of commands.
+
+    Parameters:
+    path: The file the scripts were saved to. (str)
+    """
+    with open(path) as script_file:
+        scripts = json.load(script_file)
+    for deals in scripts['variants'].values():
+        for seed in deals:
+            deals[seed] = deals[seed].split()
+    return scripts
+
+
+def record_script(game_class, seed, moves = MOVES):
+    """
+    Record a script of commands for a deal. (list of str)
+
+    The commands are chosen by a seeded random player: mostly moving the top
+    cards with no command given, with some turning and undoing.
+
+    Parameters:
+    game_class: The solitaire game to record a script for. (type)
+    seed: The seed for the deal and for the player. (int)
+    moves: The number of commands to record. (int)
+    """
+    game = deal_game(game_class, seed)
+    rng = random.Random(seed)
+    script = []
+    for move in range(moves):
+        roll = rng.random()
+        if roll < 0.15:
+            command = 'turn'
+        elif roll < 0.2:
+            command = 'undo'
+        else:
+            piles = [pile for pile in game.tableau + game.reserve + [game.waste] if pile]
+            cards = [pile[-1] for pile in piles] + game.cells
+            if not cards:
+                continue
+            command = str(rng.choice(cards))
+        game.handle_cmd(command)
+        script.append(command)
+    return script
+
+
+def record_scripts(variants = None, seeds = SEEDS, moves = MOVES, path = SCRIPT_PATH):
+    """
+    Record scripts for the variants and save them. (dict)
+
+    The return value is the saved scripts, as returned by load_scripts. In the
+    file, each script is stored as one string of space separated commands.
+
+    Parameters:
+    variants: The names of the variants to record scripts for, None for all. (list of str)
+    seeds: The seeds for the deals. (list of int)
+    moves: The number of commands to record for each deal. (int)
+    path: The file to save the scripts to. (str)
+    """
+    if variants is None:
+        variants = sorted(VARIANTS)
+    scripts = {'moves': moves, 'variants': {}}
+    for name in variants:
+        deals = {}
+        for seed in seeds:
+            deals[str(seed)] = ' '.join(record_script(VARIANTS[name], seed, moves))
+        scripts['variants'][name] = deals
+    with open(path, 'w') as script_file:
+        json.dump(scripts, script_file, indent = 2, sort_keys = True)
+        script_file.write('\n')
+    return load_scripts(path)
+
+
+def run_benchmark(variants = None, repeats = REPEATS, path = SCRIPT_PATH):
+    """
+    Benchmark the solitaire variants. (dict)
+
+    The deals and the commands replayed come from the saved scripts. The return
+    value is a report that can be saved as JSON, with the summarized timings (in
+    seconds, totalled over the seeds) for each phase of each variant.
+
+    Parameters:
+    variants: The names of the variants to benchmark, None for all saved. (list of str)
+    repeats: The number of times to repeat each timing. (int)
+    path: The file of saved scripts to replay. (str)
+    """
+    scripts = load_scripts(path)
+    if variants is None:
+        variants = sorted(scripts['variants'])
+    report = {'python': platform.python_version(), 'platform': platform.platform(),
+        'moves': scripts['moves'], 'repeats': repeats, 'scripts': os.path.basename(path), 'variants': {}}
+    report['seeds'] = sorted(set(int(seed) for name in variants for seed in scripts['variants'][name]))
+    for name in variants:
+        game_class = VARIANTS[name]
+        deals = scripts['variants'][name]
+        seeds = sorted(deals, key = int)
+        # Total the timings over the seeds for each repeat.
+        totals = {phase: [0.0] * repeats for phase in PHASES}
+        move_count = 0
+        for seed in seeds:
+            script = deals[seed]
+            for repeat in range(repeats):
+                timings = time_deal(game_class, int(seed), script)
+                if not repeat:
+                    move_count += timings['moves']
+                for phase in PHASES:
+                    totals[phase][repeat] += timings[phase]
+        results = {phase: summarize(totals[phase]) for phase in PHASES}
+        results['moves'] = move_count
+        report['variants'][name] = results
+    return report
+
+
+def summarize(timings):
+    """
+    Summarize a list of timings. (dict of str: float)
+
+    Parameters:
+    timings: The timings to summarize. (list of float)
+    """
+    ordered = sorted(timings)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        median = ordered[middle]
+    else:
+        median = (ordered[middle - 1] + ordered[middle]) / 2
+    return {'min': ordered[0], 'median': median, 'max': ordered[-1]}
+
+
+def time_deal(game_class, seed, script):
+    """
+    Time the phases of playing a deal. (dict of str: float)
+
+    The return value has the time for each phase, plus the number of moves left
+    after the script was replayed.
+
+    Parameters:
+    game_class: The solitaire game to time. (type)
+    seed: The seed for the deal. (int)
+    script: The commands to replay. (list of str)
+    """
+    timer = timeit.default_timer
+    timings = {}
+    # Time the deal.
+    start = timer()
+    game = deal_game(game_class, seed)
+    timings['deal'] = timer() - start
+    # Time the validation of all the possible moves.
+    start = timer()
+    winnability.playout_moves(game)
+    timings['validate'] = timer() - start
+    # Time replaying the script.
+    start = timer()
+    for command in script:
+        game.handle_cmd(command)
+    timings['replay'] = timer() - start
+    timings['moves'] = len(game.moves)
+    # Time sorting with the auto command.
+    start = timer()
+    game.handle_cmd('auto')
+    timings['auto'] = timer() - start
+    # Time undoing all of the moves.
+    start = timer()
+    game.handle_cmd('undo {}'.format(len(game.moves)))
+    timings['undo'] = timer() - start
+    return timings
+
+
+if __name__ == '__main__':
+    # Run the benchmark from the command line.
+    opts, args = getopt.getopt(sys.argv[1:], 'f:m:o:r:s:w')
+    settings = {'variants': args or None}
+    record_settings, out_path, record = {}, '', False
+    for option, value in opts:
+        if option == '-f':
+            settings['path'] = value
+        elif option == '-m':
+            record_settings['moves'] = int(value)
+        elif option == '-o':
+            out_path = value
+        elif option == '-r':
+            settings['repeats'] = int(value)
+        elif option == '-s':
+            record_settings['seeds'] = [int(seed) for seed in value.split(',')]
+        elif option == '-w':
+            record = True
+    # Record new scripts if asked to.
+    if record:
+        record_settings.update(settings)
+        record_settings.pop('repeats', None)
+        scripts = record_scripts(**record_settings)
+        print('Scripts recorded for {} variants.'.format(len(scripts['variants'])))
+        sys.exit()
+    report = run_benchmark(**settings)
+    if out_path:
+        with open(out_path, 'w') as out_file:
+            json.dump(report, out_file, indent = 2, sort_keys = True)
+    else:
+        print(json.dumps(report, indent = 2, sort_keys = True))
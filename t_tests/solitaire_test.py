@@ -0,0 +1,295 @@
+"""
+solitaire_test.py
+
+Automated testing of solitaire_game.py.
+
+Functions:
+play_some: Make random moves in a solitaire game. (None)
+set_up_game: Set up a solitaire game for testing. (Solitaire)
+
+Classes:
+AutoTest: Tests of automatically sorting cards. (unittest.TestCase)
+FreeCellSolverTest: Tests of the FreeCell solver and deal index. (unittest.TestCase)
+PositionHashTest: Tests of the Zobrist position hash. (unittest.TestCase)
+WinnabilityTest: Tests of estimating the chance of winning. (unittest.TestCase)
+"""
+
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from t_games.card_games.solitaire_games import canfield_game as canfield
+from t_games.card_games.solitaire_games import freecell_game as freecell
+from t_games.card_games.solitaire_games import freecell_solver
+from t_games.card_games.solitaire_games import klondike_game as klondike
+from t_games.card_games.solitaire_games import quadrille_game as quadrille
+from t_games.card_games.solitaire_games import spider_game as spider
+from t_games.card_games.solitaire_games import winnability
+from t_games.t_tests import unitility
+
+
+def play_some(game, moves):
+    """
+    Make random moves in a solitaire game. (None)
+
+    Parameters:
+    game: The game to make moves in. (Solitaire)
+    moves: The number of moves to attempt. (int)
+    """
+    for move in range(moves):
+        roll = random.random()
+        if roll < 0.15:
+            game.handle_cmd('turn')
+        elif roll < 0.25:
+            game.handle_cmd('undo')
+        else:
+            piles = [pile for pile in game.tableau + game.reserve + [game.waste] if pile]
+            cards = [pile[-1] for pile in piles] + game.cells
+            if cards:
+                game.handle_cmd(str(random.choice(cards)))
+
+
+def set_up_game(game_class):
+    """
+    Set up a solitaire game for testing. (Solitaire)
+
+    Parameters:
+    game_class: The solitaire game to set up. (type)
+    """
+    game = game_class(unitility.AutoBot(), 'none')
+    game.scores = {}
+    game.player_index = 0
+    game.set_up()
+    return game
+
+
+class AutoTest(unittest.TestCase):
+    """Tests of automatically sorting cards. (unittest.TestCase)"""
+
+    def sortable(self, game):
+        """Get the sortable cards in a game. (list of TrackingCard)"""
+        piles = [pile for pile in game.tableau + game.reserve + [game.waste] if pile]
+        cards = [pile[-1] for pile in piles] + game.cells
+        return [card for card in cards if game.sort_check(card, game.find_foundation(card), False)]
+
+    def testAutoFreeCell(self):
+        """Test that auto leaves no sortable cards in FreeCell."""
+        game = set_up_game(freecell.FreeCell)
+        play_some(game, 100)
+        game.handle_cmd('auto')
+        self.assertEqual([], self.sortable(game))
+
+    def testAutoKlondike(self):
+        """Test that auto leaves no sortable cards in Klondike."""
+        game = set_up_game(klondike.Klondike)
+        play_some(game, 100)
+        game.handle_cmd('auto')
+        self.assertEqual([], self.sortable(game))
+
+    def testAutoMaxRank(self):
+        """Test that auto does not sort cards above the given rank."""
+        game = set_up_game(freecell.FreeCell)
+        game.handle_cmd('auto 3')
+        ranks = [card.rank_num for foundation in game.foundations for card in foundation]
+        self.assertTrue(all(rank <= 3 for rank in ranks))
+
+
+class FreeCellSolverTest(unittest.TestCase):
+    """Tests of the FreeCell solver and deal index. (unittest.TestCase)"""
+
+    def setUp(self):
+        self.game = freecell.FreeCell(unitility.AutoBot([617]), 'cells=4')
+        self.game.scores = {}
+        self.game.player_index = 0
+        self.game.set_up()
+
+    def testDealLayout(self):
+        """Test that the solver's layout matches the game's deal."""
+        layout = freecell_solver.deal_layout(617)
+        layout_text = [[freecell_solver.card_text(card) for card in pile] for pile in layout]
+        self.assertEqual([[str(card) for card in pile] for pile in self.game.tableau], layout_text)
+
+    def testIndex(self):
+        """Test writing and reading a deal index."""
+        folder = tempfile.mkdtemp()
+        try:
+            path = os.path.join(folder, 'test.idx')
+            freecell_solver.build_index(1, 3, processes = 1, path = path)
+            index = freecell_solver.DealIndex(path)
+            self.assertEqual([1, 2, 3], index.winnable())
+            self.assertEqual(freecell_solver.SOLVABLE, index.lookup(2)[0])
+            self.assertIsNone(index.lookup(4))
+        finally:
+            shutil.rmtree(folder)
+
+    def testNodeLimit(self):
+        """Test the solver giving up at the node limit."""
+        solver = freecell_solver.FreeCellSolver(node_limit = 10)
+        status, moves, nodes = solver.solve(freecell_solver.deal_layout(617))
+        self.assertEqual((freecell_solver.UNKNOWN, [], 10), (status, moves, nodes))
+
+    def testSolution(self):
+        """Test that playing the solver's solution wins the game."""
+        status, moves, nodes = freecell_solver.FreeCellSolver().solve(freecell_solver.deal_layout(617))
+        self.assertEqual(freecell_solver.SOLVABLE, status)
+        for move in moves:
+            self.game.handle_cmd(move)
+        self.assertEqual(52, sum(len(foundation) for foundation in self.game.foundations))
+
+    def testUnsolvable(self):
+        """Test the solver proving a deal can't be won."""
+        solver = freecell_solver.FreeCellSolver(baker = True)
+        status, moves, nodes = solver.solve(freecell_solver.deal_layout(10))
+        self.assertEqual(freecell_solver.UNSOLVABLE, status)
+
+
+class PositionHashTest(unittest.TestCase):
+    """Tests of the Zobrist position hash. (unittest.TestCase)"""
+
+    def testCanonicalSwap(self):
+        """Test that swapping tableau piles doesn't change a canonical hash."""
+        game = set_up_game(freecell.FreeCell)
+        start = game.position_hash
+        game.tableau[0][:], game.tableau[1][:] = game.tableau[1][:], game.tableau[0][:]
+        self.assertEqual(start, game.rehash())
+
+    def testDuplicateCopies(self):
+        """Test that the two copies of a card in a double deck don't cancel out."""
+        game = set_up_game(spider.Spider)
+        # Pull both copies of the six and five of spades and the six of hearts.
+        cards = {'6S': [], '5S': [], '6H': []}
+        for location in game.tableau + [game.stock]:
+            for card in location[:]:
+                if card.up_text in cards:
+                    location.remove(card)
+                    card.up = True
+                    cards[card.up_text].append(card)
+        six_spades, five_spades, six_hearts = cards['6S'], cards['5S'], cards['6H']
+        # Compare the hashes of two positions with the same edges twice over.
+        piles = game.tableau[:4]
+        for pile in piles:
+            pile[:] = []
+        piles[0][:], piles[1][:] = [six_spades[0], five_spades[0]], [six_spades[1], five_spades[1]]
+        piles[2][:], piles[3][:] = [six_hearts[0]], [six_hearts[1]]
+        stacked = game.rehash()
+        piles[0][:], piles[1][:] = [six_spades[0]], [six_spades[1]]
+        piles[2][:], piles[3][:] = [six_hearts[0], five_spades[0]], [six_hearts[1], five_spades[1]]
+        self.assertNotEqual(stacked, game.rehash())
+
+    def testExactSwap(self):
+        """Test that swapping tableau piles changes a non-canonical hash."""
+        game = set_up_game(klondike.Klondike)
+        start = game.position_hash
+        game.tableau[2][:], game.tableau[3][:] = game.tableau[3][:], game.tableau[2][:]
+        self.assertNotEqual(start, game.rehash())
+
+    def testIncrementalFreeCell(self):
+        """Test the incremental hash against rehashing in FreeCell."""
+        game = set_up_game(freecell.FreeCell)
+        play_some(game, 100)
+        check = game.position_hash
+        self.assertEqual(check, game.rehash())
+
+    def testIncrementalKlondike(self):
+        """Test the incremental hash against rehashing in Klondike."""
+        game = set_up_game(klondike.Klondike)
+        play_some(game, 100)
+        check = game.position_hash
+        self.assertEqual(check, game.rehash())
+
+    def testIncrementalQuadrille(self):
+        """Test the incremental hash against rehashing in Quadrille."""
+        game = set_up_game(quadrille.Quadrille)
+        play_some(game, 100)
+        check = game.position_hash
+        self.assertEqual(check, game.rehash())
+
+    def testIncrementalSpider(self):
+        """Test the incremental hash against rehashing in Spider."""
+        game = set_up_game(spider.Spider)
+        play_some(game, 100)
+        check = game.position_hash
+        self.assertEqual(check, game.rehash())
+
+    def testTurnChanges(self):
+        """Test that turning cards changes the hash."""
+        game = set_up_game(klondike.Klondike)
+        start = game.position_hash
+        game.handle_cmd('turn')
+        self.assertNotEqual(start, game.position_hash)
+
+    def testUndo(self):
+        """Test that undoing a move restores the hash."""
+        game = set_up_game(klondike.Klondike)
+        start = game.position_hash
+        game.handle_cmd('turn')
+        game.handle_cmd('undo')
+        self.assertEqual(start, game.position_hash)
+
+
+class WinnabilityTest(unittest.TestCase):
+    """Tests of estimating the chance of winning. (unittest.TestCase)"""
+
+    def setUp(self):
+        self.game = set_up_game(klondike.Klondike)
+        play_some(self.game, 30)
+
+    def layout(self, game):
+        """Get the cards in a game, with face down cards hidden. (list of list of str)"""
+        locations = game.tableau + game.foundations + [game.stock, game.waste]
+        return [[str(card) if card.up else '??' for card in location] for location in locations]
+
+    def testChance(self):
+        """Test the chance command."""
+        self.game.human.info = []
+        self.game.handle_cmd('chance 2')
+        self.assertIn('Your chance of winning is about', self.game.human.info[-1])
+
+    def testDeterminizeCards(self):
+        """Test that a sample has the same cards as the game."""
+        sample = winnability.determinize(winnability.snapshot(self.game), random.Random(1))
+        self.assertEqual(sorted(str(card) for card in self.game.deck.in_play),
+            sorted(str(card) for card in sample.deck.in_play))
+
+    def testDeterminizeFoundationRank(self):
+        """Test that a Canfield sample keeps the game's foundation rank."""
+        game = set_up_game(canfield.Canfield)
+        state = winnability.snapshot(game)
+        for seed in range(10):
+            sample = winnability.determinize(state, random.Random(seed))
+            self.assertEqual(game.foundation_rank, sample.foundation_rank)
+
+    def testDeterminizeHash(self):
+        """Test that a sample has a valid position hash."""
+        sample = winnability.determinize(winnability.snapshot(self.game), random.Random(1))
+        check = sample.position_hash
+        self.assertEqual(check, sample.rehash())
+
+    def testDeterminizeVisible(self):
+        """Test that a sample matches the visible cards of the game."""
+        sample = winnability.determinize(winnability.snapshot(self.game), random.Random(1))
+        self.assertEqual(self.layout(self.game), self.layout(sample))
+
+    def testEstimate(self):
+        """Test that the estimate is in its confidence interval."""
+        chance, low, high = winnability.estimate_wins(self.game, 5, processes = 1, seed = 1)
+        self.assertTrue(0 <= low <= chance <= high <= 1)
+
+    def testEstimateSeed(self):
+        """Test that estimates with the same seed match."""
+        first = winnability.estimate_wins(self.game, 5, processes = 1, seed = 1)
+        self.assertEqual(first, winnability.estimate_wins(self.game, 5, processes = 1, seed = 1))
+
+    def testWilson(self):
+        """Test the confidence interval for an even win rate."""
+        chance, low, high = winnability.wilson_interval(50, 100)
+        self.assertEqual(0.5, chance)
+        self.assertAlmostEqual(0.5 - low, high - 0.5)
+        self.assertAlmostEqual(0.404, low, places = 3)
+
+
+if __name__ == '__main__':
+    unittest.main()